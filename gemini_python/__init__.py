@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from enum import unique, Enum
 from multiprocessing.synchronize import Event as EventClass
 from pathlib import Path
-from typing import List, Callable, Iterable, Dict, Optional, Union
+from typing import List, Callable, Iterable, Dict, Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +15,10 @@ class CqlDto:
 
     statement: str
     values: tuple = ()
+    statement_id: Optional[
+        int
+    ] = None  # id in StatementRegistry, for fast prepared statement lookup
+    table_name: Optional[str] = None  # keyspace.table written or read, for history store
 
 
 class Operation(Enum):
@@ -22,6 +26,7 @@ class Operation(Enum):
 
     WRITE = "write"
     READ = "read"
+    DELETE = "delete"
 
 
 @unique
@@ -33,6 +38,20 @@ class QueryMode(Enum):
     MIXED = "mixed"
 
 
+@dataclass
+class ConnectionOptions:  # pylint: disable=too-many-instance-attributes
+    """Query driver connection settings"""
+
+    connection_class: str = "asyncore"
+    token_aware: bool = False
+    shard_aware: bool = True
+    compression: str = "auto"
+    protocol_version: int = 4
+    request_timeout: float = 10.0
+    row_factory: str = "dict"
+    fetch_size: int = 5000
+
+
 @dataclass
 class GeminiConfiguration:  # pylint: disable=too-many-instance-attributes
     """Configuration parameters for Gemini"""
@@ -43,6 +62,8 @@ class GeminiConfiguration:  # pylint: disable=too-many-instance-attributes
     duration: int = 3
     drop_schema: bool = False
     token_range_slices: int = 10000
+    token_aware_partitions: bool = False
+    partitions_token_range: Optional[Tuple[int, int]] = None
     concurrency: int = 4
     seed: int = 0
     max_tables: int = 1
@@ -58,7 +79,45 @@ class GeminiConfiguration:  # pylint: disable=too-many-instance-attributes
     ttl: int = 0
     history_files_max_size_gb: int = 1
     history_files_dir: Path = Path.cwd() / ".gemini"
+    history_flush_rows: int = 1000
+    history_commit_interval: float = 1.0
+    history_backend: str = "sqlite"
+    history_storage: str = "dir"
+    history_capacity: int = 1_000_000
+    shared_history: bool = False
+    checkpoint_interval: float = 60.0
+    resume: bool = False
+    value_pool_size: int = 0
+    value_pool_reuse: int = 10
+    delete_ratio: float = 0.0
+    deletion_verification_delay: float = 10.0
+    deletion_verification_batch_size: int = 100
     outfile: Optional[Path] = None
+    max_in_flight: int = 1
+    concurrent_dispatch: bool = False
+    request_batch_size: int = 1
+    asyncio_concurrency: int = 0
+    connection_class: str = "asyncore"
+    token_aware: bool = False
+    shard_aware: bool = True
+    compression: str = "auto"
+    protocol_version: int = 4
+    request_timeout: float = 10.0
+    row_factory: str = "dict"
+    fetch_size: int = 5000
+
+    @property
+    def connection_options(self) -> ConnectionOptions:
+        return ConnectionOptions(
+            connection_class=self.connection_class,
+            token_aware=self.token_aware,
+            shard_aware=self.shard_aware,
+            compression=self.compression,
+            protocol_version=self.protocol_version,
+            request_timeout=self.request_timeout,
+            row_factory=self.row_factory,
+            fetch_size=self.fetch_size,
+        )
 
 
 OnSuccessClb = Callable[[Optional[Iterable]], None]
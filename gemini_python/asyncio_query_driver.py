@@ -0,0 +1,152 @@
+#  pylint: disable=no-name-in-module
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+from cassandra.cluster import ResponseFuture  # type: ignore
+
+from gemini_python import CqlDto
+from gemini_python.query_driver import (
+    NoOpQueryDriver,
+    PythonQueryDriver,
+    QueryDriver,
+    QueryDriverException,
+    add_rows_callbacks,
+)
+
+
+class AsyncQueryDriver(ABC):
+    """Asyncio counterpart of QueryDriver - queries are awaited instead of blocking."""
+
+    @abstractmethod
+    async def execute(self, cql_dto: CqlDto) -> Iterable:
+        """Executes statement. Raises QueryDriverException on failure."""
+
+    async def execute_many(self, cql_dtos: List[CqlDto]) -> List[Union[Iterable, Exception]]:
+        """Executes statements concurrently.
+
+        Returns result for each statement or QueryDriverException if given statement failed."""
+        return list(
+            await asyncio.gather(
+                *(self.execute(cql_dto) for cql_dto in cql_dtos), return_exceptions=True
+            )
+        )
+
+    def teardown(self) -> None:
+        """Frees resources. Underlying QueryDriver is not closed."""
+
+
+class AsyncioPythonQueryDriver(AsyncQueryDriver):
+    """Runs queries using PythonQueryDriver session, adapting driver's ResponseFuture to asyncio future."""
+
+    def __init__(self, query_driver: PythonQueryDriver) -> None:
+        self._query_driver = query_driver
+
+    async def execute(self, cql_dto: CqlDto) -> Iterable:
+        loop = asyncio.get_running_loop()
+        try:
+            prepared_statement = self._query_driver.get_prepared_statement(cql_dto)
+            response_future = self._query_driver.session.execute_async(
+                prepared_statement, parameters=cql_dto.values
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            raise QueryDriverException(exc) from exc
+        return await _as_asyncio_future(response_future, loop)
+
+
+class AsyncNoOpQueryDriver(AsyncQueryDriver):
+    """Does nothing. Used when no oracle is configured."""
+
+    async def execute(self, cql_dto: CqlDto) -> Iterable:
+        await asyncio.sleep(0)  # let other coroutines run
+        return []
+
+
+class ThreadedQueryDriver(AsyncQueryDriver):
+    """Runs blocking QueryDriver in dedicated thread.
+
+    Queries awaited meanwhile are queued and sent together as one concurrent batch (`QueryDriver.execute_many`)
+    when the thread is free, so many queries are in flight at once. Batches are limited to `max_batch_size`."""
+
+    def __init__(self, query_driver: QueryDriver, max_batch_size: int = 1000) -> None:
+        self._query_driver = query_driver
+        self._max_batch_size = max_batch_size
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending: List[Tuple[CqlDto, "asyncio.Future[Iterable]"]] = []
+        self._dispatcher: "Optional[asyncio.Task[None]]" = None
+
+    async def execute(self, cql_dto: CqlDto) -> Iterable:
+        future: "asyncio.Future[Iterable]" = asyncio.get_running_loop().create_future()
+        self._pending.append((cql_dto, future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        return await future
+
+    async def _dispatch(self) -> None:
+        """Sends queued queries in batches until queue is empty."""
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            batch = self._pending[: self._max_batch_size]
+            del self._pending[: self._max_batch_size]
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self._execute_many, [cql_dto for cql_dto, _ in batch]
+                )
+            except Exception as exc:  # pylint: disable=broad-except
+                results = [QueryDriverException(exc) for _ in batch]
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    _set_exception(future, result)
+                else:
+                    _set_result(future, result)
+
+    def _execute_many(self, cql_dtos: List[CqlDto]) -> List[Union[Iterable, Exception]]:
+        # rows are fetched (all pages) in this thread, not on event loop
+        return [
+            result if isinstance(result, Exception) else list(result)
+            for result in self._query_driver.execute_many(cql_dtos)
+        ]
+
+    def teardown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class AsyncQueryDriverFactory:
+    """Creates AsyncQueryDriver objects wrapping given QueryDriver."""
+
+    @classmethod
+    def create_query_driver(
+        cls, query_driver: QueryDriver, native: bool = True
+    ) -> AsyncQueryDriver:
+        """When `native` is False, PythonQueryDriver is run in a thread instead of asyncio adapter.
+
+        Python driver can't operate async on 2 different clusters in one process, so only one of them can be native."""
+        if isinstance(query_driver, NoOpQueryDriver):
+            return AsyncNoOpQueryDriver()
+        if native and isinstance(query_driver, PythonQueryDriver):
+            return AsyncioPythonQueryDriver(query_driver)
+        return ThreadedQueryDriver(query_driver)
+
+
+def _as_asyncio_future(
+    response_future: ResponseFuture, loop: asyncio.AbstractEventLoop
+) -> "asyncio.Future[List[Any]]":
+    """Returns asyncio future resolved with all result rows (fetching all pages) or QueryDriverException."""
+    future: "asyncio.Future[List[Any]]" = loop.create_future()
+    add_rows_callbacks(
+        response_future,
+        lambda rows: loop.call_soon_threadsafe(_set_result, future, rows),
+        lambda error: loop.call_soon_threadsafe(_set_exception, future, error),
+    )
+    return future
+
+
+def _set_result(future: asyncio.Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exc: Exception) -> None:
+    if not future.done():
+        future.set_exception(exc)
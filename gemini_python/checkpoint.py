@@ -0,0 +1,62 @@
+"""Checkpoints of GeminiProcess state, so long runs can be continued (`--resume`) after being stopped or killed.
+
+History itself is not part of checkpoint - it's committed to (persistent) history store before checkpoint is taken."""
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Sequence, Tuple
+
+from gemini_python import CqlDto, Operation, QueryMode
+from gemini_python.results import ProcessResult
+from gemini_python.schema import Schema
+
+
+def schema_fingerprint(schema: Schema) -> str:
+    """Returns hash of schema definition, so checkpoint is not resumed with different schema."""
+    definition = "\n".join(table.as_query().statement for table in schema.tables)
+    return hashlib.sha256(definition.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Checkpoint:  # pylint: disable=too-many-instance-attributes
+    """State of one worker: generated partitions, generators positions, PRNG states, retries and counters.
+
+    Operations in flight when checkpoint is taken are stored with retries - they're executed again after resume,
+    as it's not known whether they completed before process was stopped."""
+
+    schema_fingerprint: str
+    mode: QueryMode  # determines query generators, whose positions are stored
+    partitions: List[Sequence[tuple]]  # usually `Partitions`, so only their definition is stored
+    generator_state: Any  # LoadGenerator.get_state()
+    column_states: List[List[Any]]  # Column.get_state() of each column of each table
+    random_state: Any  # state of `random` module PRNG (used for sampling history)
+    retries: List[Tuple[Operation, CqlDto, int]]
+    process_result: ProcessResult
+
+    @staticmethod
+    def file_path(history_file_dir: Path, index: int) -> Path:
+        return history_file_dir / f"gemini_{index}.checkpoint"
+
+    def save(self, path: Path) -> None:
+        """Writes checkpoint atomically - killed process leaves previous checkpoint intact."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, schema: Schema, mode: QueryMode) -> "Checkpoint":
+        """Reads checkpoint written for given schema and mode. Raises ValueError if it was written for different ones."""
+        with open(path, "rb") as file:
+            checkpoint = pickle.load(file)
+        if not isinstance(checkpoint, cls):
+            raise ValueError(f"{path} is not a checkpoint file")
+        if checkpoint.schema_fingerprint != schema_fingerprint(schema):
+            raise ValueError(f"Checkpoint {path} was written for different schema")
+        if checkpoint.mode != mode:
+            raise ValueError(
+                f"Checkpoint {path} was written in {checkpoint.mode.value} mode, can't resume in {mode.value} mode"
+            )
+        return checkpoint
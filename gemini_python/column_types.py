@@ -1,14 +1,21 @@
+import functools
 import hashlib
 import logging
+import math
 import random
 import string
+import struct
 import sys
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+_ASCII_ALPHABET = string.ascii_letters + string.digits
+# maps random byte to alphabet character (first 256 % 62 characters are slightly more frequent)
+_ASCII_TRANSLATION = bytes(ord(_ASCII_ALPHABET[byte % len(_ASCII_ALPHABET)]) for byte in range(256))
+
 
 @dataclass
 class Column:
@@ -38,6 +45,38 @@ class Column:
     def generate_random_value(self) -> Any:
         """Generates random value for given Column"""
 
+    def generate_batch(self, count: int) -> List[Any]:
+        """Generates `count` random values at once.
+
+        Values are the same as generated by `count` calls of `generate_random_value`, so generated data
+        doesn't depend on batch sizes."""
+        return [self.generate_random_value() for _ in range(count)]
+
+    def generate_value_at(self, index: int) -> Any:
+        """Generates `index`-th value of column's indexed sequence.
+
+        Value depends only on column seed and `index` (not on PRNG state), so it can be recomputed any time."""
+
+    @property
+    def distinct_values(self) -> Optional[int]:
+        """Number of values `generate_value_at` cycles through, None if it's practically unbounded."""
+        return None
+
+    def serialize_value(self, value: Any) -> bytes:
+        """Returns value serialized as in CQL protocol (e.g. to compute partition token)."""
+        raise TypeError(f"Column type {self.cql_type} can't be serialized")
+
+    def _index_bytes(self, index: int, length: int) -> bytes:
+        """Returns `length` pseudo random bytes derived from column seed and `index`."""
+        return hashlib.shake_128(f"{self.seed}:{index}".encode("ascii")).digest(length)
+
+    def get_state(self) -> Any:
+        """Returns state of values generator, so generation can be continued later (e.g. after restart)."""
+        return self._random.getstate()
+
+    def set_state(self, state: Any) -> None:
+        self._random.setstate(state)
+
 
 @dataclass
 class AsciiColumn(Column):
@@ -50,7 +89,19 @@ class AsciiColumn(Column):
     size: int = 100
 
     def generate_random_value(self) -> Any:
-        return "".join(self._random.choices(string.ascii_letters + string.digits, k=self.size))
+        return self.generate_batch(1)[0]
+
+    def generate_batch(self, count: int) -> List[Any]:
+        # whole 4 byte words per value - PRNG output doesn't depend on batch size
+        stride = -(-self.size // 4) * 4
+        chars = self._random.randbytes(count * stride).translate(_ASCII_TRANSLATION).decode("ascii")
+        return [chars[start : start + self.size] for start in range(0, count * stride, stride)]
+
+    def generate_value_at(self, index: int) -> Any:
+        return self._index_bytes(index, self.size).translate(_ASCII_TRANSLATION).decode("ascii")
+
+    def serialize_value(self, value: Any) -> bytes:
+        return str(value).encode("ascii")
 
     def generate_sequence_value(self) -> Any:
         return self.generate_random_value()
@@ -67,11 +118,91 @@ class BigIntColumn(Column):
     size = sys.maxsize
 
     def generate_random_value(self) -> Any:
-        return self._random.randint(-self.size - 1, self.size)
+        return self.generate_batch(1)[0]
+
+    def generate_batch(self, count: int) -> List[Any]:
+        # values from range [-size - 1, size], modulo bias of 64 bit random values is negligible
+        low, width = -self.size - 1, 2 * self.size + 2
+        return [
+            low + value % width
+            for value in struct.unpack(f"<{count}Q", self._random.randbytes(8 * count))
+        ]
+
+    def generate_value_at(self, index: int) -> Any:
+        # seeded permutation of column range - distinct indexes (up to range width) give distinct values
+        width = 2 * self.size + 2
+        multiplier, offset = _affine_permutation(self.seed, width)
+        return -self.size - 1 + (multiplier * index + offset) % width
+
+    @property
+    def distinct_values(self) -> Optional[int]:
+        return 2 * self.size + 2
+
+    def serialize_value(self, value: Any) -> bytes:
+        return struct.pack(">q", value)
 
     def generate_sequence_value(self) -> int:
         self._seq += 1
         return self._seq
 
 
+@functools.lru_cache(maxsize=None)
+def _affine_permutation(seed: int, width: int) -> Tuple[int, int]:
+    """Returns multiplier (coprime with `width`) and offset of `index -> (multiplier * index + offset) % width`."""
+    multiplier, offset = struct.unpack(
+        "<QQ", hashlib.shake_128(str(seed).encode("ascii")).digest(16)
+    )
+    multiplier = multiplier % width or 1
+    while math.gcd(multiplier, width) != 1:
+        multiplier += 1
+    return multiplier, offset % width
+
+
+def generate_rows(columns: Sequence[Column], count: int) -> List[tuple]:
+    """Generates `count` rows of random values of given columns, column by column."""
+    if not columns:
+        return [()] * count
+    return list(zip(*(column.generate_batch(count) for column in columns)))
+
+
+class RowPool:
+    """Rows made of pre-generated pools of column values - for runs where generator speed matters more than uniqueness.
+
+    Each column has a pool of `size` values. On each pass over pools k-th column pool (counting from 1) is rotated
+    by `pass * k` values, so rows of different passes combine different values and each value moves to another row
+    (and so usually to another partition). After `reuse` passes pools are generated again,
+    so each value is used `reuse` times."""
+
+    def __init__(self, columns: Sequence[Column], size: int, reuse: int) -> None:
+        self._columns = columns
+        self._size = size
+        self._reuse = reuse
+        self._pools: List[List[Any]] = []
+        self._pass = 0
+
+    @property
+    def fresh(self) -> bool:
+        """Whether values of the next pass are newly generated (not used yet)."""
+        return self._pass % self._reuse == 0
+
+    def get_state(self) -> Any:
+        """Returns pools and pass number, so rows can be continued later (e.g. after restart)."""
+        return self._pools, self._pass
+
+    def set_state(self, state: Any) -> None:
+        self._pools, self._pass = state
+
+    def next_rows(self) -> List[tuple]:
+        """Returns `size` rows of the next pass."""
+        if self.fresh:
+            self._pools = [column.generate_batch(self._size) for column in self._columns]
+        offsets = [self._pass * (idx + 1) % self._size for idx in range(len(self._pools))]
+        self._pass += 1
+        if not self._pools:
+            return [()] * self._size
+        return list(
+            zip(*(pool[offset:] + pool[:offset] for pool, offset in zip(self._pools, offsets)))
+        )
+
+
 ALL_COLUMN_TYPES = [AsciiColumn, BigIntColumn]
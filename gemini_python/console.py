@@ -1,22 +1,35 @@
 # pylint: disable=no-value-for-parameter
 import ipaddress
 import logging
+import queue
 import re
 import subprocess
 import sys
 from datetime import timedelta
 from multiprocessing import Event, Queue
 from pathlib import Path
-from typing import List, Any, Optional
+from typing import List, Any, Optional, Sequence, Tuple
 
 import click
 
 from gemini_python import GeminiConfiguration, QueryMode, set_event_after_timeout
+from gemini_python.history_store import (
+    HISTORY_BACKENDS,
+    HISTORY_STORAGES,
+    SHM_HISTORY_DIR,
+    shm_history_dir,
+)
 from gemini_python.results import ProcessResult, process_results, version
-from gemini_python.query_driver import QueryDriverFactory
-from gemini_python.gemini_process import GeminiProcess
+from gemini_python.query_driver import (
+    COMPRESSIONS,
+    CONNECTION_CLASSES,
+    ROW_FACTORIES,
+    QueryDriverFactory,
+)
+from gemini_python.gemini_process import GeminiProcess, generate_partitions
+from gemini_python.partitions import MAX_TOKEN, MIN_TOKEN
 from gemini_python.replication_strategy import SimpleReplicationStrategy
-from gemini_python.schema import generate_schema
+from gemini_python.schema import Schema, generate_schema
 
 
 logging.getLogger().addHandler(logging.StreamHandler())
@@ -62,6 +75,23 @@ def validate_time_period(ctx: click.Context, param: click.Parameter, value: str)
     return seconds
 
 
+def validate_token_range(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Optional[Tuple[int, int]]:
+    # pylint: disable=unused-argument
+    if value is None:
+        return None
+    try:
+        start, end = (int(token) for token in value.split(":"))
+    except ValueError as exc:
+        raise click.BadParameter(
+            f"'{value}' is not valid token range. Example valid: '-9223372036854775808:0'"
+        ) from exc
+    if not MIN_TOKEN <= start < end <= MAX_TOKEN:
+        raise click.BadParameter(f"tokens must be ordered and within [{MIN_TOKEN}, {MAX_TOKEN}]")
+    return start, end
+
+
 def validate_ips(ctx: click.Context, param: click.Parameter, value: str) -> Optional[List[str]]:
     # pylint: disable=unused-argument
     if value is None:
@@ -130,6 +160,19 @@ def validate_ips(ctx: click.Context, param: click.Parameter, value: str) -> Opti
     default=10000,
     help="Number of slices to divide the token space into",
 )
+@click.option(
+    "--token-aware-partitions",
+    is_flag=True,
+    help="Generate one partition in each token range slice (by partition Murmur3 token), "
+    "so workers cover disjoint, consecutive parts of the token ring evenly",
+)
+@click.option(
+    "--partitions-token-range",
+    type=str,
+    callback=validate_token_range,
+    help="Part of token ring divided into slices with --token-aware-partitions, as 'START:END' (inclusive), "
+    "e.g. token range owned by selected node. Whole ring by default",
+)
 @click.option(
     "--concurrency",
     "-c",
@@ -175,6 +218,166 @@ def validate_ips(ctx: click.Context, param: click.Parameter, value: str) -> Opti
     callback=validate_time_period,
     help="Generated tables default TTL, (in time format string e.g. 1h22m33s)",
 )
+@click.option(
+    "--value-pool-size",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Number of values pre-generated for each column of inserts and reused in rotating combinations. "
+    "Faster than generating each value, but less unique (see value_uniqueness and key_uniqueness in results). 0 disables pools",
+)
+@click.option(
+    "--value-pool-reuse",
+    type=click.IntRange(min=1),
+    default=10,
+    help="Number of times each pooled value is used before pools are generated again",
+)
+@click.option(
+    "--delete-ratio",
+    type=click.FloatRange(min=0, max=1),
+    default=0.0,
+    help="Fraction of inserts replaced with deletes of previously written rows. "
+    "Deleted rows are verified in background not to come back (requires 'sqlite' history backend)",
+)
+@click.option(
+    "--deletion-verification-delay",
+    type=str,
+    default="10s",
+    callback=validate_time_period,
+    help="Time after deletion when deleted rows are verified, should cover TTL and tombstone gc grace period",
+)
+@click.option(
+    "--deletion-verification-batch-size",
+    type=click.IntRange(min=1),
+    default=100,
+    help="Number of deleted rows verified with one request to each cluster",
+)
+@click.option(
+    "--history-backend",
+    type=click.Choice(HISTORY_BACKENDS),
+    default="sqlite",
+    help="Where history of writes is kept. 'memory' is fastest, but history is lost when process ends. "
+    "'mmap' keeps it in memory mapped append-only files and doesn't need ramdisk. "
+    "'reservoir' keeps in memory random sample of --history-capacity rows per table",
+)
+@click.option(
+    "--history-storage",
+    type=click.Choice(HISTORY_STORAGES),
+    default="dir",
+    help="Where history files are kept: 'dir' - --history-files-dir as is, "
+    f"'shm' - subdirectory of {SHM_HISTORY_DIR} derived from --history-files-dir "
+    "(shared memory, no privileges needed, removed only on reboot), "
+    "'tmpfs' - ramdisk mounted at --history-files-dir with sudo, "
+    "'memory' - in-memory sqlite database ('sqlite' backend only, can't be resumed nor shared)",
+)
+@click.option(
+    "--history-files-dir",
+    type=Path,
+    default=Path.cwd() / ".gemini",
+    help="Directory of history files and checkpoints",
+)
+@click.option(
+    "--history-capacity",
+    type=click.IntRange(min=1),
+    default=1_000_000,
+    help="Maximum number of rows per table kept by 'reservoir' history backend",
+)
+@click.option(
+    "--shared-history",
+    is_flag=True,
+    help="Read keys written by all processes: live view of 'mmap' history "
+    "or snapshot of 'sqlite' history taken at start (without --drop-schema)",
+)
+@click.option(
+    "--checkpoint-interval",
+    type=str,
+    default="1m",
+    callback=validate_time_period,
+    help="Time between checkpoints of each process state (positions, PRNG states, retries, counters) "
+    "written to history dir. 0 disables checkpoints",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue from checkpoints and history of previous run (with the same schema parameters and seed)",
+)
+@click.option(
+    "--history-flush-rows",
+    type=click.IntRange(min=1),
+    default=1000,
+    help="Number of buffered history rows that triggers writing them to history store",
+)
+@click.option(
+    "--history-commit-interval",
+    type=str,
+    default="1s",
+    callback=validate_time_period,
+    help="Maximum time between history store commits (while writing), e.g. 500ms or 1s",
+)
+@click.option(
+    "--max-in-flight",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Maximum number of in-flight requests per process. Values above 1 enable pipelined mode",
+)
+@click.option(
+    "--concurrent-dispatch",
+    is_flag=True,
+    help="Query oracle from a separate subprocess at the same time as SUT",
+)
+@click.option(
+    "--request-batch-size",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of statements sent to query drivers in one request (executed concurrently)",
+)
+@click.option(
+    "--asyncio-concurrency",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Number of concurrent operations run on asyncio event loop in each process. 0 disables asyncio mode",
+)
+@click.option(
+    "--connection-class",
+    type=click.Choice(tuple(CONNECTION_CLASSES)),
+    default="asyncore",
+    help="Query driver event loop implementation",
+)
+@click.option(
+    "--token-aware",
+    is_flag=True,
+    help="Route queries directly to replicas owning the partition (TokenAwarePolicy)",
+)
+@click.option(
+    "--shard-aware/--no-shard-aware",
+    default=True,
+    help="Use Scylla shard-aware connections (route queries to shard owning the partition)",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(tuple(COMPRESSIONS)),
+    default="auto",
+    help="Protocol compression. 'auto' uses any compression library available",
+)
+@click.option("--protocol-version", type=int, default=4, help="CQL native protocol version")
+@click.option(
+    "--request-timeout",
+    type=str,
+    default="10s",
+    callback=validate_time_period,
+    help="Query driver request timeout, e.g. 500ms or 10s",
+)
+@click.option(
+    "--row-factory",
+    type=click.Choice(tuple(ROW_FACTORIES)),
+    default="dict",
+    help="Type of result rows. Tuple rows are cheaper to create and compare than dicts",
+)
+@click.option(
+    "--fetch-size",
+    type=click.IntRange(min=1),
+    default=5000,
+    help="Number of rows fetched in one result page. Only one page per query is kept in memory",
+)
 @click.option(
     "--outfile",
     type=Path,
@@ -183,11 +386,32 @@ def validate_ips(ctx: click.Context, param: click.Parameter, value: str) -> Opti
 def run(*args: Any, **kwargs: Any) -> None:
     """Gemini is an automatic random testing tool for Scylla."""
     config = GeminiConfiguration(*args, **kwargs)
-    _create_ramdisk(config.history_files_max_size_gb, config.history_files_dir)
+    _validate_history_storage(config)
+    if config.delete_ratio and config.history_backend != "sqlite":
+        raise click.BadParameter(
+            "deletes are tracked only by 'sqlite' history backend", param_hint="--delete-ratio"
+        )
+    if config.resume and (config.drop_schema or config.history_backend in ("memory", "reservoir")):
+        raise click.BadParameter(
+            "resuming requires history kept in files ('sqlite' or 'mmap' backend) and no --drop-schema",
+            param_hint="--resume",
+        )
+    if config.partitions_token_range and not config.token_aware_partitions:
+        raise click.BadParameter(
+            "token range is divided only with --token-aware-partitions",
+            param_hint="--partitions-token-range",
+        )
+    config.history_files_dir = _prepare_history_dir(config)
     interrupted = False
     schema = generate_schema(config=config)
-    sut_query_driver = QueryDriverFactory.create_query_driver(config.test_cluster)
-    oracle_query_driver = QueryDriverFactory.create_query_driver(config.oracle_cluster)
+    # before duration timer starts - token aware partitions are found by scanning candidate partitions
+    workers_partitions = _generate_partitions(config, schema)
+    sut_query_driver = QueryDriverFactory.create_query_driver(
+        config.test_cluster, config.connection_options
+    )
+    oracle_query_driver = QueryDriverFactory.create_query_driver(
+        config.oracle_cluster, config.connection_options
+    )
     if config.drop_schema and config.mode != QueryMode.READ:
         logger.info("dropping schema %s", schema.name)
         schema.drop(sut_query_driver)
@@ -197,30 +421,91 @@ def run(*args: Any, **kwargs: Any) -> None:
     # drivers no longer needed in main process
     sut_query_driver.teardown()
     oracle_query_driver.teardown()
-    processes = []
     termination_event = Event()
     results_queue: Queue[ProcessResult] = Queue()  # pylint: disable=unsubscriptable-object
     timer = set_event_after_timeout(termination_event, config.duration)
-    for idx in range(config.concurrency):
-        gemini_process = GeminiProcess(idx, config, schema, termination_event, results_queue)
-        processes.append(gemini_process)
+    processes = [
+        GeminiProcess(idx, config, schema, termination_event, results_queue, partitions=partitions)
+        for idx, partitions in enumerate(workers_partitions)
+    ]
     for gemini_process in processes:
         gemini_process.start()
+    collected_results: "queue.Queue[ProcessResult]" = queue.Queue()
     for gemini_process in processes:
         try:
-            gemini_process.join()
+            _join_collecting_results(gemini_process, results_queue, collected_results)
         except KeyboardInterrupt:
             logger.info("KeyboardInterrupt, stopping...")
             termination_event.set()
             interrupted = True
     timer.cancel()
-    is_failed = process_results(results_queue, config.outfile)
+    while not results_queue.empty():
+        collected_results.put(results_queue.get())
+    is_failed = process_results(collected_results, config.outfile, config.connection_options)
     if is_failed:
         sys.exit(1)
     if interrupted:
         sys.exit(130)
 
 
+def _join_collecting_results(
+    gemini_process: GeminiProcess,
+    results_queue: "Queue[ProcessResult]",
+    collected_results: "queue.Queue[ProcessResult]",
+) -> None:
+    """Waits for process to end, reading results meanwhile.
+
+    Process can't end until its result (larger than pipe buffer, e.g. with latency histograms) is read from queue."""
+    while gemini_process.is_alive():
+        try:
+            collected_results.put(results_queue.get(timeout=0.1))
+        except queue.Empty:
+            pass
+    gemini_process.join()
+
+
+def _validate_history_storage(config: GeminiConfiguration) -> None:
+    if config.history_storage != "memory":
+        return
+    if config.history_backend == "mmap":
+        raise click.BadParameter(
+            "'mmap' history can't be kept in sqlite memory", param_hint="--history-storage"
+        )
+    if config.delete_ratio or config.resume or config.shared_history:
+        raise click.BadParameter(
+            "history kept in process memory can't be verified, resumed nor shared",
+            param_hint="--history-storage",
+        )
+
+
+def _generate_partitions(
+    config: GeminiConfiguration, schema: Schema
+) -> List[List[Sequence[tuple]]]:
+    """Returns partitions of each worker, rejecting configuration leaving some worker without partitions."""
+    workers_partitions = generate_partitions(config, schema)
+    if not all(all(partitions) for partitions in workers_partitions):
+        raise click.BadParameter(
+            "no partition found in token slices of some worker, "
+            "use fewer --token-range-slices, wider --partitions-token-range or lower --concurrency",
+            param_hint="--token-aware-partitions",
+        )
+    return workers_partitions
+
+
+def _prepare_history_dir(config: GeminiConfiguration) -> Path:
+    """Returns directory for history files (and checkpoints) of selected storage, creating it if needed."""
+    if config.history_storage == "tmpfs":
+        _create_ramdisk(config.history_files_max_size_gb, config.history_files_dir)
+        return config.history_files_dir
+    if config.history_storage == "shm":
+        history_dir = shm_history_dir(config.history_files_dir)
+        logger.info("history files are kept in %s, remove it when no longer needed", history_dir)
+    else:
+        history_dir = config.history_files_dir
+    history_dir.mkdir(parents=True, exist_ok=True)
+    return history_dir
+
+
 def _create_ramdisk(size_gb: int, mount_point: Path) -> None:
     """Creates a ramdisk of the specified size in GB."""
     if mount_point.is_mount():
@@ -228,11 +513,8 @@ def _create_ramdisk(size_gb: int, mount_point: Path) -> None:
         return
     mount_point.mkdir(parents=True, exist_ok=True)
     subprocess.run(
-        " ".join(
-            ["sudo", "mount", "-t", "tmpfs", "-o", f"size={size_gb}G", "tmpfs", str(mount_point)]
-        ),
+        ["sudo", "mount", "-t", "tmpfs", "-o", f"size={size_gb}G", "tmpfs", str(mount_point)],
         check=True,
-        shell=True,
     )
     logger.info("created ramdisk at %s with size of %s gb", mount_point, size_gb)
 
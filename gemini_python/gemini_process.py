@@ -1,18 +1,34 @@
+import asyncio
 import logging
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import partial
 from multiprocessing import Process
 from multiprocessing.synchronize import Event as EventClass
-from queue import Queue
+from queue import Empty, Queue, SimpleQueue
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-from gemini_python import GeminiConfiguration, ValidationError, Operation
-from gemini_python.results import ProcessResult
-from gemini_python.history_store import HistoryStore
+from gemini_python import CqlDto, GeminiConfiguration, ValidationError, Operation
+from gemini_python.asyncio_query_driver import AsyncQueryDriverFactory
+from gemini_python.checkpoint import Checkpoint, schema_fingerprint
+from gemini_python.results import ORACLE, SUT, ProcessResult
+from gemini_python.history_store import HistoryStore, HistoryStoreFactory, SqliteHistoryStore
 from gemini_python.query_driver import (
+    NoOpQueryDriver,
+    QueryDriver,
     QueryDriverFactory,
     QueryDriverException,
 )
 from gemini_python.load_generator import LoadGenerator
+from gemini_python.partitions import MAX_TOKEN, MIN_TOKEN, Partitions, TokenAwarePartitions
+from gemini_python.query import build_statement_registry
+from gemini_python.resurrection_verifier import ResurrectionVerifier
 from gemini_python.retries_generator import RetriesGenerator
 from gemini_python.schema import Schema
+from gemini_python.statement_registry import StatementRegistry
+from gemini_python.subprocess_query_driver import SubprocessQueryDriver
 from gemini_python.validator import validate_result
 
 logger = logging.getLogger(__name__)
@@ -24,12 +40,56 @@ stream_handler.setFormatter(formatter)
 
 logger.addHandler(stream_handler)
 
+# operation, cql_dto, attempt, oracle request id (concurrent dispatch only), submission time,
+# SUT completion time and SUT response (or exception raised by SUT)
+_Completion = Tuple[Operation, CqlDto, int, Optional[int], float, float, Union[Iterable, Exception]]
 
-class GeminiProcess(Process):
+
+def generate_partitions(config: GeminiConfiguration, schema: Schema) -> List[List[Sequence[tuple]]]:
+    """Returns partitions of each table for each worker - values are generated in child process when used.
+
+    Each worker gets its own range of partition indexes (or token ring slices with `token_aware_partitions`),
+    so workers write disjoint partitions. Token aware partitions of all workers are found in one scan per table."""
+    count = config.token_range_slices // config.concurrency
+    if config.token_aware_partitions:
+        tables_partitions = [
+            TokenAwarePartitions.for_workers(
+                table.partition_keys,
+                config.concurrency,
+                config.token_range_slices,
+                token_range=config.partitions_token_range or (MIN_TOKEN, MAX_TOKEN),
+            )
+            for table in schema.tables
+        ]
+        return [list(worker_partitions) for worker_partitions in zip(*tables_partitions)]
+    return [
+        [Partitions(table.partition_keys, count, start=index * count) for table in schema.tables]
+        for index in range(config.concurrency)
+    ]
+
+
+@dataclass
+class _WorkerContext:  # pylint: disable=too-many-instance-attributes
+    """Objects used by GeminiProcess main loop. Created in child process."""
+
+    sut_query_driver: QueryDriver
+    oracle_query_driver: QueryDriver
+    history_store: HistoryStore
+    generator: LoadGenerator
+    retry_generator: RetriesGenerator
+    process_result: ProcessResult
+    # rows (table name, pk and ck values) being read, so they are not deleted concurrently
+    in_flight_reads: Counter = field(default_factory=Counter)
+    # operations generated but not completed yet (by id of their CqlDto) - checkpoint stores them with retries
+    in_flight_operations: Dict[int, Tuple[Operation, CqlDto, int]] = field(default_factory=dict)
+
+
+class GeminiProcess(Process):  # pylint: disable=too-many-instance-attributes
     """
     Main Gemini process - creates connections, queries and validates results in accordance to config.
 
     queries_count param is temporary for limiting time gemini is executed.
+    `partitions` (of each table) are generated for this worker when not given (see `generate_partitions`).
     """
 
     def __init__(
@@ -39,80 +99,467 @@ class GeminiProcess(Process):
         schema: Schema,
         termination_event: EventClass,
         results_queue: Queue[ProcessResult],
+        partitions: Optional[List[Sequence[tuple]]] = None,
     ):
         super().__init__()
         self._gemini_config = config
         self._schema = schema
         self._index = index
-        self._partitions = self._generate_partitions()
+        self._checkpoint_path = Checkpoint.file_path(config.history_files_dir, index)
+        self._checkpoint = self._load_checkpoint() if config.resume else None
+        self._partitions: List[Sequence[tuple]] = (
+            self._checkpoint.partitions
+            if self._checkpoint
+            else partitions or generate_partitions(config, schema)[index]
+        )
+        self._next_checkpoint_time = 0.0
         self._termination_event: EventClass = termination_event
         self._results_queue: Queue[ProcessResult] = results_queue
         assert config.duration > 0, "duration should be greater than 0 seconds"
 
-    def _generate_partitions(self) -> list[list[tuple]]:
-        tables_partitions: list[list[tuple]] = []
-        for table in self._schema.tables:
-            tables_partitions.append(
-                [
-                    tuple(column.generate_random_value() for column in table.partition_keys)
-                    for _ in range(
-                        self._gemini_config.token_range_slices // self._gemini_config.concurrency
-                    )
-                ]
-            )
-        return tables_partitions
+    def _load_checkpoint(self) -> Optional[Checkpoint]:
+        if not self._checkpoint_path.exists():
+            logger.warning("No checkpoint %s, starting from scratch", self._checkpoint_path)
+            return None
+        return Checkpoint.load(self._checkpoint_path, self._schema, self._gemini_config.mode)
 
     def run(self) -> None:
         # query drivers must be created in run() method and not in __init__, otherwise cassandra driver hangs
-        sut_query_driver = QueryDriverFactory.create_query_driver(self._gemini_config.test_cluster)
-        oracle_query_driver = QueryDriverFactory.create_query_driver(
-            self._gemini_config.oracle_cluster
+        connection_options = self._gemini_config.connection_options
+        statement_registry = build_statement_registry(self._schema)
+        sut_query_driver = QueryDriverFactory.create_query_driver(
+            self._gemini_config.test_cluster, connection_options, statement_registry
         )
-        process_result = ProcessResult()
-        history_store = HistoryStore(
+        oracle_query_driver: QueryDriver
+        if self._gemini_config.concurrent_dispatch:
+            oracle_query_driver = SubprocessQueryDriver(
+                self._gemini_config.oracle_cluster, connection_options, statement_registry
+            )
+        else:
+            oracle_query_driver = QueryDriverFactory.create_query_driver(
+                self._gemini_config.oracle_cluster, connection_options, statement_registry
+            )
+        history_store = HistoryStoreFactory.create_history_store(
+            self._gemini_config.history_backend,
             self._index,
             self._schema,
             drop_schema=self._gemini_config.drop_schema,
             history_file_dir=self._gemini_config.history_files_dir,
+            flush_rows=self._gemini_config.history_flush_rows,
+            commit_interval=self._gemini_config.history_commit_interval,
+            capacity=self._gemini_config.history_capacity,
+            shared=self._gemini_config.shared_history,
+            in_memory=self._gemini_config.history_storage == "memory",
         )
-        generator = LoadGenerator(
-            schema=self._schema,
+        ctx = _WorkerContext(
+            sut_query_driver=sut_query_driver,
+            oracle_query_driver=oracle_query_driver,
+            history_store=history_store,
+            generator=LoadGenerator(
+                schema=self._schema,
+                mode=self._gemini_config.mode,
+                partitions=self._partitions,
+                history_store=history_store,
+                statement_registry=statement_registry,
+                delete_ratio=self._gemini_config.delete_ratio,
+                value_pool_size=self._gemini_config.value_pool_size,
+                value_pool_reuse=self._gemini_config.value_pool_reuse,
+            ),
+            retry_generator=RetriesGenerator(self._gemini_config.max_mutation_retries_backoff),
+            process_result=ProcessResult(),
+        )
+        if self._checkpoint:
+            self._restore_checkpoint(ctx, self._checkpoint)
+        self._next_checkpoint_time = time.monotonic() + self._gemini_config.checkpoint_interval
+        verifier = self._start_resurrection_verifier(statement_registry)
+        if self._gemini_config.asyncio_concurrency:
+            asyncio.run(self._run_asyncio(ctx))
+        elif self._gemini_config.max_in_flight > 1:
+            self._run_pipelined(ctx)
+        elif self._gemini_config.request_batch_size > 1:
+            self._run_batched(ctx)
+        else:
+            self._run_synchronously(ctx)
+        history_store.commit()
+        if self._gemini_config.checkpoint_interval:
+            self._save_checkpoint(ctx)
+        # after checkpoint - counts are part of generator state, resumed run adds them again
+        ctx.process_result.add_values_counts(*ctx.generator.get_values_counts())
+        ctx.process_result.add_keys_counts(*ctx.generator.get_keys_counts())
+        if verifier is not None:
+            verifier.stop()
+            ctx.process_result.verified_deletes += verifier.verified_deletes
+            ctx.process_result.resurrections += verifier.resurrections
+        ctx.process_result.add_prepare_stats(sut_query_driver.get_prepare_stats())
+        ctx.process_result.add_prepare_stats(oracle_query_driver.get_prepare_stats())
+        self._results_queue.put(ctx.process_result)
+        sut_query_driver.teardown()
+        oracle_query_driver.teardown()
+
+    def _save_checkpoint(self, ctx: _WorkerContext) -> None:
+        """Commits history and writes checkpoint of worker state to history dir."""
+        ctx.history_store.commit()
+        Checkpoint(
+            schema_fingerprint=schema_fingerprint(self._schema),
             mode=self._gemini_config.mode,
             partitions=self._partitions,
-            history_store=history_store,
+            generator_state=ctx.generator.get_state(),
+            column_states=[
+                [column.get_state() for column in table.all_columns]
+                for table in self._schema.tables
+            ],
+            random_state=random.getstate(),
+            # in flight operations may never complete if process is killed - they are executed again
+            retries=ctx.retry_generator.get_pending() + list(ctx.in_flight_operations.values()),
+            process_result=ctx.process_result,
+        ).save(self._checkpoint_path)
+        self._next_checkpoint_time = time.monotonic() + self._gemini_config.checkpoint_interval
+
+    def _restore_checkpoint(self, ctx: _WorkerContext, checkpoint: Checkpoint) -> None:
+        ctx.generator.set_state(checkpoint.generator_state)
+        for table, column_states in zip(self._schema.tables, checkpoint.column_states):
+            for column, column_state in zip(table.all_columns, column_states):
+                column.set_state(column_state)
+        random.setstate(checkpoint.random_state)
+        for operation, cql_dto, attempt in checkpoint.retries:
+            ctx.retry_generator.add_retry(operation, cql_dto, attempt)
+        ctx.process_result = checkpoint.process_result
+        logger.info("Resumed from checkpoint %s", self._checkpoint_path)
+
+    def _start_resurrection_verifier(
+        self, statement_registry: StatementRegistry
+    ) -> Optional[ResurrectionVerifier]:
+        """Starts verification of deleted rows (when deletes are enabled), querying clusters from subprocesses."""
+        if not self._gemini_config.delete_ratio:
+            return None
+        sut_query_driver, oracle_query_driver = (
+            SubprocessQueryDriver(
+                cluster, self._gemini_config.connection_options, statement_registry
+            )
+            if cluster
+            else NoOpQueryDriver()
+            for cluster in (self._gemini_config.test_cluster, self._gemini_config.oracle_cluster)
+        )
+        verifier = ResurrectionVerifier(
+            SqliteHistoryStore.file_path(self._gemini_config.history_files_dir, self._index),
+            self._schema,
+            sut_query_driver,
+            oracle_query_driver,
+            delay=self._gemini_config.deletion_verification_delay,
+            batch_size=self._gemini_config.deletion_verification_batch_size,
+            statement_registry=statement_registry,
         )
-        retry_generator = RetriesGenerator(self._gemini_config.max_mutation_retries_backoff)
+        verifier.start()
+        return verifier
+
+    def _run_synchronously(self, ctx: _WorkerContext) -> None:
+        """Runs one operation at a time: SUT query, oracle query and validation.
+
+        With concurrent dispatch, oracle is queried in subprocess at the same time as SUT."""
+
+        def execute(operation: Operation, cql_dto: CqlDto) -> Tuple[Iterable, Iterable]:
+            if isinstance(ctx.oracle_query_driver, SubprocessQueryDriver):
+                oracle_start = time.perf_counter()
+                oracle_request = ctx.oracle_query_driver.submit(cql_dto)
+                try:
+                    sut_result = self._execute_timed(ctx, SUT, operation, cql_dto)
+                finally:
+                    # always collect oracle result, even if SUT failed
+                    oracle_result = ctx.oracle_query_driver.get_result(oracle_request)
+                    self._record_latency(ctx, ORACLE, operation, time.perf_counter() - oracle_start)
+                return sut_result, oracle_result
+            sut_result = self._execute_timed(ctx, SUT, operation, cql_dto)
+            oracle_result = self._execute_timed(ctx, ORACLE, operation, cql_dto)
+            return sut_result, oracle_result
+
         while not self._termination_event.is_set():
-            if retry_generator.retry_available():
-                operation, cql_dto, attempt = retry_generator.get_retry()
-            else:
-                operation, cql_dto = generator.get_query()
-                attempt = 0
+            operation, cql_dto, attempt = self._next_operation(ctx)
+            self._execute_operation(
+                ctx, operation, cql_dto, attempt, partial(execute, operation, cql_dto)
+            )
+
+    async def _run_asyncio(self, ctx: _WorkerContext) -> None:
+        """Runs `asyncio_concurrency` operations concurrently on asyncio event loop.
+
+        SUT is queried natively via asyncio adapter, oracle in a separate thread sending concurrent batches
+        of queued queries (python driver can't operate async on 2 different clusters in one process).
+        Both are queried at the same time and results are validated when both complete."""
+        sut_query_driver = AsyncQueryDriverFactory.create_query_driver(ctx.sut_query_driver)
+        oracle_query_driver = AsyncQueryDriverFactory.create_query_driver(
+            ctx.oracle_query_driver, native=False
+        )
+
+        async def timed(cluster: str, operation: Operation, query: Awaitable) -> Iterable:
+            start = time.perf_counter()
+            result = await query
+            self._record_latency(ctx, cluster, operation, time.perf_counter() - start)
+            return result  # type: ignore
+
+        async def worker() -> None:
+            sut_result: Union[Iterable, BaseException]
+            oracle_result: Union[Iterable, BaseException]
+            while not self._termination_event.is_set():
+                operation, cql_dto, attempt = self._next_operation(ctx)
+                sut_result, oracle_result = await asyncio.gather(
+                    timed(SUT, operation, sut_query_driver.execute(cql_dto)),
+                    timed(ORACLE, operation, oracle_query_driver.execute(cql_dto)),
+                    return_exceptions=True,
+                )
+                self._execute_operation(
+                    ctx, operation, cql_dto, attempt, partial(_unwrap, sut_result, oracle_result)
+                )
+
+        await asyncio.gather(*(worker() for _ in range(self._gemini_config.asyncio_concurrency)))
+        sut_query_driver.teardown()
+        oracle_query_driver.teardown()
+
+    def _run_batched(self, ctx: _WorkerContext) -> None:
+        """Runs `request_batch_size` operations at a time.
+
+        Whole batch is sent to SUT and oracle at once (`QueryDriver.execute_many`),
+        then results are validated one by one."""
+        while not self._termination_event.is_set():
+            operations = [
+                self._next_operation(ctx) for _ in range(self._gemini_config.request_batch_size)
+            ]
+            sut_results, oracle_results, sut_latency, oracle_latency = self._execute_batch(
+                ctx, [cql_dto for _, cql_dto, _ in operations]
+            )
+            for (operation, cql_dto, attempt), sut_result, oracle_result in zip(
+                operations, sut_results, oracle_results
+            ):
+                # statements of a batch are executed concurrently - each takes as long as the whole batch
+                self._record_latency(ctx, SUT, operation, sut_latency)
+                self._record_latency(ctx, ORACLE, operation, oracle_latency)
+                self._execute_operation(
+                    ctx, operation, cql_dto, attempt, partial(_unwrap, sut_result, oracle_result)
+                )
+
+    @staticmethod
+    def _execute_batch(
+        ctx: _WorkerContext, cql_dtos: List[CqlDto]
+    ) -> Tuple[List[Union[Iterable, Exception]], List[Union[Iterable, Exception]], float, float]:
+        """Executes batch on SUT and oracle. Returns results of both and their latencies."""
+        if isinstance(ctx.oracle_query_driver, SubprocessQueryDriver):
+            oracle_start = time.perf_counter()
+            oracle_requests = ctx.oracle_query_driver.submit_many(cql_dtos)
+            sut_start = time.perf_counter()
+            sut_results = ctx.sut_query_driver.execute_many(cql_dtos)
+            sut_latency = time.perf_counter() - sut_start
+            oracle_results = ctx.oracle_query_driver.get_results(oracle_requests)
+        else:
+            sut_start = time.perf_counter()
+            sut_results = ctx.sut_query_driver.execute_many(cql_dtos)
+            oracle_start = time.perf_counter()
+            sut_latency = oracle_start - sut_start
+            oracle_results = ctx.oracle_query_driver.execute_many(cql_dtos)
+        return sut_results, oracle_results, sut_latency, time.perf_counter() - oracle_start
+
+    def _run_pipelined(self, ctx: _WorkerContext) -> None:
+        """Keeps up to `max_in_flight` SUT requests running concurrently.
+
+        Responses are handled in this thread as they complete: oracle is queried synchronously
+        (python driver can't operate async on 2 different clusters in one process), then result is validated,
+        stored in history or scheduled for retry.
+        With concurrent dispatch, oracle requests are sent to subprocess together with SUT requests
+        (in batches of `request_batch_size`) and their results are collected when SUT response completes."""
+        completed: SimpleQueue[_Completion] = SimpleQueue()
+        in_flight = 0
+
+        def execute(
+            operation: Operation,
+            cql_dto: CqlDto,
+            sut_result: Union[Iterable, Exception],
+            oracle_request: Optional[int],
+            submitted_at: float,
+        ) -> Tuple[Iterable, Iterable]:
+            if isinstance(ctx.oracle_query_driver, SubprocessQueryDriver):
+                assert oracle_request is not None
+                # always collect oracle result, even if SUT failed
+                oracle_result = ctx.oracle_query_driver.get_results([oracle_request])[0]
+                # upper bound - oracle result may have been waiting in subprocess
+                self._record_latency(ctx, ORACLE, operation, time.perf_counter() - submitted_at)
+                return _unwrap(sut_result, oracle_result)
+            if isinstance(sut_result, Exception):
+                raise QueryDriverException(sut_result) from sut_result
+            return sut_result, self._execute_timed(ctx, ORACLE, operation, cql_dto)
+
+        while not self._termination_event.is_set() or in_flight:
+            operations: List[Tuple[Operation, CqlDto, int]] = []
+            while (
+                in_flight + len(operations) < self._gemini_config.max_in_flight
+                and not self._termination_event.is_set()
+            ):
+                operations.append(self._next_operation(ctx))
+            self._submit_pipelined(ctx, operations, completed)
+            in_flight += len(operations)
             try:
-                sut_result = sut_query_driver.execute(cql_dto)
-                oracle_result = oracle_query_driver.execute(cql_dto)
-                if operation == Operation.WRITE:
-                    history_store.insert(cql_dto)
-                validate_result(oracle_result=oracle_result, sut_result=sut_result)
-            except (QueryDriverException, ValidationError) as exc:
-                if attempt > self._gemini_config.max_mutation_retries:
-                    logger.error(exc)
-                    process_result.increment_errors(operation)
-                    if self._gemini_config.fail_fast:
-                        self._termination_event.set()
-                    continue
-                retry_generator.add_retry(operation, cql_dto, attempt + 1)
-            except Exception as exc:  # pylint: disable=broad-except
-                logger.exception(
-                    "Unhandled exception when querying SUT.: %s.\ncql: %s",
-                    exc,
+                (
+                    operation,
                     cql_dto,
-                    exc_info=True,
+                    attempt,
+                    oracle_request,
+                    submitted_at,
+                    sut_completed_at,
+                    sut_result,
+                ) = completed.get(timeout=1)
+            except Empty:
+                continue
+            in_flight -= 1
+            # completion time is taken in driver callback - response may wait in queue for other responses
+            self._record_latency(ctx, SUT, operation, sut_completed_at - submitted_at)
+            self._execute_operation(
+                ctx,
+                operation,
+                cql_dto,
+                attempt,
+                partial(execute, operation, cql_dto, sut_result, oracle_request, submitted_at),
+            )
+
+    def _submit_pipelined(
+        self,
+        ctx: _WorkerContext,
+        operations: List[Tuple[Operation, CqlDto, int]],
+        completed: SimpleQueue[_Completion],
+    ) -> None:
+        """Sends operations to SUT (async) and oracle subprocess (in batches), results go to `completed`."""
+        batch_size = self._gemini_config.request_batch_size
+        for batch_start in range(0, len(operations), batch_size):
+            batch = operations[batch_start : batch_start + batch_size]
+            oracle_requests: List[Optional[int]] = [None] * len(batch)
+            if isinstance(ctx.oracle_query_driver, SubprocessQueryDriver):
+                oracle_requests = list(
+                    ctx.oracle_query_driver.submit_many([cql_dto for _, cql_dto, _ in batch])
                 )
-                self._termination_event.set()
+            for (operation, cql_dto, attempt), oracle_request in zip(batch, oracle_requests):
+                on_complete = partial(
+                    _put_completed,
+                    completed,
+                    operation,
+                    cql_dto,
+                    attempt,
+                    oracle_request,
+                    time.perf_counter(),
+                )
+                ctx.sut_query_driver.execute_async(
+                    cql_dto, on_success=[on_complete], on_error=[on_complete]
+                )
+
+    def _execute_timed(
+        self, ctx: _WorkerContext, cluster: str, operation: Operation, cql_dto: CqlDto
+    ) -> Iterable:
+        """Executes statement on SUT or ORACLE and records its latency (until first page of results)."""
+        query_driver = ctx.sut_query_driver if cluster == SUT else ctx.oracle_query_driver
+        start = time.perf_counter()
+        result = query_driver.execute(cql_dto)
+        self._record_latency(ctx, cluster, operation, time.perf_counter() - start)
+        return result
+
+    def _record_latency(
+        self, ctx: _WorkerContext, cluster: str, operation: Operation, latency: float
+    ) -> None:
+        if cluster == SUT or self._gemini_config.oracle_cluster:
+            ctx.process_result.record_latency(cluster, operation, latency)
+
+    def _next_operation(self, ctx: _WorkerContext) -> Tuple[Operation, CqlDto, int]:
+        if (
+            self._gemini_config.checkpoint_interval
+            and time.monotonic() >= self._next_checkpoint_time
+        ):
+            self._save_checkpoint(ctx)
+        while True:
+            if ctx.retry_generator.retry_available():
+                operation, cql_dto, attempt = ctx.retry_generator.get_retry()
+            else:
+                operation, cql_dto = ctx.generator.get_query()
+                attempt = 0
+            row_key = (cql_dto.table_name, cql_dto.values)
+            if operation == Operation.DELETE and ctx.in_flight_reads[row_key]:
+                # SUT and oracle could execute read and delete in different order - delete it later
+                ctx.retry_generator.add_retry(operation, cql_dto, attempt)
                 continue
-            process_result.increment_ops(operation)
-        history_store.commit()
-        self._results_queue.put(process_result)
-        sut_query_driver.teardown()
-        oracle_query_driver.teardown()
+            if operation == Operation.READ:
+                ctx.in_flight_reads[row_key] += 1
+            ctx.in_flight_operations[id(cql_dto)] = (operation, cql_dto, attempt)
+            return operation, cql_dto, attempt
+
+    def _execute_operation(
+        self,
+        ctx: _WorkerContext,
+        operation: Operation,
+        cql_dto: CqlDto,
+        attempt: int,
+        execute: Callable[[], Tuple[Iterable, Iterable]],
+    ) -> None:
+        """Gets SUT and oracle results with `execute`, validates them and updates history and process result."""
+        del ctx.in_flight_operations[id(cql_dto)]
+        if operation == Operation.READ:
+            # read is completed (or completes in `execute`) before any other operation is generated
+            row_key = (cql_dto.table_name, cql_dto.values)
+            ctx.in_flight_reads[row_key] -= 1
+            if not ctx.in_flight_reads[row_key]:
+                del ctx.in_flight_reads[row_key]
+        try:
+            sut_result, oracle_result = execute()
+            if operation == Operation.WRITE:
+                ctx.history_store.insert(cql_dto)
+            elif operation == Operation.DELETE:
+                ctx.history_store.delete(cql_dto)
+            validate_result(oracle_result=oracle_result, sut_result=sut_result)
+        except (QueryDriverException, ValidationError) as exc:
+            if attempt > self._gemini_config.max_mutation_retries:
+                logger.error(exc)
+                ctx.process_result.increment_errors(operation)
+                if operation == Operation.DELETE:
+                    ctx.history_store.return_row(cql_dto)
+                if self._gemini_config.fail_fast:
+                    self._termination_event.set()
+                return
+            ctx.retry_generator.add_retry(operation, cql_dto, attempt + 1)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception(
+                "Unhandled exception when querying SUT.: %s.\ncql: %s",
+                exc,
+                cql_dto,
+                exc_info=True,
+            )
+            self._termination_event.set()
+            return
+        ctx.process_result.increment_ops(operation)
+
+
+def _unwrap(
+    sut_result: Union[Iterable, BaseException], oracle_result: Union[Iterable, BaseException]
+) -> Tuple[Iterable, Iterable]:
+    """Returns results of `QueryDriver.execute_many`-like calls, raising exception if any of them failed."""
+    for result in (sut_result, oracle_result):
+        if isinstance(result, QueryDriverException) or not isinstance(
+            result, (Iterable, Exception)
+        ):
+            raise result
+        if isinstance(result, Exception):
+            raise QueryDriverException(result) from result
+    return sut_result, oracle_result  # type: ignore
+
+
+def _put_completed(
+    completed: SimpleQueue[_Completion],
+    operation: Operation,
+    cql_dto: CqlDto,
+    attempt: int,
+    oracle_request: Optional[int],
+    submitted_at: float,
+    result: Union[Iterable, Exception, None],
+) -> None:
+    """Query driver callback - passes response (with its completion time) to GeminiProcess main loop."""
+    completed.put(
+        (
+            operation,
+            cql_dto,
+            attempt,
+            oracle_request,
+            submitted_at,
+            time.perf_counter(),
+            [] if result is None else result,
+        )
+    )
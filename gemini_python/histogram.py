@@ -0,0 +1,127 @@
+"""Fixed memory latency histograms with logarithmic buckets (similar to HdrHistogram).
+
+Values are recorded in microseconds. Values below `_SUB_BUCKETS` have exact buckets, above that each power of 2
+range is split into `_SUB_BUCKETS // 2` linear sub-buckets, so value reported for any percentile is within 1.6%
+of recorded one."""
+from array import array
+from typing import Dict, Iterator, Tuple
+
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+_HALF_SUB_BUCKETS = _SUB_BUCKETS // 2
+_MAX_VALUE = (1 << 36) - 1  # ~19 hours in microseconds, larger values are clamped
+_BUCKETS = _SUB_BUCKETS + (_MAX_VALUE.bit_length() - _SUB_BUCKET_BITS) * _HALF_SUB_BUCKETS
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def _bucket_index(value: int) -> int:
+    if value < _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS
+    return _SUB_BUCKETS + (shift - 1) * _HALF_SUB_BUCKETS + (value >> shift) - _HALF_SUB_BUCKETS
+
+
+def _bucket_upper_bound(index: int) -> int:
+    """Returns highest value that falls into bucket with given index."""
+    if index < _SUB_BUCKETS:
+        return index
+    shift, sub_bucket = divmod(index - _SUB_BUCKETS, _HALF_SUB_BUCKETS)
+    return ((sub_bucket + _HALF_SUB_BUCKETS + 1) << (shift + 1)) - 1
+
+
+class LatencyHistogram:
+    """Histogram of latencies. Memory used doesn't depend on number of recorded values."""
+
+    def __init__(self) -> None:
+        self._counts = array("Q", bytes(8 * _BUCKETS))
+        self.count = 0
+        self.total = 0  # sum of recorded values, for mean
+        self.min = 0
+        self.max = 0
+
+    def record(self, latency: float) -> None:
+        """Records latency given in seconds."""
+        value = min(int(latency * 1_000_000), _MAX_VALUE)
+        self._counts[_bucket_index(value)] += 1
+        if not self.count or value < self.min:
+            self.min = value
+        self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """Returns latency (in microseconds) below or equal to which given percent of recorded values are."""
+        if not self.count:
+            return 0
+        threshold = max(1, round(self.count * percentile / 100))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= threshold:
+                return min(_bucket_upper_bound(index), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Returns count and latency statistics in milliseconds."""
+        summary: Dict[str, float] = {
+            "count": self.count,
+            "min_ms": self.min / 1000,
+            "mean_ms": round(self.total / self.count / 1000, 3) if self.count else 0.0,
+        }
+        for percentile in PERCENTILES:
+            summary[f"p{percentile:g}_ms"] = self.value_at_percentile(percentile) / 1000
+        summary["max_ms"] = self.max / 1000
+        return summary
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        """Yields (bucket upper bound, count) for non-empty buckets."""
+        for index, count in enumerate(self._counts):
+            if count:
+                yield _bucket_upper_bound(index), count
+
+    def __add__(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        if not isinstance(other, LatencyHistogram):
+            return NotImplemented
+        merged = LatencyHistogram()
+        merged._counts = array("Q", map(sum, zip(self._counts, other._counts)))
+        merged.count = self.count + other.count
+        merged.total = self.total + other.total
+        non_empty = [histogram for histogram in (self, other) if histogram.count]
+        merged.min = min((histogram.min for histogram in non_empty), default=0)
+        merged.max = max(self.max, other.max)
+        return merged
+
+
+class LatencyHistograms:
+    """Latency histograms by name (e.g. cluster and operation type). Mergeable with `+`."""
+
+    def __init__(self) -> None:
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def record(self, name: str, latency: float) -> None:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = LatencyHistogram()
+        histogram.record(latency)
+
+    def __getitem__(self, name: str) -> LatencyHistogram:
+        return self._histograms[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._histograms
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: self._histograms[name].summary() for name in sorted(self._histograms)}
+
+    def __add__(self, other: "LatencyHistograms") -> "LatencyHistograms":
+        if not isinstance(other, LatencyHistograms):
+            return NotImplemented
+        merged = LatencyHistograms()
+        for name in self._histograms.keys() | other._histograms.keys():
+            if name not in self._histograms:
+                merged._histograms[name] = other._histograms[name]
+            elif name not in other._histograms:
+                merged._histograms[name] = self._histograms[name]
+            else:
+                merged._histograms[name] = self._histograms[name] + other._histograms[name]
+        return merged
@@ -0,0 +1,165 @@
+"""Append-only history log - fixed width binary records (one per written key tuple) in memory mapped file.
+
+File layout:
+    magic (8 bytes), records count (uint64), metadata length (uint32), metadata (json),
+    padding to 8 bytes and records.
+Metadata holds record `format` (python `struct` format) and key `columns` names, so file can be read
+by other tools without schema. Strings are stored as fixed width, null padded bytes."""
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+from gemini_python.column_types import AsciiColumn, Column
+
+MAGIC = b"GEMHIST1"
+_HEADER = struct.Struct("<8sQI")
+_COUNT_OFFSET = len(MAGIC)
+_INITIAL_CAPACITY = 1024  # records
+
+
+def column_format(column: Column) -> str:
+    """Returns `struct` format of fixed width encoding of given column values."""
+    if column.sql_type == "INTEGER":
+        return "q"
+    if isinstance(column, AsciiColumn):
+        return f"{column.size}s"
+    raise ValueError(f"Column type {column.cql_type} is not supported by history log")
+
+
+class HistoryLog:  # pylint: disable=too-many-instance-attributes
+    """Memory mapped history log file. Single writer, any number of read only readers (e.g. for analysis).
+
+    Records are read directly from computed offset, `records` exposes them without copying."""
+
+    def __init__(self, path: Path, writable: bool = False) -> None:
+        self.path = path
+        self._writable = writable
+        with open(path, "r+b" if writable else "rb") as file:
+            magic, count, metadata_length = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a history log file")
+            metadata = json.loads(file.read(metadata_length))
+        self._count: int = count
+        self.columns: List[str] = metadata["columns"]
+        self._record = struct.Struct("<" + metadata["format"])
+        self._str_fields = [
+            idx for idx, code in enumerate(_struct_codes(metadata["format"])) if code.endswith("s")
+        ]
+        self._data_offset = _align(_HEADER.size + metadata_length)
+        self._mmap: Optional[mmap.mmap] = None
+        self._map()
+
+    @classmethod
+    def create(cls, path: Path, columns: List[Column]) -> "HistoryLog":
+        """Creates empty log for key tuples of given columns, overwriting existing file."""
+        metadata = json.dumps(
+            {
+                "format": "".join(column_format(column) for column in columns),
+                "columns": [column.name for column in columns],
+            }
+        ).encode("utf-8")
+        record_size = struct.calcsize("<" + "".join(column_format(column) for column in columns))
+        data_offset = _align(_HEADER.size + len(metadata))
+        # replaced atomically - readers of previous log keep reading it instead of truncated file
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as file:
+            file.write(_HEADER.pack(MAGIC, 0, len(metadata)) + metadata)
+            file.truncate(data_offset + _INITIAL_CAPACITY * record_size)
+        os.replace(tmp_path, path)
+        return cls(path, writable=True)
+
+    def _map(self) -> None:
+        with open(self.path, "r+b" if self._writable else "rb") as file:
+            self._mmap = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_WRITE if self._writable else mmap.ACCESS_READ
+            )
+
+    @property
+    def _buf(self) -> mmap.mmap:
+        assert self._mmap is not None, "history log is closed"
+        return self._mmap
+
+    @property
+    def _capacity(self) -> int:
+        return (len(self._buf) - self._data_offset) // self._record.size
+
+    def append(self, row: tuple) -> None:
+        if self._count == self._capacity:
+            self._grow()
+        self._record.pack_into(
+            self._buf,
+            self._data_offset + self._count * self._record.size,
+            *(
+                value.encode("ascii") if isinstance(value, str) else value
+                for value in row[: len(self.columns)]
+            ),
+        )
+        self._count += 1
+        struct.pack_into("<Q", self._buf, _COUNT_OFFSET, self._count)
+
+    def _grow(self) -> None:
+        new_size = self._data_offset + 2 * max(self._capacity, 1) * self._record.size
+        self._buf.close()
+        with open(self.path, "r+b") as file:
+            file.truncate(new_size)
+        self._map()
+
+    def __len__(self) -> int:
+        if not self._writable:
+            # log may be still written by other process
+            self._count = struct.unpack_from("<Q", self._buf, _COUNT_OFFSET)[0]
+            if self._count > self._capacity:
+                self._buf.close()
+                self._map()
+        return self._count
+
+    def __getitem__(self, idx: int) -> tuple:
+        values = self._record.unpack_from(self._buf, self._data_offset + idx * self._record.size)
+        if not self._str_fields:
+            return values
+        decoded: List[Any] = list(values)
+        for field_idx in self._str_fields:
+            decoded[field_idx] = decoded[field_idx].rstrip(b"\0").decode("ascii")
+        return tuple(decoded)
+
+    def __iter__(self) -> Iterator[tuple]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def records(self) -> memoryview:
+        """Returns raw records without copying (e.g. for `struct.iter_unpack` with `record_format`).
+
+        Log can't be closed (nor grown) until returned memoryview is released."""
+        return memoryview(self._buf)[
+            self._data_offset : self._data_offset + len(self) * self._record.size
+        ]
+
+    @property
+    def record_format(self) -> str:
+        return self._record.format
+
+    def flush(self) -> None:
+        self._buf.flush()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+def _struct_codes(fmt: str) -> Iterator[str]:
+    """Splits `struct` format into codes with their counts, e.g. 'q100sq' -> 'q', '100s', 'q'."""
+    count = ""
+    for char in fmt:
+        if char.isdigit():
+            count += char
+            continue
+        yield count + char
+        count = ""
+
+
+def _align(offset: int, alignment: int = 8) -> int:
+    return (offset + alignment - 1) // alignment * alignment
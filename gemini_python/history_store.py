@@ -1,17 +1,207 @@
+import hashlib
 import logging
+import os
 import random
 import sqlite3
+import time
+from abc import ABC, abstractmethod
+from array import array
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from gemini_python import CqlDto
-from gemini_python.schema import Schema
+from gemini_python.column_types import Column
+from gemini_python.history_log import HistoryLog, column_format
+from gemini_python.schema import Schema, Table
 
 logger = logging.getLogger(__name__)
 
+HISTORY_BACKENDS = ("sqlite", "memory", "mmap", "reservoir")
+# where history files are kept: existing directory, /dev/shm, tmpfs mounted with sudo or (sqlite only) process memory
+HISTORY_STORAGES = ("dir", "shm", "tmpfs", "memory")
+SHM_HISTORY_DIR = Path("/dev/shm/gemini_python")
 
-class HistoryStore:
-    """HistoryStore is a simple sqlite3 database that stores the history of all writes (only pk and ck values)."""
+
+def shm_history_dir(history_files_dir: Path) -> Path:
+    """Returns per-run directory under SHM_HISTORY_DIR for --history-files-dir.
+
+    It's derived from resolved --history-files-dir, so runs with different directories don't share history files,
+    while resumed run finds them again. /dev/shm is emptied only on reboot, remove the directory when no longer needed.
+    """
+    path = str(history_files_dir.resolve())
+    return (
+        SHM_HISTORY_DIR / f"{history_files_dir.name}-{hashlib.sha1(path.encode()).hexdigest()[:12]}"
+    )
+
+
+class HistoryStore(ABC):
+    """Stores the history of all writes (only pk and ck values), so reads can query only inserted data.
+
+    History is kept per table. Statements and methods without table name refer to the first table of schema."""
+
+    rows_count: int = 0  # in all tables
+
+    def insert(self, cql_dto: CqlDto) -> None:
+        """Stores pk and ck values of insert statement in history of `cql_dto.table_name`."""
+
+    def delete(self, cql_dto: CqlDto) -> None:
+        """Marks row with pk and ck values of delete statement as deleted, so it's no longer selected for reads."""
+        raise TypeError(f"{type(self).__name__} doesn't track deleted rows")
+
+    def take_random_row(self, table_name: Optional[str] = None) -> Optional[tuple]:
+        """Returns randomly selected row to be deleted, None if there are no rows.
+
+        Row is no longer selected (for reads nor deletes) until it's returned with `return_row`,
+        so no other operation of that row runs concurrently with its deletion."""
+        raise TypeError(f"{type(self).__name__} doesn't track deleted rows")
+
+    def return_row(self, cql_dto: CqlDto) -> None:
+        """Makes row taken with `take_random_row` selectable again (e.g. when it couldn't be deleted)."""
+        raise TypeError(f"{type(self).__name__} doesn't track deleted rows")
+
+    def commit(self) -> None:
+        """Makes inserted rows durable (if history store is persistent)."""
+
+    @abstractmethod
+    def get_random_row(self, table_name: Optional[str] = None) -> tuple:
+        """Returns pk and ck values of randomly selected row inserted to given table."""
+
+    @abstractmethod
+    def get_rows_count(self, table_name: Optional[str] = None) -> int:
+        """Returns number of rows inserted to given table."""
+
+
+class RowSampler:
+    """Dense index of live rows - O(1) add, remove and random selection.
+
+    Rows are kept in a list (for random selection by position) and in a dict mapping row to its position.
+    Removed row is replaced with the last one, so there are never gaps."""
+
+    def __init__(self) -> None:
+        self._rows: List[tuple] = []
+        self._positions: Dict[tuple, int] = {}
+
+    def add(self, row: tuple) -> None:
+        if row not in self._positions:
+            self._positions[row] = len(self._rows)
+            self._rows.append(row)
+
+    def remove(self, row: tuple) -> None:
+        position = self._positions.pop(row, None)
+        if position is None:
+            return
+        last_row = self._rows.pop()
+        if position < len(self._rows):
+            self._rows[position] = last_row
+            self._positions[last_row] = position
+
+    def sample(self) -> tuple:
+        return self._rows[random.randrange(len(self._rows))]
+
+    def __getitem__(self, idx: int) -> tuple:
+        return self._rows[idx]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class ReservoirSampler:
+    """Keeps uniform random sample of at most `capacity` rows out of all added ones (reservoir sampling).
+
+    Each retained row has a weight - estimate of how many writes it stands for: all rows offered to the reservoir
+    are equally represented by retained ones (`offered / retained` each), plus rewrites of the row while retained.
+    Sum of weights estimates number of all writes."""
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._rows: List[tuple] = []
+        self._rewrites: List[int] = []
+        self._positions: Dict[tuple, int] = {}
+        self._offered = 0
+        self.added = 0
+
+    def add(self, row: tuple) -> None:
+        self.added += 1
+        position = self._positions.get(row)
+        if position is not None:
+            self._rewrites[position] += 1
+            return
+        self._offered += 1
+        if len(self._rows) < self._capacity:
+            self._positions[row] = len(self._rows)
+            self._rows.append(row)
+            self._rewrites.append(0)
+            return
+        position = random.randrange(self._offered)
+        if position < self._capacity:
+            del self._positions[self._rows[position]]
+            self._positions[row] = position
+            self._rows[position] = row
+            self._rewrites[position] = 0
+
+    def sample(self) -> tuple:
+        return self._rows[random.randrange(len(self._rows))]
+
+    def weight(self, row: tuple) -> float:
+        """Returns estimated number of writes retained row stands for (0 if row is not retained)."""
+        position = self._positions.get(row)
+        if position is None:
+            return 0.0
+        return self._offered / len(self._rows) + self._rewrites[position]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class _SqliteTableHistory:  # pylint: disable=too-many-instance-attributes
+    """History of one table: its statements, rows waiting for flush and sampler of live rows."""
+
+    def __init__(self, table: Table) -> None:
+        key_names = [col.name for col in table.partition_keys + table.clustering_keys]
+        self.keys_count = len(key_names)
+        self.insert_query = (
+            f"INSERT OR REPLACE INTO '{table.full_name}' "
+            f"(d_time, {', '.join(key_names)}) "
+            f"VALUES ({','.join('?' * (self.keys_count + 1))})"  # +1 for d_time (deletion time)
+        )
+        keys_condition = " AND ".join(f"{name}=?" for name in key_names)
+        self.delete_query = (
+            f"UPDATE '{table.full_name}' SET d_time=? WHERE d_time IS NULL AND {keys_condition}"
+        )
+        self.create_index_queries = [
+            f"CREATE INDEX IF NOT EXISTS '{table.full_name}_keys' "
+            f"ON '{table.full_name}' ({', '.join(key_names)})",
+            f"CREATE INDEX IF NOT EXISTS '{table.full_name}_d_time' ON '{table.full_name}' (d_time)",
+        ]
+        self.select_live_rows_query = (
+            f"SELECT {', '.join(key_names)} FROM '{table.full_name}' WHERE d_time IS NULL"
+        )
+        # deleted rows in order of deletion after (d_time, id) watermark, skipping rows inserted again
+        live_row_condition = " AND ".join(f"live.{name} = deleted.{name}" for name in key_names)
+        self.select_deleted_rows_query = (
+            f"SELECT d_time, id, {', '.join(key_names)} FROM '{table.full_name}' AS deleted "
+            f"WHERE d_time <= ? AND (d_time, id) > (?, ?) AND NOT EXISTS ("
+            f"SELECT 1 FROM '{table.full_name}' AS live WHERE live.d_time IS NULL AND {live_row_condition}) "
+            f"ORDER BY d_time, id LIMIT ?"
+        )
+        self.select_inserted_again_query = (
+            f"SELECT 1 FROM '{table.full_name}' WHERE id > ? AND {keys_condition} LIMIT 1"
+        )
+        self.buffer: List[tuple] = []
+        self.deletes: List[tuple] = []
+        self.sampler = RowSampler()
+
+
+class SqliteHistoryStore(HistoryStore):  # pylint: disable=too-many-instance-attributes
+    """HistoryStore is a simple sqlite3 database that stores the history of all writes (only pk and ck values).
+
+    Inserted rows are buffered and written with one `executemany` per table and commit (group commit)
+    when `flush_rows` rows are buffered or on first insert after `commit_interval` seconds since last commit.
+    So at most that many rows (or seconds of history) can be lost if process crashes.
+    Random rows are selected from in-memory `RowSampler`, so reads never query sqlite.
+    Deleted rows are kept with deletion time (`d_time`, seconds since epoch), so they can be verified later
+    (see `SqliteDeletedRows`).
+    With `in_memory` database is kept in process memory (`:memory:`) instead of file, so it's lost when process ends."""
 
     def __init__(
         self,
@@ -19,43 +209,513 @@ class HistoryStore:
         schema: Schema,
         drop_schema: bool = False,
         history_file_dir: Path = Path.cwd() / ".gemini",
+        flush_rows: int = 1000,
+        commit_interval: float = 1.0,
+        in_memory: bool = False,
     ) -> None:
         self._schema = schema
-        table = schema.tables[0]
-        self._no_of_columns = (
-            len(table.partition_keys + table.clustering_keys) + 1
-        )  # +1 for d_time (deletion time)
-        self._insert_query = (
-            f"INSERT OR REPLACE INTO '{table.keyspace_name}.{table.name}' "
-            f"(d_time, {', '.join([col.name for col in table.partition_keys + table.clustering_keys])}) "
-            f"VALUES ({','.join('?' * self._no_of_columns)})"
-        )
-        self.conn = sqlite3.connect(f"{history_file_dir}/gemini_{index}.db")
+        self._tables = {table.full_name: _SqliteTableHistory(table) for table in schema.tables}
+        self._default_table = schema.tables[0].full_name
+        self.path = self.file_path(history_file_dir, index)
+        self.conn = sqlite3.connect(":memory:" if in_memory else self.path)
         self.cursor = self.conn.cursor()
+        # WAL keeps journal bounded (checkpointed on commit), durability is bounded by commit interval anyway
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+        self.cursor.execute("PRAGMA synchronous=OFF")
+        self._flush_rows = flush_rows
+        self._commit_interval = commit_interval
+        self._buffered_rows = 0
+        self._last_commit_time = time.monotonic()
         if drop_schema:
             self.drop_schema()
         for cql_dto in schema.as_sql():
             self.cursor.execute(cql_dto.statement)
-        self.cursor.execute("select max(id) from 'gemini.table0';")
-        self.rows_count = self.cursor.fetchall()[0][0] or 0
+        for table_history in self._tables.values():
+            for query in table_history.create_index_queries:
+                self.cursor.execute(query)
+            self.cursor.execute(table_history.select_live_rows_query)
+            for row in self.cursor:
+                table_history.sampler.add(row)
+            self.rows_count += len(table_history.sampler)
+
+    @staticmethod
+    def file_path(history_file_dir: Path, index: int) -> Path:
+        return history_file_dir / f"gemini_{index}.db"
 
     def drop_schema(self) -> None:
         for table in self._schema.tables:
-            self.cursor.execute(f"drop table if exists '{table.keyspace_name}.{table.name}'")
+            self.cursor.execute(f"drop table if exists '{table.full_name}'")
         self.conn.commit()
 
     def insert(self, cql_dto: CqlDto) -> None:
+        table_history = self._tables[cql_dto.table_name or self._default_table]
+        if table_history.deletes:
+            # row inserted again must be written after its deletion
+            self._flush(table_history)
         deletion_time = (None,)
-        self.cursor.execute(
-            self._insert_query, deletion_time + cql_dto.values[: self._no_of_columns - 1]
-        )
-        self.rows_count += 1
+        row = cql_dto.values[: table_history.keys_count]
+        table_history.buffer.append(deletion_time + row)
+        rows_count = len(table_history.sampler)
+        table_history.sampler.add(row)
+        self.rows_count += len(table_history.sampler) - rows_count
+        self._row_buffered()
+
+    def delete(self, cql_dto: CqlDto) -> None:
+        table_history = self._tables[cql_dto.table_name or self._default_table]
+        if table_history.buffer:
+            # deleted row may be still buffered
+            self._flush(table_history)
+        row = cql_dto.values[: table_history.keys_count]
+        table_history.deletes.append((int(time.time()),) + row)
+        rows_count = len(table_history.sampler)
+        table_history.sampler.remove(row)
+        self.rows_count -= rows_count - len(table_history.sampler)
+        self._row_buffered()
+
+    def take_random_row(self, table_name: Optional[str] = None) -> Optional[tuple]:
+        sampler = self._tables[table_name or self._default_table].sampler
+        if not sampler:
+            return None
+        row = sampler.sample()
+        sampler.remove(row)
+        self.rows_count -= 1
+        return row
+
+    def return_row(self, cql_dto: CqlDto) -> None:
+        table_history = self._tables[cql_dto.table_name or self._default_table]
+        rows_count = len(table_history.sampler)
+        table_history.sampler.add(cql_dto.values[: table_history.keys_count])
+        self.rows_count += len(table_history.sampler) - rows_count
+
+    def _row_buffered(self) -> None:
+        self._buffered_rows += 1
+        if (
+            self._buffered_rows >= self._flush_rows
+            or time.monotonic() - self._last_commit_time >= self._commit_interval
+        ):
+            self.commit()
+
+    def _flush(self, table_history: _SqliteTableHistory) -> None:
+        if table_history.buffer:
+            self.cursor.executemany(table_history.insert_query, table_history.buffer)
+            table_history.buffer.clear()
+        if table_history.deletes:
+            self.cursor.executemany(table_history.delete_query, table_history.deletes)
+            table_history.deletes.clear()
 
     def commit(self) -> None:
+        """Writes buffered rows and commits them."""
+        for table_history in self._tables.values():
+            self._flush(table_history)
+        self._buffered_rows = 0
         self.conn.commit()
+        self._last_commit_time = time.monotonic()
+
+    def get_random_row(self, table_name: Optional[str] = None) -> tuple:
+        return self._tables[table_name or self._default_table].sampler.sample()
+
+    def get_rows_count(self, table_name: Optional[str] = None) -> int:
+        return len(self._tables[table_name or self._default_table].sampler)
+
+
+class SqliteDeletedRows:
+    """Rows deleted from one table of `SqliteHistoryStore` database, read in order of deletion time.
+
+    Uses own read only connection, so it can be read in other thread (or process) while history is written.
+    Rows deleted and inserted again are skipped. `fetch` returns the same rows until `advance` is called."""
+
+    def __init__(self, path: Path, table: Table) -> None:
+        table_history = _SqliteTableHistory(table)
+        self._query = table_history.select_deleted_rows_query
+        self._inserted_again_query = table_history.select_inserted_again_query
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._watermark: Tuple[int, int] = (0, 0)  # (d_time, id) of last verified row
+        self._fetched_watermark = self._watermark
+
+    def fetch(self, deleted_before: int, limit: int) -> List[Tuple[int, tuple]]:
+        """Returns ids and pk and ck values of at most `limit` rows deleted not later than `deleted_before`."""
+        rows = self._conn.execute(self._query, (deleted_before, *self._watermark, limit)).fetchall()
+        if rows:
+            self._fetched_watermark = rows[-1][:2]
+        return [(row[1], row[2:]) for row in rows]
+
+    def inserted_again(self, row_id: int, keys: tuple) -> bool:
+        """Returns whether row with given keys was inserted again after deleted row `row_id` (as committed so far)."""
+        return bool(self._conn.execute(self._inserted_again_query, (row_id, *keys)).fetchall())
+
+    def advance(self) -> None:
+        """Marks fetched rows as processed."""
+        self._watermark = self._fetched_watermark
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class _IntHistoryColumn:
+    """Integer values in typed array (8 bytes per value)."""
+
+    def __init__(self) -> None:
+        self._values = array("q")
+
+    def append(self, value: int) -> None:
+        self._values.append(value)
+
+    def __getitem__(self, idx: int) -> int:
+        return self._values[idx]
+
+
+class _InternedHistoryColumn:
+    """Values stored once in a table, column keeps only their indexes (4 bytes per row)."""
+
+    def __init__(self) -> None:
+        self._interned: List[Any] = []
+        self._ids: Dict[Any, int] = {}
+        self._values = array("I")
+
+    def append(self, value: Any) -> None:
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = self._ids[value] = len(self._interned)
+            self._interned.append(value)
+        self._values.append(value_id)
+
+    def __getitem__(self, idx: int) -> Any:
+        return self._interned[self._values[idx]]
+
+
+class _MemoryTableHistory:
+    """History of one table, column by column."""
+
+    def __init__(self, table: Table) -> None:
+        self.columns: List[Union[_IntHistoryColumn, _InternedHistoryColumn]] = [
+            self._create_column(column) for column in table.partition_keys + table.clustering_keys
+        ]
+        self.rows_count = 0
+
+    @staticmethod
+    def _create_column(column: Column) -> Union[_IntHistoryColumn, _InternedHistoryColumn]:
+        if column.sql_type == "INTEGER":
+            return _IntHistoryColumn()
+        return _InternedHistoryColumn()
+
+
+class MemoryHistoryStore(HistoryStore):
+    """Keeps history in process memory, column by column - for runs where history doesn't need to outlive process.
+
+    Integer keys are kept in typed arrays, other keys (e.g. ascii) interned. Insert and random row are O(1)."""
 
-    def get_random_row(self) -> tuple:
-        idx = random.randint(1, self.rows_count)
-        self.cursor.execute(f"SELECT * FROM 'gemini.table0' where id={idx}")
-        row: List[tuple] = self.cursor.fetchall()
-        return row[0][2:]  # drop id and d_time column
+    def __init__(self, schema: Schema) -> None:
+        self._tables = {table.full_name: _MemoryTableHistory(table) for table in schema.tables}
+        self._default_table = schema.tables[0].full_name
+        self.rows_count = 0
+
+    def insert(self, cql_dto: CqlDto) -> None:
+        table_history = self._tables[cql_dto.table_name or self._default_table]
+        for column, value in zip(table_history.columns, cql_dto.values):
+            column.append(value)
+        table_history.rows_count += 1
+        self.rows_count += 1
+
+    def get_random_row(self, table_name: Optional[str] = None) -> tuple:
+        table_history = self._tables[table_name or self._default_table]
+        idx = random.randrange(table_history.rows_count)
+        return tuple(column[idx] for column in table_history.columns)
+
+    def get_rows_count(self, table_name: Optional[str] = None) -> int:
+        return self._tables[table_name or self._default_table].rows_count
+
+
+class MmapHistoryStore(HistoryStore):
+    """Keeps history in append-only, fixed width binary logs (`HistoryLog`), one file per table.
+
+    Files are memory mapped, so writes are memory writes and random row is read from computed offset.
+    After the run (or by other processes) logs can be opened read only with `HistoryLog(path)`."""
+
+    def __init__(
+        self,
+        index: int,
+        schema: Schema,
+        drop_schema: bool = False,
+        history_file_dir: Path = Path.cwd() / ".gemini",
+    ) -> None:
+        history_file_dir.mkdir(parents=True, exist_ok=True)
+        self._logs = {
+            table.full_name: self._open_log(
+                history_file_dir / f"gemini_{index}_{table.full_name}.log", table, drop_schema
+            )
+            for table in schema.tables
+        }
+        self._default_table = schema.tables[0].full_name
+        self.rows_count = sum(len(log) for log in self._logs.values())
+
+    @staticmethod
+    def _open_log(path: Path, table: Table, drop_schema: bool) -> HistoryLog:
+        columns = table.partition_keys + table.clustering_keys
+        if drop_schema or not path.exists():
+            return HistoryLog.create(path, columns)
+        log = HistoryLog(path, writable=True)
+        if log.record_format != "<" + "".join(column_format(column) for column in columns):
+            raise ValueError(f"History log {path} was written for different schema")
+        return log
+
+    def insert(self, cql_dto: CqlDto) -> None:
+        self._logs[cql_dto.table_name or self._default_table].append(cql_dto.values)
+        self.rows_count += 1
+
+    def commit(self) -> None:
+        for log in self._logs.values():
+            log.flush()
+
+    def get_random_row(self, table_name: Optional[str] = None) -> tuple:
+        log = self._logs[table_name or self._default_table]
+        return log[random.randrange(len(log))]
+
+    def get_rows_count(self, table_name: Optional[str] = None) -> int:
+        return len(self._logs[table_name or self._default_table])
+
+
+class ReservoirHistoryStore(HistoryStore):
+    """Keeps at most `capacity` rows per table in memory - uniform random sample of all written ones.
+
+    Memory stays flat over long runs while reads still query written data.
+    `rows_count` counts retained rows, `writes_count` all inserts."""
+
+    def __init__(self, schema: Schema, capacity: int) -> None:
+        self._samplers = {table.full_name: ReservoirSampler(capacity) for table in schema.tables}
+        self._keys_counts = {
+            table.full_name: len(table.partition_keys + table.clustering_keys)
+            for table in schema.tables
+        }
+        self._default_table = schema.tables[0].full_name
+        self.rows_count = 0
+
+    def insert(self, cql_dto: CqlDto) -> None:
+        table_name = cql_dto.table_name or self._default_table
+        sampler = self._samplers[table_name]
+        rows_count = len(sampler)
+        sampler.add(cql_dto.values[: self._keys_counts[table_name]])
+        self.rows_count += len(sampler) - rows_count
+
+    def get_random_row(self, table_name: Optional[str] = None) -> tuple:
+        return self._samplers[table_name or self._default_table].sample()
+
+    def get_rows_count(self, table_name: Optional[str] = None) -> int:
+        return len(self._samplers[table_name or self._default_table])
+
+    def get_sampler(self, table_name: Optional[str] = None) -> ReservoirSampler:
+        return self._samplers[table_name or self._default_table]
+
+    @property
+    def writes_count(self) -> int:
+        return sum(sampler.added for sampler in self._samplers.values())
+
+
+class _HistoryLogsView:
+    """Read only view of history logs of other workers (for one table).
+
+    Logs are discovered (and replaced logs reopened) at most once per `refresh_interval` seconds."""
+
+    def __init__(
+        self, history_file_dir: Path, own_log: Path, table_name: str, refresh_interval: float = 1.0
+    ) -> None:
+        self._history_file_dir = history_file_dir
+        self._own_log = own_log
+        self._table_name = table_name
+        self._refresh_interval = refresh_interval
+        self._logs: Dict[Path, Tuple[int, HistoryLog]] = {}  # path: (inode, log)
+        self._refreshed_at = -refresh_interval
+
+    def _refresh(self) -> None:
+        self._refreshed_at = time.monotonic()
+        for path in self._history_file_dir.glob(f"gemini_*_{self._table_name}.log"):
+            if path == self._own_log:
+                continue
+            try:
+                inode = os.stat(path).st_ino
+                if path in self._logs:
+                    if self._logs[path][0] == inode:
+                        continue
+                    self._logs.pop(path)[1].close()
+                self._logs[path] = (inode, HistoryLog(path))
+            except (OSError, ValueError) as exc:
+                logger.debug("Can't open history log %s: %s", path, exc)
+
+    def logs(self) -> List[HistoryLog]:
+        if time.monotonic() - self._refreshed_at >= self._refresh_interval:
+            self._refresh()
+        return [log for _, log in self._logs.values()]
+
+
+class _HistoryView(ABC):
+    """Read only history of other workers."""
+
+    @abstractmethod
+    def get_random_row(self, table_name: str, idx: int) -> tuple:
+        """Returns row with given index (`0 <= idx < get_rows_count(table_name)`).
+
+        Raises IndexError if there are no rows (history of other workers may shrink meanwhile)."""
+
+    @abstractmethod
+    def get_rows_count(self, table_name: str) -> int:
+        """Returns number of rows of other workers in given table."""
+
+
+class _MmapHistoryView(_HistoryView):
+    """Live view of other workers' `MmapHistoryStore` logs - readers don't lock writers."""
+
+    def __init__(self, index: int, schema: Schema, history_file_dir: Path) -> None:
+        self._views = {
+            table.full_name: _HistoryLogsView(
+                history_file_dir,
+                history_file_dir / f"gemini_{index}_{table.full_name}.log",
+                table.full_name,
+            )
+            for table in schema.tables
+        }
+
+    def get_random_row(self, table_name: str, idx: int) -> tuple:
+        logs = [(log, len(log)) for log in self._views[table_name].logs()]
+        rows_count = sum(log_rows_count for _, log_rows_count in logs)
+        if not rows_count:
+            raise IndexError(idx)
+        # logs may be recreated smaller since rows were counted
+        idx %= rows_count
+        for log, log_rows_count in logs:
+            if idx < log_rows_count:
+                return log[idx]
+            idx -= log_rows_count
+        raise IndexError(idx)  # not reachable
+
+    def get_rows_count(self, table_name: str) -> int:
+        return sum(len(log) for log in self._views[table_name].logs())
+
+
+class _SqliteHistorySnapshot(_HistoryView):
+    """Snapshot of other workers' `SqliteHistoryStore` databases, taken at startup."""
+
+    def __init__(self, index: int, schema: Schema, history_file_dir: Path) -> None:
+        self._samplers = {table.full_name: RowSampler() for table in schema.tables}
+        for path in sorted(history_file_dir.glob("gemini_*.db")):
+            if path == SqliteHistoryStore.file_path(history_file_dir, index):
+                continue
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                for table in schema.tables:
+                    for row in conn.execute(_SqliteTableHistory(table).select_live_rows_query):
+                        self._samplers[table.full_name].add(row)
+            except sqlite3.Error as exc:
+                logger.warning("Can't read history from %s: %s", path, exc)
+            finally:
+                conn.close()
+
+    def get_random_row(self, table_name: str, idx: int) -> tuple:
+        return self._samplers[table_name][idx]
+
+    def get_rows_count(self, table_name: str) -> int:
+        return len(self._samplers[table_name])
+
+
+class SharedHistoryStore(HistoryStore):
+    """Writes to worker's own history store, reads sample rows written by all workers.
+
+    Other workers' history is read only (`_HistoryView`), so writers are never locked."""
+
+    def __init__(self, history_store: HistoryStore, view: _HistoryView, schema: Schema) -> None:
+        self._history_store = history_store
+        self._view = view
+        self._default_table = schema.tables[0].full_name
+        self.rows_count = history_store.rows_count  # written by this worker
+
+    def insert(self, cql_dto: CqlDto) -> None:
+        self._history_store.insert(cql_dto)
+        self.rows_count = self._history_store.rows_count
+
+    def delete(self, cql_dto: CqlDto) -> None:
+        """Deletes row from worker's own history. Rows of other workers stay in their history."""
+        self._history_store.delete(cql_dto)
+        self.rows_count = self._history_store.rows_count
+
+    def take_random_row(self, table_name: Optional[str] = None) -> Optional[tuple]:
+        """Takes row of worker's own history - other workers may be reading their rows meanwhile."""
+        row = self._history_store.take_random_row(table_name or self._default_table)
+        self.rows_count = self._history_store.rows_count
+        return row
+
+    def return_row(self, cql_dto: CqlDto) -> None:
+        self._history_store.return_row(cql_dto)
+        self.rows_count = self._history_store.rows_count
+
+    def commit(self) -> None:
+        self._history_store.commit()
+
+    def get_random_row(self, table_name: Optional[str] = None) -> tuple:
+        table_name = table_name or self._default_table
+        own_rows_count = self._history_store.get_rows_count(table_name)
+        idx = random.randrange(own_rows_count + self._view.get_rows_count(table_name))
+        if idx < own_rows_count:
+            return self._history_store.get_random_row(table_name)
+        try:
+            return self._view.get_random_row(table_name, idx - own_rows_count)
+        except IndexError:
+            # history of other workers was recreated empty since rows were counted
+            if not own_rows_count:
+                raise
+            return self._history_store.get_random_row(table_name)
+
+    def get_rows_count(self, table_name: Optional[str] = None) -> int:
+        table_name = table_name or self._default_table
+        return self._history_store.get_rows_count(table_name) + self._view.get_rows_count(
+            table_name
+        )
+
+
+class HistoryStoreFactory:
+    """Creates HistoryStore objects according to selected backend."""
+
+    @classmethod
+    def create_history_store(
+        cls,
+        backend: str,
+        index: int,
+        schema: Schema,
+        drop_schema: bool = False,
+        history_file_dir: Path = Path.cwd() / ".gemini",
+        flush_rows: int = 1000,
+        commit_interval: float = 1.0,
+        capacity: int = 1_000_000,
+        shared: bool = False,
+        in_memory: bool = False,
+    ) -> HistoryStore:
+        """`memory` backend keeps history only in process memory, `sqlite` and `mmap` in files in `history_file_dir`.
+
+        `reservoir` keeps in memory random sample of at most `capacity` rows per table.
+        When `shared`, reads sample also history written by other workers: live view of `mmap` logs
+        or snapshot of `sqlite` databases existing at startup (none if `drop_schema`).
+        With `in_memory`, `sqlite` database is kept in process memory.
+        History kept in process memory can't be shared."""
+        if backend == "memory":
+            return MemoryHistoryStore(schema)
+        if backend == "reservoir":
+            return ReservoirHistoryStore(schema, capacity)
+        history_store: HistoryStore
+        if backend == "mmap":
+            history_store = MmapHistoryStore(
+                index, schema, drop_schema=drop_schema, history_file_dir=history_file_dir
+            )
+            if shared:
+                view = _MmapHistoryView(index, schema, history_file_dir)
+                return SharedHistoryStore(history_store, view, schema)
+            return history_store
+        history_store = SqliteHistoryStore(
+            index,
+            schema,
+            drop_schema=drop_schema,
+            history_file_dir=history_file_dir,
+            flush_rows=flush_rows,
+            commit_interval=commit_interval,
+            in_memory=in_memory,
+        )
+        if shared and not drop_schema:
+            snapshot = _SqliteHistorySnapshot(index, schema, history_file_dir)
+            return SharedHistoryStore(history_store, snapshot, schema)
+        return history_store
@@ -1,50 +1,145 @@
-from itertools import cycle
-from typing import Tuple
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from gemini_python import CqlDto, QueryMode, Operation
 from gemini_python.history_store import HistoryStore
 from gemini_python.query import (
+    DeleteQueryGenerator,
     InsertQueryGenerator,
     SelectQueryGenerator,
     QueryGenerator,
 )
 from gemini_python.schema import Schema
+from gemini_python.statement_registry import StatementRegistry
 
 
 class LoadGenerator:
-    """Query generator selector according to schema and mode."""
+    """Query generator selector according to schema and mode.
+
+    With `delete_ratio`, that fraction of inserts is replaced with deletes of rows from history of the same table.
+    With `value_pool_size`, inserted values are taken from pools of pre-generated values (see `RowPool`)."""
 
     def __init__(
         self,
         schema: Schema,
-        partitions: list[list[tuple]],
+        partitions: Sequence[Sequence[tuple]],
         history_store: HistoryStore,
         mode: QueryMode = QueryMode.WRITE,
+        statement_registry: Optional[StatementRegistry] = None,
+        delete_ratio: float = 0.0,
+        value_pool_size: int = 0,
+        value_pool_reuse: int = 10,
     ):
 
+        self._mode = mode
+        self._history_store = history_store
+        self._delete_ratio = delete_ratio
+        self._delete_generators: Dict[str, DeleteQueryGenerator] = {}
         generators: list[QueryGenerator] = []
         assert len(schema.tables) == len(
             partitions
         ), "partitions were not generated for all tables. Should not happen."
         for table, partition_list in zip(schema.tables, partitions):
             if mode == QueryMode.WRITE:
-                generators.append(InsertQueryGenerator(table=table, partitions=partition_list))
+                generators.append(
+                    InsertQueryGenerator(
+                        table=table,
+                        partitions=partition_list,
+                        statement_registry=statement_registry,
+                        value_pool_size=value_pool_size,
+                        value_pool_reuse=value_pool_reuse,
+                    )
+                )
             elif mode == QueryMode.READ:
                 generators.append(
                     SelectQueryGenerator(
-                        table=table, partitions=partition_list, history_store=history_store
+                        table=table,
+                        partitions=partition_list,
+                        history_store=history_store,
+                        statement_registry=statement_registry,
                     )
                 )
             elif mode == QueryMode.MIXED:
-                generators.append(InsertQueryGenerator(table=table, partitions=partition_list))
+                generators.append(
+                    InsertQueryGenerator(
+                        table=table,
+                        partitions=partition_list,
+                        statement_registry=statement_registry,
+                        value_pool_size=value_pool_size,
+                        value_pool_reuse=value_pool_reuse,
+                    )
+                )
                 generators.append(
                     SelectQueryGenerator(
-                        table=table, partitions=partition_list, history_store=history_store
+                        table=table,
+                        partitions=partition_list,
+                        history_store=history_store,
+                        statement_registry=statement_registry,
                     )
                 )
             else:
                 raise ValueError(f"Unsupported query mode: {mode}")
-        self._query_generator = cycle(generators)
+            if delete_ratio and mode != QueryMode.READ:
+                self._delete_generators[table.full_name] = DeleteQueryGenerator(
+                    table=table,
+                    history_store=history_store,
+                    statement_registry=statement_registry,
+                )
+        self._generators = generators
+        self._position = 0
+
+    def _next_generator(self) -> QueryGenerator:
+        query_generator = self._generators[self._position]
+        self._position = (self._position + 1) % len(self._generators)
+        return query_generator
 
     def get_query(self) -> Tuple[Operation, CqlDto]:
-        return next(next(self._query_generator))
+        query_generator = self._next_generator()
+        if self._mode == QueryMode.MIXED:
+            # nothing to read from table yet (e.g. first writes are still in flight)
+            while isinstance(
+                query_generator, SelectQueryGenerator
+            ) and not self._history_store.get_rows_count(query_generator.table_name):
+                query_generator = self._next_generator()
+        if (
+            self._delete_generators
+            and isinstance(query_generator, InsertQueryGenerator)
+            and random.random() < self._delete_ratio
+        ):
+            delete = next(self._delete_generators[query_generator.table_name], None)
+            if delete is not None:
+                return delete
+        return next(query_generator)
+
+    def get_state(self) -> Tuple[int, List[Any]]:
+        """Returns positions of generators, so generation can be continued later (e.g. after restart)."""
+        return self._position, [generator.get_state() for generator in self._generators]
+
+    def set_state(self, state: Tuple[int, List[Any]]) -> None:
+        self._position, generator_states = state
+        for generator, generator_state in zip(self._generators, generator_states):
+            generator.set_state(generator_state)
+
+    def get_values_counts(self) -> Tuple[int, int]:
+        """Returns number of unique and all values generated for inserts (without partition keys)."""
+        insert_generators = [
+            generator
+            for generator in self._generators
+            if isinstance(generator, InsertQueryGenerator)
+        ]
+        return (
+            sum(generator.unique_values for generator in insert_generators),
+            sum(generator.used_values for generator in insert_generators),
+        )
+
+    def get_keys_counts(self) -> Tuple[int, int]:
+        """Returns number of unique and all primary keys of inserted rows (see `InsertQueryGenerator`)."""
+        insert_generators = [
+            generator
+            for generator in self._generators
+            if isinstance(generator, InsertQueryGenerator)
+        ]
+        return (
+            sum(generator.unique_keys for generator in insert_generators),
+            sum(generator.used_keys for generator in insert_generators),
+        )
@@ -0,0 +1,210 @@
+"""Lazily computed partition keys.
+
+Partition keys are not generated upfront: i-th partition is computed on demand from partition key columns seeds
+and its index (`Column.generate_value_at`), so workers keep no partition lists in memory and GeminiProcess
+pickles only columns and range into child process.
+
+`TokenAwarePartitions` instead place one partition in each slice of token ring, by Murmur3 token of partition key
+(as computed by Murmur3Partitioner)."""
+import logging
+import math
+import struct
+import time
+from collections.abc import Sequence
+from typing import List, Optional, Tuple, Union, overload
+
+from cassandra.metadata import Murmur3Token  # type: ignore  # pylint: disable=no-name-in-module
+
+from gemini_python.column_types import Column
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MIN_TOKEN = -(2**63)
+MAX_TOKEN = 2**63 - 1
+
+
+def partition_token(columns: Sequence[Column], values: tuple) -> int:
+    """Returns Murmur3 token of partition with given partition key values."""
+    components = [column.serialize_value(value) for column, value in zip(columns, values)]
+    if len(components) == 1:
+        key = components[0]
+    else:
+        # composite partition key: each component prefixed with length and followed by 0 byte
+        key = b"".join(
+            struct.pack(f">H{len(component)}sB", len(component), component, 0)
+            for component in components
+        )
+    token: int = Murmur3Token.hash_fn(key)
+    return token
+
+
+class Partitions(Sequence):
+    """Sequence of `count` partition key tuples with indexes starting at `start`."""
+
+    def __init__(self, columns: Sequence[Column], count: int, start: int = 0) -> None:
+        self._columns = columns
+        self._count = count
+        self._start = start
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, index: int) -> tuple:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[tuple]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[tuple, List[tuple]]:
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("partition index out of range")
+        return tuple(column.generate_value_at(self._start + index) for column in self._columns)
+
+    def __repr__(self) -> str:
+        return (
+            f"Partitions({', '.join(column.name for column in self._columns)}, "
+            f"count={self._count}, start={self._start})"
+        )
+
+
+class TokenAwarePartitions(Sequence):  # pylint: disable=too-many-instance-attributes
+    """One partition in each of `count` token ring slices, starting with `first_slice`.
+
+    Token range `token_range` (inclusive, whole ring by default) is divided into `slices` equal slices.
+    Candidate partitions (`Column.generate_value_at` of consecutive indexes) are scanned when created (or given
+    as `slice_indexes` - index found for each slice, see `for_workers`) until each slice has one, so only their
+    indexes are kept. Slices without partition found within `slices * max_scan_factor` candidates (or all distinct
+    partitions, when partition key columns have few values) are skipped - partitions may be empty.
+
+    Workers given different slices never share partitions - partition token determines its slice."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        columns: Sequence[Column],
+        count: int,
+        first_slice: int = 0,
+        slices: Optional[int] = None,
+        token_range: Tuple[int, int] = (MIN_TOKEN, MAX_TOKEN),
+        max_scan_factor: int = 20,
+        slice_indexes: Optional[Sequence[Optional[int]]] = None,
+    ) -> None:
+        self._columns = columns
+        self._count = count
+        self._first_slice = first_slice
+        self._slices = slices or count
+        self._token_range = token_range
+        self._max_scan_factor = max_scan_factor
+        if slice_indexes is None:
+            slice_indexes = self._find_partitions()
+        self._indexes = [index for index in slice_indexes if index is not None]
+
+    @classmethod
+    def for_workers(
+        cls,
+        columns: Sequence[Column],
+        workers: int,
+        slices: int,
+        token_range: Tuple[int, int] = (MIN_TOKEN, MAX_TOKEN),
+        max_scan_factor: int = 20,
+    ) -> List["TokenAwarePartitions"]:
+        """Returns partitions of `workers` consecutive parts of `slices` slices, found in one scan for all workers."""
+        count = slices // workers
+        all_slices = cls(
+            columns,
+            count * workers,
+            slices=slices,
+            token_range=token_range,
+            max_scan_factor=max_scan_factor,
+            slice_indexes=[],
+        )
+        slice_indexes = all_slices._find_partitions()
+        return [
+            cls(
+                columns,
+                count,
+                first_slice=worker * count,
+                slices=slices,
+                token_range=token_range,
+                max_scan_factor=max_scan_factor,
+                slice_indexes=slice_indexes[worker * count : (worker + 1) * count],
+            )
+            for worker in range(workers)
+        ]
+
+    def slice_of(self, token: int) -> int:
+        """Returns slice of given token, -1 or `slices` when it's out of `token_range`."""
+        low, high = self._token_range
+        if token < low:
+            return -1
+        if token > high:
+            return self._slices
+        return (token - low) * self._slices // (high - low + 1)
+
+    def _max_candidates(self) -> int:
+        candidates = self._slices * self._max_scan_factor
+        distinct_values = [
+            column.distinct_values for column in self._columns if column.distinct_values
+        ]
+        if len(distinct_values) == len(self._columns):
+            # generated partitions repeat after that many indexes
+            candidates = min(candidates, math.lcm(*distinct_values))
+        return candidates
+
+    def _find_partitions(self) -> List[Optional[int]]:
+        """Returns index of the first candidate partition in each slice, None when not found."""
+        start = time.perf_counter()
+        found: List[Optional[int]] = [None] * self._count
+        missing = self._count
+        max_candidates = self._max_candidates()
+        scanned = 0
+        while missing and scanned < max_candidates:
+            values = tuple(column.generate_value_at(scanned) for column in self._columns)
+            position = self.slice_of(partition_token(self._columns, values)) - self._first_slice
+            if 0 <= position < self._count and found[position] is None:
+                found[position] = scanned
+                missing -= 1
+            scanned += 1
+        logger.info(
+            "Scanned %s candidate partitions of %s token slices in %.2fs",
+            scanned,
+            self._count,
+            time.perf_counter() - start,
+        )
+        if missing:
+            logger.warning(
+                "No partition found for %s of %s token slices, they are skipped",
+                missing,
+                self._count,
+            )
+        return found
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    @overload
+    def __getitem__(self, index: int) -> tuple:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[tuple]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[tuple, List[tuple]]:
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(len(self)))]
+        partition_index = self._indexes[index]
+        return tuple(column.generate_value_at(partition_index) for column in self._columns)
+
+    def __repr__(self) -> str:
+        return (
+            f"TokenAwarePartitions({', '.join(column.name for column in self._columns)}, "
+            f"count={self._count}, first_slice={self._first_slice}, slices={self._slices}, "
+            f"token_range={self._token_range})"
+        )
@@ -1,17 +1,39 @@
-from abc import ABC
+from abc import ABC, abstractmethod
 from itertools import cycle
-from typing import Tuple
+from typing import Any, List, Optional, Sequence, Set, Tuple
 
 from gemini_python import CqlDto, Operation
+from gemini_python.column_types import RowPool, generate_rows
 from gemini_python.history_store import HistoryStore
-from gemini_python.schema import Table
+from gemini_python.schema import Schema, Table
+from gemini_python.statement_registry import StatementRegistry
 
 
 class QueryGenerator(ABC):
     """Base class for CQL queries generators."""
 
-    def __init__(self, table: Table) -> None:
+    def __init__(
+        self, table: Table, statement_registry: Optional[StatementRegistry] = None
+    ) -> None:
         self._table = table
+        self._stmt = self.build_statement(table)
+        self._statement_id = statement_registry.id_of(self._stmt) if statement_registry else None
+
+    @staticmethod
+    @abstractmethod
+    def build_statement(table: Table) -> str:
+        """Returns CQL statement (with bind markers) generated by this generator for given table."""
+
+    @property
+    def table_name(self) -> str:
+        return self._table.full_name
+
+    def get_state(self) -> Any:
+        """Returns generator position, so generation can be continued later (e.g. after restart)."""
+        return None
+
+    def set_state(self, state: Any) -> None:
+        """Restores position returned by `get_state`."""
 
     def __iter__(self) -> "QueryGenerator":
         return self
@@ -20,44 +42,141 @@ class QueryGenerator(ABC):
         pass
 
 
-class InsertQueryGenerator(QueryGenerator):
-    """Basic insert query with all table columns."""
-
-    def __init__(self, table: Table, partitions: list[tuple]) -> None:
-        super().__init__(table)
-        self._partitions = cycle(partitions)
-        self._stmt = (
+class InsertQueryGenerator(QueryGenerator):  # pylint: disable=too-many-instance-attributes
+    """Basic insert query with all table columns.
+
+    Values of non partition key columns are generated `rows_batch_size` rows at a time (`generate_rows`)
+    or, with `value_pool_size`, taken from `RowPool` reusing each value `value_pool_reuse` times.
+    `unique_values` counts values of these columns used for the first time, `used_values` all of them.
+    `unique_keys` counts inserted rows whose primary key wasn't inserted before in the same pool cycle (pools
+    reuse clustering key values, so keys repeat when values land in the same partition again), `used_keys` all rows.
+    Without pool clustering key values are not reused, so all keys count as unique."""
+
+    def __init__(
+        self,
+        table: Table,
+        partitions: Sequence[tuple],
+        statement_registry: Optional[StatementRegistry] = None,
+        rows_batch_size: int = 256,
+        value_pool_size: int = 0,
+        value_pool_reuse: int = 10,
+    ) -> None:
+        super().__init__(table, statement_registry)
+        self._partitions = partitions
+        self._position = 0
+        self._columns = table.clustering_keys + table.columns
+        self._rows_batch_size = rows_batch_size
+        self._row_pool = (
+            RowPool(self._columns, value_pool_size, value_pool_reuse) if value_pool_size else None
+        )
+        self._rows: List[tuple] = []  # generated rows, used from `_row_position`
+        self._row_position = 0
+        self._fresh_rows = True  # values of current rows are used for the first time
+        self._clustering_keys_count = len(table.clustering_keys)
+        self._cycle_keys: Set[tuple] = set()  # primary keys inserted since pools were generated
+        self.unique_values = 0
+        self.used_values = 0
+        self.unique_keys = 0
+        self.used_keys = 0
+
+    @staticmethod
+    def build_statement(table: Table) -> str:
+        return (
             f"insert into {table.keyspace_name}.{table.name} "
-            f"({', '.join([col.name for col in self._table.all_columns])}) "
-            f"VALUES ({','.join('?'*len(self._table.all_columns))})"
+            f"({', '.join([col.name for col in table.all_columns])}) "
+            f"VALUES ({','.join('?'*len(table.all_columns))})"
         )
 
     def __iter__(self) -> "QueryGenerator":
         return self
 
+    def get_state(self) -> Any:
+        """Includes rows generated but not used yet and value counters, so generation continues exactly."""
+        return (
+            self._position,
+            self._rows[self._row_position :],
+            self._fresh_rows,
+            self._row_pool.get_state() if self._row_pool else None,
+            set(self._cycle_keys),
+            self.unique_values,
+            self.used_values,
+            self.unique_keys,
+            self.used_keys,
+        )
+
+    def set_state(self, state: Any) -> None:
+        (
+            self._position,
+            self._rows,
+            self._fresh_rows,
+            row_pool_state,
+            self._cycle_keys,
+            self.unique_values,
+            self.used_values,
+            self.unique_keys,
+            self.used_keys,
+        ) = state
+        self._row_position = 0
+        if self._row_pool and row_pool_state is not None:
+            self._row_pool.set_state(row_pool_state)
+
+    def _next_rows(self) -> List[tuple]:
+        if self._row_pool is not None:
+            self._fresh_rows = self._row_pool.fresh
+            if self._fresh_rows:
+                self._cycle_keys.clear()
+            return self._row_pool.next_rows()
+        return generate_rows(self._columns, self._rows_batch_size)
+
     def __next__(self) -> Tuple[Operation, CqlDto]:
+        partition = self._partitions[self._position]
+        self._position = (self._position + 1) % len(self._partitions)
+        if self._row_position == len(self._rows):
+            self._rows = self._next_rows()
+            self._row_position = 0
+        row = self._rows[self._row_position]
+        self._row_position += 1
+        self.used_values += len(self._columns)
+        if self._fresh_rows:
+            self.unique_values += len(self._columns)
+        self.used_keys += 1
+        if self._row_pool is None:
+            self.unique_keys += 1
+        else:
+            key = partition + row[: self._clustering_keys_count]
+            if key not in self._cycle_keys:
+                self._cycle_keys.add(key)
+                self.unique_keys += 1
         return Operation.WRITE, CqlDto(
             self._stmt,
-            next(self._partitions)
-            + tuple(
-                column.generate_random_value()
-                for column in self._table.clustering_keys + self._table.columns
-            ),
+            partition + row,
+            self._statement_id,
+            self._table.full_name,
         )
 
 
 class SelectQueryGenerator(QueryGenerator):
     """Basic select query with all table columns."""
 
-    def __init__(self, table: Table, partitions: list[tuple], history_store: HistoryStore) -> None:
-        super().__init__(table)
+    def __init__(
+        self,
+        table: Table,
+        partitions: Sequence[tuple],
+        history_store: HistoryStore,
+        statement_registry: Optional[StatementRegistry] = None,
+    ) -> None:
+        super().__init__(table, statement_registry)
         # todo: we may want to use random here instead of cycling
         self.history_store = history_store
         self._partitions = cycle(partitions)
-        self._stmt = (
-            f"select {', '.join(col.name for col in self._table.all_columns)}"
+
+    @staticmethod
+    def build_statement(table: Table) -> str:
+        """Selects columns always in `table.all_columns` order, so tuple rows can be compared positionally."""
+        return (
+            f"select {', '.join(col.name for col in table.all_columns)}"
             f" from {table.keyspace_name}.{table.name} "
-            f"where {' AND '.join([col.name + '=?' for col in self._table.partition_keys + self._table.clustering_keys])}"
+            f"where {' AND '.join([col.name + '=?' for col in table.partition_keys + table.clustering_keys])}"
         )
 
     def __iter__(self) -> "QueryGenerator":
@@ -66,5 +185,48 @@ class SelectQueryGenerator(QueryGenerator):
     def __next__(self) -> Tuple[Operation, CqlDto]:
         return Operation.READ, CqlDto(
             self._stmt,
-            self.history_store.get_random_row(),
+            self.history_store.get_random_row(self._table.full_name),
+            self._statement_id,
+            self._table.full_name,
         )
+
+
+class DeleteQueryGenerator(QueryGenerator):
+    """Deletes single rows randomly taken from history (`HistoryStore.take_random_row`).
+
+    Stops iteration while there is no row to delete."""
+
+    def __init__(
+        self,
+        table: Table,
+        history_store: HistoryStore,
+        statement_registry: Optional[StatementRegistry] = None,
+    ) -> None:
+        super().__init__(table, statement_registry)
+        self.history_store = history_store
+
+    @staticmethod
+    def build_statement(table: Table) -> str:
+        return (
+            f"delete from {table.keyspace_name}.{table.name} "
+            f"where {' AND '.join([col.name + '=?' for col in table.partition_keys + table.clustering_keys])}"
+        )
+
+    def __iter__(self) -> "QueryGenerator":
+        return self
+
+    def __next__(self) -> Tuple[Operation, CqlDto]:
+        row = self.history_store.take_random_row(self._table.full_name)
+        if row is None:
+            raise StopIteration
+        return Operation.DELETE, CqlDto(self._stmt, row, self._statement_id, self._table.full_name)
+
+
+def build_statement_registry(schema: Schema) -> StatementRegistry:
+    """Registers all statements that query generators can produce for given schema."""
+    registry = StatementRegistry()
+    for table in schema.tables:
+        registry.register(InsertQueryGenerator.build_statement(table))
+        registry.register(SelectQueryGenerator.build_statement(table))
+        registry.register(DeleteQueryGenerator.build_statement(table))
+    return registry
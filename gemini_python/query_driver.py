@@ -1,24 +1,64 @@
 #  pylint: disable=no-name-in-module
+import importlib
 import logging
+import threading
+import time
 from abc import ABC
-from functools import lru_cache
-from typing import Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Type, Union
 from cassandra import DriverException  # type: ignore
-from cassandra.cluster import Cluster  # type: ignore
-from cassandra.io.asyncorereactor import AsyncoreConnection  # type: ignore
-from cassandra.policies import RoundRobinPolicy  # type: ignore
-from cassandra.query import PreparedStatement, dict_factory  # type: ignore
+from cassandra.cluster import Cluster, ResponseFuture, ResultSet  # type: ignore
+from cassandra.concurrent import execute_concurrent  # type: ignore
+from cassandra.policies import RoundRobinPolicy, TokenAwarePolicy  # type: ignore
+from cassandra.query import (  # type: ignore
+    PreparedStatement,
+    dict_factory,
+    named_tuple_factory,
+    tuple_factory,
+)
 
-from gemini_python import CqlDto, OnSuccessClb, OnErrorClb
+from gemini_python import ConnectionOptions, CqlDto, OnSuccessClb, OnErrorClb
+from gemini_python.statement_registry import StatementRegistry
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+CONNECTION_CLASSES = {
+    "asyncore": ("cassandra.io.asyncorereactor", "AsyncoreConnection"),
+    "libev": ("cassandra.io.libevreactor", "LibevConnection"),
+    "asyncio": ("cassandra.io.asyncioreactor", "AsyncioConnection"),
+}
+PREPARE_CONCURRENCY = 16
+# True - any compression available locally
+COMPRESSIONS: Dict[str, Union[bool, str]] = {
+    "auto": True,
+    "none": False,
+    "lz4": "lz4",
+    "snappy": "snappy",
+}
+# tuple rows are compared positionally - selects list columns in fixed order
+ROW_FACTORIES: Dict[str, Callable] = {
+    "dict": dict_factory,
+    "tuple": tuple_factory,
+    "named_tuple": named_tuple_factory,
+}
+
 
 class QueryDriverException(Exception):
     """Exception raised by QueryDriver."""
 
 
+@dataclass
+class PrepareStats:
+    """Prepared statements statistics of QueryDriver"""
+
+    prepared: int = 0
+    prepare_time: float = 0.0  # sum of prepare latencies, in seconds
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
 class QueryDriver(ABC):
     """Responsible for communication with DB and running queries."""
 
@@ -33,9 +73,25 @@ class QueryDriver(ABC):
     def execute(self, cql_dto: CqlDto) -> Iterable:
         """Executes statement synchronously."""
 
+    def execute_many(self, cql_dtos: List[CqlDto]) -> List[Union[Iterable, Exception]]:
+        """Executes many statements at once.
+
+        Returns result for each statement or QueryDriverException if given statement failed."""
+        results: List[Union[Iterable, Exception]] = []
+        for cql_dto in cql_dtos:
+            try:
+                results.append(self.execute(cql_dto))
+            except QueryDriverException as exc:
+                results.append(exc)
+        return results
+
     def prepare(self, statement: str) -> None:
         """Preparation before running statement."""
 
+    def get_prepare_stats(self) -> PrepareStats:
+        """Returns prepared statements statistics (if query driver prepares statements)."""
+        return PrepareStats()
+
     def teardown(self) -> None:
         """Proper query driver shutdown, closing all connections, freeing resources."""
 
@@ -43,21 +99,71 @@ class QueryDriver(ABC):
 class PythonQueryDriver(QueryDriver):
     """Communicates with and queries Scylla/Cassandra databases."""
 
-    def __init__(self, hosts: List[str], port: int = 9042) -> None:
-        kwargs = {"metrics_enabled": False, "connection_class": AsyncoreConnection}
+    def __init__(
+        self,
+        hosts: List[str],
+        port: int = 9042,
+        connection_options: Optional[ConnectionOptions] = None,
+        statement_registry: Optional[StatementRegistry] = None,
+    ) -> None:
+        options = connection_options or ConnectionOptions()
+        load_balancing_policy = RoundRobinPolicy()
+        if options.token_aware:
+            load_balancing_policy = TokenAwarePolicy(load_balancing_policy)
+        kwargs: Dict[str, Any] = {
+            "metrics_enabled": False,
+            "connection_class": _get_connection_class(options.connection_class),
+            "compression": COMPRESSIONS[options.compression],
+        }
+        if not options.shard_aware:
+            kwargs["shard_aware_options"] = {"disable": True}
         self.cluster = Cluster(
-            hosts, port=port, load_balancing_policy=RoundRobinPolicy(), protocol_version=4, **kwargs
+            hosts,
+            port=port,
+            load_balancing_policy=load_balancing_policy,
+            protocol_version=options.protocol_version,
+            **kwargs,
         )
         self.session = self.cluster.connect()
-        self.session.row_factory = dict_factory
+        self.session.row_factory = ROW_FACTORIES[options.row_factory]
+        self.session.default_timeout = options.request_timeout
+        self.session.default_fetch_size = options.fetch_size
+        self._prepare_stats = PrepareStats()
+        self._prepare_stats_lock = threading.Lock()
+        self._prepared_by_id: List[PreparedStatement] = []
+        self._prepared_by_statement: Dict[str, PreparedStatement] = {}
+        if statement_registry is not None:
+            self._prepare_all(statement_registry)
 
-    def prepare(self, statement: str) -> None:
-        self._prepare_statement(statement)
+    def _prepare_all(self, statement_registry: StatementRegistry) -> None:
+        """Prepares all registered statements upfront and concurrently, so it's not done in hot path."""
+        with ThreadPoolExecutor(max_workers=PREPARE_CONCURRENCY) as executor:
+            self._prepared_by_id = list(executor.map(self.prepare, statement_registry.statements))
+
+    def prepare(self, statement: str) -> PreparedStatement:
+        """Prepares statement (on all hosts) and caches it."""
+        start_time = time.perf_counter()
+        prepared_statement = self.session.prepare(statement)
+        with self._prepare_stats_lock:
+            self._prepare_stats.prepared += 1
+            self._prepare_stats.prepare_time += time.perf_counter() - start_time
+        self._prepared_by_statement[statement] = prepared_statement
+        return prepared_statement
+
+    def get_prepared_statement(self, cql_dto: CqlDto) -> PreparedStatement:
+        """Returns prepared statement - by statement id if available. Prepares it if not done before."""
+        if cql_dto.statement_id is not None and cql_dto.statement_id < len(self._prepared_by_id):
+            self._prepare_stats.cache_hits += 1
+            return self._prepared_by_id[cql_dto.statement_id]
+        prepared_statement = self._prepared_by_statement.get(cql_dto.statement)
+        if prepared_statement is None:
+            self._prepare_stats.cache_misses += 1
+            return self.prepare(cql_dto.statement)
+        self._prepare_stats.cache_hits += 1
+        return prepared_statement
 
-    @lru_cache(maxsize=1000)
-    def _prepare_statement(self, statement: str) -> PreparedStatement:
-        """Prepare statement before running it. Cached so it is done only once."""
-        return self.session.prepare(statement)
+    def get_prepare_stats(self) -> PrepareStats:
+        return replace(self._prepare_stats)
 
     def execute_async(
         self,
@@ -66,22 +172,56 @@ class PythonQueryDriver(QueryDriver):
         on_error: List[OnErrorClb],
     ) -> None:
         """Executes cql statement with given values asynchronously
-        and run callbacks on success/failure"""
-        prepared_statement = self._prepare_statement(cql_dto.statement)
+        and run callbacks on success (with rows of all pages) or failure (with QueryDriverException)"""
+
+        def on_rows(rows: List[Any]) -> None:
+            for callback in on_success:
+                callback(rows)
+
+        def on_failure(exc: Exception) -> None:
+            for err_callback in on_error:
+                err_callback(exc)
+
+        try:
+            prepared_statement = self.get_prepared_statement(cql_dto)
+        except DriverException as exc:
+            error = QueryDriverException(exc)
+            error.__cause__ = exc
+            on_failure(error)
+            return
         future = self.session.execute_async(query=prepared_statement, parameters=cql_dto.values)
-        for callback in on_success:
-            future.add_callback(callback)
-        for err_callback in on_error:
-            future.add_errback(err_callback)
+        add_rows_callbacks(future, on_rows, on_failure)
 
     def execute(self, cql_dto: CqlDto) -> Iterable:
-        """Executes statement synchronously."""
-        prepared_statement = self._prepare_statement(cql_dto.statement)
+        """Executes statement synchronously.
+
+        Returns rows lazily - pages after the first one are fetched while rows are consumed."""
         try:
+            prepared_statement = self.get_prepared_statement(cql_dto)
             res = self.session.execute(prepared_statement, parameters=cql_dto.values)
         except DriverException as exc:
             raise QueryDriverException from exc
-        return list(res)
+        return stream_rows(res)
+
+    def execute_many(self, cql_dtos: List[CqlDto]) -> List[Union[Iterable, Exception]]:
+        """Executes statements concurrently using driver's `execute_concurrent`."""
+        try:
+            statements = [
+                (self.get_prepared_statement(cql_dto), cql_dto.values) for cql_dto in cql_dtos
+            ]
+        except DriverException as exc:
+            return [QueryDriverException(exc) for _ in cql_dtos]
+        results: List[Union[Iterable, Exception]] = []
+        for success, result in execute_concurrent(
+            self.session, statements, concurrency=len(statements), raise_on_first_error=False
+        ):
+            if success:
+                results.append(stream_rows(result))
+            else:
+                error = QueryDriverException(result)
+                error.__cause__ = result
+                results.append(error)
+        return results
 
     def teardown(self) -> None:
         logger.debug("Closing connection with %s", self.cluster.metadata.all_hosts())
@@ -101,7 +241,7 @@ class NoOpQueryDriver(QueryDriver):
         on_error: List[OnErrorClb],
     ) -> None:
         for callback in on_success:
-            callback(None)
+            callback([])
 
     def execute(self, cql_dto: CqlDto) -> Iterable:
         return []
@@ -111,7 +251,68 @@ class QueryDriverFactory:
     """Creates QueryDriver objects according to cluster parameters."""
 
     @classmethod
-    def create_query_driver(cls, cluster_ips: Optional[List[str]] = None) -> QueryDriver:
+    def create_query_driver(
+        cls,
+        cluster_ips: Optional[List[str]] = None,
+        connection_options: Optional[ConnectionOptions] = None,
+        statement_registry: Optional[StatementRegistry] = None,
+    ) -> QueryDriver:
+        """When `statement_registry` is given, all its statements are prepared when driver starts."""
         if cluster_ips:
-            return PythonQueryDriver(cluster_ips)
+            return PythonQueryDriver(
+                cluster_ips,
+                connection_options=connection_options,
+                statement_registry=statement_registry,
+            )
         return NoOpQueryDriver()
+
+
+def stream_rows(result_set: ResultSet) -> Iterable:
+    """Returns rows of query result, fetching next page only when rows of the current one are consumed.
+
+    Only one page is kept in memory. Single page rows list is returned as is, without copying.
+    Raises QueryDriverException if fetching a page fails."""
+    if not result_set.has_more_pages:
+        return result_set.current_rows  # type: ignore
+    return _iterate_pages(result_set)
+
+
+def add_rows_callbacks(
+    response_future: ResponseFuture,
+    on_rows: Callable[[List[Any]], Any],
+    on_error: Callable[[Exception], Any],
+) -> None:
+    """Calls `on_rows` with rows of all result pages (fetched one after another) or `on_error` with
+    QueryDriverException. Driver's own callbacks get only the first page."""
+    rows: List[Any] = []
+
+    def on_page(page: Iterable) -> None:
+        rows.extend(page)
+        if response_future.has_more_pages:
+            response_future.start_fetching_next_page()
+            return
+        on_rows(rows)
+
+    def on_page_error(exc: Exception) -> None:
+        error = QueryDriverException(exc)
+        error.__cause__ = exc
+        on_error(error)
+
+    response_future.add_callbacks(on_page, on_page_error)
+
+
+def _iterate_pages(result_set: ResultSet) -> Iterator:
+    try:
+        while True:
+            yield from result_set.current_rows
+            if not result_set.has_more_pages:
+                return
+            result_set.fetch_next_page()
+    except DriverException as exc:
+        raise QueryDriverException from exc
+
+
+def _get_connection_class(name: str) -> Type:
+    """Imports driver connection class (event loop implementation) only when used - some require C extensions."""
+    module_name, class_name = CONNECTION_CLASSES[name]
+    return getattr(importlib.import_module(module_name), class_name)  # type: ignore
@@ -1,61 +1,124 @@
 import json
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field, fields
 from pathlib import Path
 from queue import Queue
 from typing import Optional
 
-from gemini_python import Operation
+from gemini_python import ConnectionOptions, Operation
+from gemini_python.histogram import LatencyHistograms
+from gemini_python.query_driver import PrepareStats
 
 
 version = (Path(__file__).parent / "version.txt").read_text()
+SUT = "sut"
+ORACLE = "oracle"
 
 
 @dataclass
-class ProcessResult:
+class ProcessResult:  # pylint: disable=too-many-instance-attributes
     """Data Transfer Object for process result"""
 
     write_ops: int = 0
     write_errors: int = 0
     read_ops: int = 0
     read_errors: int = 0
+    delete_ops: int = 0
+    delete_errors: int = 0
+    verified_deletes: int = 0
+    resurrections: int = 0
+    unique_values: int = 0  # generated for inserts, used for the first time
+    used_values: int = 0  # generated for inserts
+    unique_keys: int = 0  # primary keys of inserted rows, not repeated from values pool
+    used_keys: int = 0  # primary keys of inserted rows
+    prepared_statements: int = 0
+    prepare_time: float = 0.0
+    statement_cache_hits: int = 0
+    statement_cache_misses: int = 0
+    latencies: LatencyHistograms = field(default_factory=LatencyHistograms)
 
     def increment_ops(self, operation: Operation) -> None:
         if operation == Operation.WRITE:
             self.write_ops += 1
+        elif operation == Operation.DELETE:
+            self.delete_ops += 1
         else:
             self.read_ops += 1
 
     def increment_errors(self, operation: Operation) -> None:
         if operation == Operation.WRITE:
             self.write_errors += 1
+        elif operation == Operation.DELETE:
+            self.delete_errors += 1
         else:
             self.read_errors += 1
 
+    def record_latency(self, cluster: str, operation: Operation, latency: float) -> None:
+        """Records query latency (in seconds) of given cluster (SUT or ORACLE)."""
+        self.latencies.record(f"{cluster}_{operation.value}", latency)
+
+    def add_values_counts(self, unique_values: int, used_values: int) -> None:
+        self.unique_values += unique_values
+        self.used_values += used_values
+
+    def add_keys_counts(self, unique_keys: int, used_keys: int) -> None:
+        self.unique_keys += unique_keys
+        self.used_keys += used_keys
+
+    @property
+    def value_uniqueness(self) -> float:
+        """Fraction of inserted values (without partition keys) used for the first time."""
+        return round(self.unique_values / self.used_values, 4) if self.used_values else 1.0
+
+    @property
+    def key_uniqueness(self) -> float:
+        """Fraction of inserted rows with primary key not inserted before (keys repeat only with values pool)."""
+        return round(self.unique_keys / self.used_keys, 4) if self.used_keys else 1.0
+
+    def add_prepare_stats(self, prepare_stats: PrepareStats) -> None:
+        self.prepared_statements += prepare_stats.prepared
+        self.prepare_time += prepare_stats.prepare_time
+        self.statement_cache_hits += prepare_stats.cache_hits
+        self.statement_cache_misses += prepare_stats.cache_misses
+
     def __add__(self, other: "ProcessResult") -> "ProcessResult":
         if not isinstance(other, ProcessResult):
             return NotImplemented
         return ProcessResult(
-            self.write_ops + other.write_ops,
-            self.write_errors + other.write_errors,
-            self.read_ops + other.read_ops,
-            self.read_errors + other.read_errors,
+            *(getattr(self, field.name) + getattr(other, field.name) for field in fields(self))
         )
 
 
-def process_results(results_queue: Queue[ProcessResult], outfile: Optional[Path] = None) -> bool:
+def process_results(
+    results_queue: Queue[ProcessResult],
+    outfile: Optional[Path] = None,
+    connection_options: Optional[ConnectionOptions] = None,
+) -> bool:
     """Combine results from all gemini processes and write to file if specified.
 
+    Connection options are written along results, so runs with different settings can be compared.
     Returns True in case of errors found in any of the ProcessResult."""
     process_result = sum(
         [results_queue.get() for _ in range(results_queue.qsize())], ProcessResult()
     )
     result = {
         "gemini_version": version.strip(),
-        "result": process_result.__dict__,
+        "result": {
+            **process_result.__dict__,
+            "value_uniqueness": process_result.value_uniqueness,
+            "key_uniqueness": process_result.key_uniqueness,
+            "latencies": process_result.latencies.summary(),
+        },
     }
+    if connection_options is not None:
+        result["connection_options"] = asdict(connection_options)
     result_str = json.dumps(result, indent=2)
     if outfile is None:
         print(result_str)
     else:
         outfile.write_text(result_str)
-    return bool(process_result.write_errors or process_result.read_errors)
+    return bool(
+        process_result.write_errors
+        or process_result.read_errors
+        or process_result.delete_errors
+        or process_result.resurrections
+    )
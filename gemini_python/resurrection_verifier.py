@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from gemini_python import CqlDto
+from gemini_python.history_store import SqliteDeletedRows
+from gemini_python.query import SelectQueryGenerator
+from gemini_python.query_driver import QueryDriver
+from gemini_python.schema import Schema, Table
+from gemini_python.statement_registry import StatementRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class ResurrectionVerifier(threading.Thread):  # pylint: disable=too-many-instance-attributes
+    """Verifies that deleted rows don't come back (e.g. after tombstones are garbage collected).
+
+    Rows deleted at least `delay` seconds ago (it should cover table TTL and tombstone gc window) are read
+    from history database in batches of `batch_size` and queried on SUT and oracle with `execute_many`.
+    Row returned by either of them is reported as resurrection, unless the row was inserted again since deletion.
+    Writes reach history only after they complete and history is committed, so returned rows are checked
+    against history `recheck_delay` seconds later (it should cover history commit interval and writes in flight),
+    and all of them on `stop` (history is complete then).
+
+    Runs in background thread with own history connection and query drivers (torn down on `stop`),
+    so main loop is not stalled."""
+
+    def __init__(
+        self,
+        history_path: Path,
+        schema: Schema,
+        sut_query_driver: QueryDriver,
+        oracle_query_driver: QueryDriver,
+        delay: float,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        statement_registry: Optional[StatementRegistry] = None,
+        recheck_delay: float = 60.0,
+    ) -> None:
+        super().__init__(name="resurrection-verifier", daemon=True)
+        self._tables = [(table, SqliteDeletedRows(history_path, table)) for table in schema.tables]
+        self._sut_query_driver = sut_query_driver
+        self._oracle_query_driver = oracle_query_driver
+        self._delay = delay
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._statement_registry = statement_registry
+        self._recheck_delay = recheck_delay
+        # (time found, deleted rows, deleted row id, query, SUT rows, oracle rows) of deleted rows returned by query
+        self._returned_rows: List[Tuple[float, SqliteDeletedRows, int, CqlDto, list, list]] = []
+        self._stop_event = threading.Event()
+        self.verified_deletes = 0
+        self.resurrections = 0
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self._poll_interval):
+            self.verify()
+
+    def verify(self) -> None:
+        """Verifies all rows deleted at least `delay` seconds ago that were not verified yet."""
+        deleted_before = int(time.time() - self._delay)
+        for table, deleted_rows in self._tables:
+            while not self._stop_event.is_set():
+                verified = self._verify_batch(
+                    table, deleted_rows, deleted_rows.fetch(deleted_before, self._batch_size)
+                )
+                if not verified:
+                    break
+                deleted_rows.advance()
+                if verified < self._batch_size:
+                    break
+        self._recheck_returned_rows(time.monotonic() - self._recheck_delay)
+
+    def _verify_batch(
+        self, table: Table, deleted_rows: SqliteDeletedRows, rows: List[Tuple[int, tuple]]
+    ) -> int:
+        """Returns number of verified rows, 0 if batch couldn't be verified (it's retried later)."""
+        if not rows:
+            return 0
+        cql_dtos = self._select_statements(table, [key for _, key in rows])
+        sut_results = self._sut_query_driver.execute_many(cql_dtos)
+        oracle_results = self._oracle_query_driver.execute_many(cql_dtos)
+        results: List[tuple] = []
+        for (row_id, _), cql_dto, sut_result, oracle_result in zip(
+            rows, cql_dtos, sut_results, oracle_results
+        ):
+            if isinstance(sut_result, Exception) or isinstance(oracle_result, Exception):
+                logger.warning(
+                    "Can't verify deletion of %s, retrying later: SUT: %s, oracle: %s",
+                    cql_dto,
+                    sut_result,
+                    oracle_result,
+                )
+                return 0
+            results.append((row_id, cql_dto, list(sut_result), list(oracle_result)))
+        for row_id, cql_dto, sut_rows, oracle_rows in results:
+            if sut_rows or oracle_rows:
+                self._returned_rows.append(
+                    (time.monotonic(), deleted_rows, row_id, cql_dto, sut_rows, oracle_rows)
+                )
+        self.verified_deletes += len(rows)
+        return len(rows)
+
+    def _select_statements(self, table: Table, keys: List[tuple]) -> List[CqlDto]:
+        statement = SelectQueryGenerator.build_statement(table)
+        statement_id = (
+            self._statement_registry.id_of(statement) if self._statement_registry else None
+        )
+        return [CqlDto(statement, key, statement_id, table.full_name) for key in keys]
+
+    def _recheck_returned_rows(self, found_before: float) -> None:
+        """Reports rows returned before `found_before` as resurrected, unless they were inserted again."""
+        pending = []
+        for returned_row in self._returned_rows:
+            found_at, deleted_rows, row_id, cql_dto, sut_rows, oracle_rows = returned_row
+            if found_at > found_before:
+                pending.append(returned_row)
+            elif not deleted_rows.inserted_again(row_id, cql_dto.values):
+                self.resurrections += 1
+                logger.error(
+                    "Deleted row resurrected: %s. SUT: %s, oracle: %s",
+                    cql_dto,
+                    sut_rows,
+                    oracle_rows,
+                )
+        self._returned_rows = pending
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        self._recheck_returned_rows(time.monotonic())
+        for _, deleted_rows in self._tables:
+            deleted_rows.close()
+        self._sut_query_driver.teardown()
+        self._oracle_query_driver.teardown()
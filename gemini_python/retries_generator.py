@@ -1,7 +1,7 @@
 import threading
 import time
 from collections import deque
-from typing import Tuple, Deque, Optional
+from typing import List, Tuple, Deque, Optional
 
 from gemini_python import CqlDto, Operation
 
@@ -15,6 +15,7 @@ class RetriesGenerator:
         self._max_mutation_retries_backoff = max_mutation_retries_backoff
         self._lock = threading.Lock()
         self._timer: Optional[threading.Timer] = None
+        self._scheduled: Optional[Tuple[Operation, CqlDto, int]] = None  # waiting for timer
 
     def add_retry(self, operation: Operation, cql_dto: CqlDto, attempt: int) -> None:
         """Add cql_dto to retry list, so it's later returned after backoff time"""
@@ -30,8 +31,23 @@ class RetriesGenerator:
         """Return a tuple with the operation, cql_dto and attempt of the next retry"""
         return self._dto_out_list.popleft()
 
+    def get_pending(self) -> List[Tuple[Operation, CqlDto, int]]:
+        """Returns all retries not returned yet (ready ones first), e.g. to add them again after restart."""
+        with self._lock:
+            scheduled = [self._scheduled] if self._scheduled else []
+            return (
+                list(self._dto_out_list)
+                + scheduled
+                + [
+                    (operation, cql_dto, attempt)
+                    for operation, cql_dto, attempt, _ in self._dto_in_list
+                ]
+            )
+
     def _append_to_dto_out_list(self, operation: Operation, cql_dto: CqlDto, attempt: int) -> None:
-        self._dto_out_list.append((operation, cql_dto, attempt))
+        with self._lock:
+            self._dto_out_list.append((operation, cql_dto, attempt))
+            self._scheduled = None
         self._timer = None
         if self._dto_in_list:
             self._start_timer()
@@ -45,5 +61,6 @@ class RetriesGenerator:
             timer = threading.Timer(
                 timeout, self._append_to_dto_out_list, args=[operation, cql_dto, attempt]
             )
+            self._scheduled = (operation, cql_dto, attempt)
             timer.start()
             self._timer = timer
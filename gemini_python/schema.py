@@ -19,6 +19,10 @@ class Table:
     columns: List[Column] = field(default_factory=list)
     ttl: int = 0
 
+    @property
+    def full_name(self) -> str:
+        return f"{self.keyspace_name}.{self.name}"
+
     @property
     def all_columns(self) -> List[Column]:
         return self.partition_keys + self.clustering_keys + self.columns
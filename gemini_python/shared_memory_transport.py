@@ -0,0 +1,300 @@
+"""Shared memory transport between SubprocessQueryDriver and QueryDriverProcess.
+
+Messages are passed via ring buffers in shared memory (one for requests, one for responses)
+and encoded in compact binary format. Statements are registered once and then referenced by id."""
+import multiprocessing
+import os
+import pickle
+import struct
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+_POSITION = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+_HEADER_SIZE = 2 * _POSITION.size  # write position, read position
+_BATCH_HEADER_SIZE = 1 + _LENGTH.size  # message type, count
+_INT64_RANGE = range(-(2**63), 2**63)
+
+# value tags
+_INT = ord("i")
+_STR = ord("s")
+_NONE = ord("n")
+_PICKLED = ord("p")
+
+# message types
+REGISTER = ord("r")
+EXECUTE = ord("e")
+BATCH = ord("b")
+OK = ord("o")
+ERROR = ord("x")
+BATCH_RESULTS = ord("v")
+
+# result row kinds
+_DICT_ROWS = ord("d")
+_TUPLE_ROWS = ord("t")
+_PICKLED_ROWS = ord("p")
+
+
+class RingBuffer:
+    """Single producer, single consumer queue of byte messages in shared memory.
+
+    Write and read positions are kept in the shared memory header, each of them is modified by one side only.
+    Semaphore counts messages ready to read, so consumer doesn't need to poll."""
+
+    def __init__(self, size: int = 4 * 1024 * 1024) -> None:
+        self._capacity = size
+        self._shm = SharedMemory(create=True, size=_HEADER_SIZE + size)
+        self._messages = multiprocessing.Semaphore(0)
+        self._owner_pid = os.getpid()
+        _POSITION.pack_into(self._buf, 0, 0)
+        _POSITION.pack_into(self._buf, _POSITION.size, 0)
+
+    @property
+    def _buf(self) -> memoryview:
+        buf = self._shm.buf
+        assert buf is not None, "ring buffer is closed"
+        return buf
+
+    @property
+    def max_message_size(self) -> int:
+        return self._capacity - _LENGTH.size
+
+    def put(self, message: bytes, timeout: Optional[float] = None) -> bool:
+        """Appends message to the buffer. Waits for consumer if there's not enough space.
+
+        Returns False if there was no space for message before timeout."""
+        if len(message) > self.max_message_size:
+            raise ValueError(
+                f"message of size {len(message)} exceeds ring buffer limit of {self.max_message_size}"
+            )
+        buf = self._buf
+        (write_pos,) = _POSITION.unpack_from(buf, 0)
+        end_pos = write_pos + _LENGTH.size + len(message)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while end_pos - _POSITION.unpack_from(buf, _POSITION.size)[0] > self._capacity:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.0001)
+        self._write(write_pos, _LENGTH.pack(len(message)))
+        self._write(write_pos + _LENGTH.size, message)
+        _POSITION.pack_into(buf, 0, end_pos)
+        self._messages.release()
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """Pops the oldest message. Returns None if no message arrived before timeout."""
+        if not self._messages.acquire(timeout=timeout):
+            return None
+        (read_pos,) = _POSITION.unpack_from(self._buf, _POSITION.size)
+        (length,) = _LENGTH.unpack(self._read(read_pos, _LENGTH.size))
+        message = self._read(read_pos + _LENGTH.size, length)
+        _POSITION.pack_into(self._buf, _POSITION.size, read_pos + _LENGTH.size + length)
+        return message
+
+    def close(self) -> None:
+        """Closes shared memory. Creating process also frees it."""
+        if self._shm.buf is None:
+            return
+        self._shm.close()
+        if os.getpid() == self._owner_pid:
+            self._shm.unlink()
+
+    def _write(self, position: int, data: bytes) -> None:
+        offset = _HEADER_SIZE + position % self._capacity
+        first_part = min(len(data), _HEADER_SIZE + self._capacity - offset)
+        self._buf[offset : offset + first_part] = data[:first_part]
+        if first_part < len(data):
+            self._buf[_HEADER_SIZE : _HEADER_SIZE + len(data) - first_part] = data[first_part:]
+
+    def _read(self, position: int, length: int) -> bytes:
+        offset = _HEADER_SIZE + position % self._capacity
+        first_part = min(length, _HEADER_SIZE + self._capacity - offset)
+        data = bytes(self._buf[offset : offset + first_part])
+        if first_part < length:
+            data += bytes(self._buf[_HEADER_SIZE : _HEADER_SIZE + length - first_part])
+        return data
+
+
+def encode_values(values: Sequence) -> bytes:
+    """Encodes values as: count, type tag per value, values (int64 or length prefixed bytes)."""
+    fmt = ["<I", f"{len(values)}s"]
+    tags = bytearray()
+    args: List[Any] = [len(values), b""]
+    for value in values:
+        if value is None:
+            tags.append(_NONE)
+            continue
+        if isinstance(value, int) and not isinstance(value, bool) and value in _INT64_RANGE:
+            tags.append(_INT)
+            fmt.append("q")
+            args.append(value)
+            continue
+        if isinstance(value, str):
+            tags.append(_STR)
+            data = value.encode("utf-8")
+        else:
+            tags.append(_PICKLED)
+            data = pickle.dumps(value)
+        fmt.append(f"I{len(data)}s")
+        args.extend((len(data), data))
+    args[1] = bytes(tags)
+    return struct.pack("".join(fmt), *args)
+
+
+def decode_values(data: bytes, offset: int = 0) -> Tuple[tuple, int]:
+    """Decodes values encoded with `encode_values`. Returns values and offset after them."""
+    (count,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    tags = data[offset : offset + count]
+    offset += count
+    values: List[Any] = []
+    for tag in tags:
+        if tag == _NONE:
+            values.append(None)
+        elif tag == _INT:
+            values.append(struct.unpack_from("<q", data, offset)[0])
+            offset += 8
+        else:
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            raw = data[offset : offset + length]
+            offset += length
+            values.append(raw.decode("utf-8") if tag == _STR else pickle.loads(raw))
+    return tuple(values), offset
+
+
+def encode_register(statement_id: int, statement: str) -> bytes:
+    return bytes((REGISTER,)) + _LENGTH.pack(statement_id) + statement.encode("utf-8")
+
+
+def encode_execute(statement_id: int, values: Sequence) -> bytes:
+    return bytes((EXECUTE,)) + _LENGTH.pack(statement_id) + encode_values(values)
+
+
+def encode_batch(statements: Sequence[Tuple[int, Sequence]]) -> bytes:
+    """Encodes many (statement id, values) pairs in one message."""
+    return _join_batch(BATCH, [_encode_batch_statement(*statement) for statement in statements])
+
+
+def encode_batches(
+    statements: Sequence[Tuple[int, Sequence]], max_message_size: int
+) -> List[bytes]:
+    """Encodes many (statement id, values) pairs in as few BATCH messages of `max_message_size` as needed.
+
+    Single statement too big for a message is left in its own message."""
+    parts = [_encode_batch_statement(*statement) for statement in statements]
+    return [_join_batch(BATCH, group) for group in _group_parts(parts, max_message_size)]
+
+
+def _encode_batch_statement(statement_id: int, values: Sequence) -> bytes:
+    return _LENGTH.pack(statement_id) + encode_values(values)
+
+
+def _join_batch(message_type: int, parts: Sequence[bytes]) -> bytes:
+    return b"".join([bytes((message_type,)), _LENGTH.pack(len(parts))] + list(parts))
+
+
+def _group_parts(parts: Sequence[bytes], max_message_size: int) -> List[List[bytes]]:
+    """Groups consecutive message parts, so each group joined with batch header fits in `max_message_size`."""
+    groups: List[List[bytes]] = []
+    size = max_message_size
+    for part in parts:
+        if not groups or size + len(part) > max_message_size:
+            groups.append([])
+            size = _BATCH_HEADER_SIZE
+        groups[-1].append(part)
+        size += len(part)
+    return groups
+
+
+def decode_request(message: bytes) -> Tuple[int, int, Union[str, tuple, List[Tuple[int, tuple]]]]:
+    """Returns message type, statement id and statement (REGISTER) or values (EXECUTE).
+
+    For BATCH returns statements count and list of (statement id, values) pairs."""
+    (statement_id,) = _LENGTH.unpack_from(message, 1)
+    if message[0] == REGISTER:
+        return REGISTER, statement_id, message[1 + _LENGTH.size :].decode("utf-8")
+    if message[0] == BATCH:
+        offset = 1 + _LENGTH.size
+        statements = []
+        for _ in range(statement_id):
+            (batch_statement_id,) = _LENGTH.unpack_from(message, offset)
+            values, offset = decode_values(message, offset + _LENGTH.size)
+            statements.append((batch_statement_id, values))
+        return BATCH, statement_id, statements
+    return message[0], statement_id, decode_values(message, 1 + _LENGTH.size)[0]
+
+
+def encode_result(result: Union[Iterable, Exception]) -> bytes:
+    """Encodes query rows (dicts or tuples) or exception raised by query driver."""
+    if isinstance(result, Exception):
+        return bytes((ERROR,)) + pickle.dumps(result)
+    rows = list(result)
+    if not rows or isinstance(rows[0], dict):
+        names = tuple(rows[0].keys()) if rows else ()
+        return b"".join(
+            [bytes((OK, _DICT_ROWS)), _LENGTH.pack(len(rows)), encode_values(names)]
+            + [encode_values(tuple(row.values())) for row in rows]
+        )
+    if isinstance(rows[0], tuple):
+        return b"".join(
+            [bytes((OK, _TUPLE_ROWS)), _LENGTH.pack(len(rows))]
+            + [encode_values(row) for row in rows]
+        )
+    return bytes((OK, _PICKLED_ROWS)) + pickle.dumps(rows)
+
+
+def encode_batch_results(results: Sequence[Union[Iterable, Exception]]) -> bytes:
+    """Encodes results of BATCH request in one message."""
+    return _join_batch(
+        BATCH_RESULTS, [_encode_batch_result(encode_result(result)) for result in results]
+    )
+
+
+def join_batch_results(encoded_results: Sequence[bytes], max_message_size: int) -> List[bytes]:
+    """Joins results of BATCH request (encoded with `encode_result`) in as few messages of `max_message_size`
+    as needed. Results are decoded in the same order from consecutive messages."""
+    parts = [_encode_batch_result(result) for result in encoded_results]
+    return [_join_batch(BATCH_RESULTS, group) for group in _group_parts(parts, max_message_size)]
+
+
+def max_batch_result_size(max_message_size: int) -> int:
+    """Returns size of the biggest encoded result which fits alone in BATCH_RESULTS message."""
+    return max_message_size - _BATCH_HEADER_SIZE - _LENGTH.size
+
+
+def _encode_batch_result(encoded_result: bytes) -> bytes:
+    return _LENGTH.pack(len(encoded_result)) + encoded_result
+
+
+def decode_results(message: bytes) -> List[Union[list, Exception]]:
+    """Decodes response message into list of results (one for EXECUTE, many for BATCH)."""
+    if message[0] != BATCH_RESULTS:
+        return [decode_result(message)]
+    (count,) = _LENGTH.unpack_from(message, 1)
+    offset = 1 + _LENGTH.size
+    results = []
+    for _ in range(count):
+        (length,) = _LENGTH.unpack_from(message, offset)
+        offset += _LENGTH.size
+        results.append(decode_result(message[offset : offset + length]))
+        offset += length
+    return results
+
+
+def decode_result(message: bytes) -> Union[list, Exception]:
+    if message[0] == ERROR:
+        return pickle.loads(message[1:])  # type: ignore
+    if message[1] == _PICKLED_ROWS:
+        return pickle.loads(message[2:])  # type: ignore
+    (count,) = _LENGTH.unpack_from(message, 2)
+    offset = 2 + _LENGTH.size
+    names: tuple = ()
+    if message[1] == _DICT_ROWS:
+        names, offset = decode_values(message, offset)
+    rows: list = []
+    for _ in range(count):
+        values, offset = decode_values(message, offset)
+        rows.append(dict(zip(names, values)) if message[1] == _DICT_ROWS else values)
+    return rows
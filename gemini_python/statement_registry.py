@@ -0,0 +1,34 @@
+from typing import Dict, Iterable, List, Optional
+
+
+class StatementRegistry:
+    """Assigns integer ids to all CQL statements used during the test run.
+
+    Allows query drivers to prepare all statements upfront and look them up by id in hot path."""
+
+    def __init__(self, statements: Iterable[str] = ()) -> None:
+        self._statements: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for statement in statements:
+            self.register(statement)
+
+    def register(self, statement: str) -> int:
+        """Returns id of the statement, registering it if needed."""
+        statement_id = self._ids.get(statement)
+        if statement_id is None:
+            statement_id = self._ids[statement] = len(self._statements)
+            self._statements.append(statement)
+        return statement_id
+
+    def id_of(self, statement: str) -> Optional[int]:
+        return self._ids.get(statement)
+
+    @property
+    def statements(self) -> List[str]:
+        return list(self._statements)
+
+    def __getitem__(self, statement_id: int) -> str:
+        return self._statements[statement_id]
+
+    def __len__(self) -> int:
+        return len(self._statements)
@@ -1,72 +1,241 @@
 import multiprocessing
-from multiprocessing.connection import Connection
-from queue import Empty, Queue
-from typing import List, Iterable, Tuple, Optional
+from typing import Dict, List, Iterable, Optional, Tuple, Union
 
-from gemini_python import CqlDto
+from gemini_python import ConnectionOptions, CqlDto
 from gemini_python.query_driver import QueryDriver, QueryDriverFactory, QueryDriverException
+from gemini_python.shared_memory_transport import (
+    BATCH,
+    REGISTER,
+    RingBuffer,
+    decode_request,
+    decode_results,
+    encode_batches,
+    encode_execute,
+    encode_register,
+    encode_result,
+    join_batch_results,
+    max_batch_result_size,
+)
+from gemini_python.statement_registry import StatementRegistry
+
+# how often waiting for results checks whether query driver process is alive, in seconds
+LIVENESS_CHECK_INTERVAL = 1.0
+
+
+def _fetch_rows(result: Union[Iterable, Exception]) -> Union[list, Exception]:
+    """Fetches all rows of result. Result is replaced with QueryDriverException when fetching a page fails."""
+    if isinstance(result, Exception):
+        return result
+    try:
+        return list(result)
+    except QueryDriverException as exc:
+        return exc
 
 
 class QueryDriverProcess(multiprocessing.Process):
     """Running queries in separate process.
 
     To avoid issues with cassandra driver that can't handle properly two different cluster connections in one process.
+    Requests and results are passed via shared memory ring buffers (see `shared_memory_transport`).
     """
 
     def __init__(
         self,
-        inbound_queue: Queue[Tuple[CqlDto, Connection]],
+        requests: RingBuffer,
+        responses: RingBuffer,
         hosts: Optional[List[str]] = None,
+        connection_options: Optional[ConnectionOptions] = None,
+        statement_registry: Optional[StatementRegistry] = None,
     ) -> None:
         super().__init__()
         self._cluster_ips = hosts
-        self._inbound_queue = inbound_queue
+        self._connection_options = connection_options
+        self._statement_registry = statement_registry
+        self._requests = requests
+        self._responses = responses
         self._termination_event = multiprocessing.Event()
 
     def run(self) -> None:
-        query_driver = QueryDriverFactory.create_query_driver(self._cluster_ips)
+        query_driver = QueryDriverFactory.create_query_driver(
+            self._cluster_ips, self._connection_options, self._statement_registry
+        )
         # query drivers must be created in run() method and not in __init__, otherwise cassandra driver hangs
+        # statement with its id in StatementRegistry, by transport statement id
+        statements: Dict[int, Tuple[str, Optional[int]]] = {}
         while not self._termination_event.is_set():
+            message = self._requests.get(timeout=1)
+            if message is None:
+                continue
+            message_type, statement_id, payload = decode_request(message)
+            if message_type == REGISTER:
+                registry_id = (
+                    self._statement_registry.id_of(payload)  # type: ignore
+                    if self._statement_registry
+                    else None
+                )
+                statements[statement_id] = (payload, registry_id)  # type: ignore
+                continue
+            if message_type == BATCH:
+                batch: List[Tuple[int, tuple]] = payload  # type: ignore
+                results = query_driver.execute_many(
+                    [
+                        CqlDto(statements[idx][0], values, statements[idx][1])
+                        for idx, values in batch
+                    ]
+                )
+                self._put_batch_results([_fetch_rows(result) for result in results])
+                continue
             try:
-                cql_dto, outbound_pipe = self._inbound_queue.get(timeout=1)
-                try:
-                    result = query_driver.execute(cql_dto)
-                except QueryDriverException as exc:
-                    outbound_pipe.send(exc)
-                    continue
-                outbound_pipe.send(list(result))
-            except Empty:
-                pass
+                statement, registry_id = statements[statement_id]
+                result: Union[list, QueryDriverException] = list(
+                    query_driver.execute(CqlDto(statement, payload, registry_id))  # type: ignore
+                )
+            except QueryDriverException as exc:
+                result = exc
+            self._put_result(result)
         query_driver.teardown()
+        self._requests.close()
+        self._responses.close()
+
+    def _put_result(self, result: Union[list, QueryDriverException]) -> None:
+        self._responses.put(_encode_result(result, self._responses.max_message_size))
+
+    def _put_batch_results(self, results: List[Union[list, Exception]]) -> None:
+        """Sends results in as many messages as needed to fit in ring buffer."""
+        max_result_size = max_batch_result_size(self._responses.max_message_size)
+        for message in join_batch_results(
+            [_encode_result(result, max_result_size) for result in results],
+            self._responses.max_message_size,
+        ):
+            self._responses.put(message)
 
     def stop(self) -> None:
         self._termination_event.set()
         self.join()
 
 
+def _encode_result(result: Union[list, Exception], max_size: int) -> bytes:
+    """Encodes result, replacing result bigger than `max_size` with QueryDriverException."""
+    encoded = encode_result(result)
+    if len(encoded) > max_size:
+        encoded = encode_result(
+            QueryDriverException(
+                f"result of size {len(encoded)} exceeds ring buffer limit of {max_size}"
+            )
+        )
+    return encoded
+
+
 class SubprocessQueryDriver(QueryDriver):
     """Runs queries in separate subprocess.
 
-    Creates subprocess with query driver and communicates with it via queues and pipes.
-    queues/pipes generate overhead so it's first place for optimization."""
+    Creates subprocess with query driver and communicates with it via shared memory ring buffers.
+    Each statement text is sent to subprocess only once, later requests reference it by id.
 
-    def __init__(self, hosts: Optional[List[str]] = None) -> None:
-        self._parent_pipe, self._child_pipe = multiprocessing.Pipe()
-        self._query_driver_queue: multiprocessing.Queue[
-            Tuple[CqlDto, Connection]
-        ] = multiprocessing.Queue()
-        self._query_driver_process = QueryDriverProcess(self._query_driver_queue, hosts)
+    Statements can be submitted without waiting for result (`submit`) and collected later (`get_result`),
+    so caller can do other work (e.g. query another cluster) while subprocess is querying."""
+
+    def __init__(
+        self,
+        hosts: Optional[List[str]] = None,
+        connection_options: Optional[ConnectionOptions] = None,
+        statement_registry: Optional[StatementRegistry] = None,
+        ring_buffer_size: int = 4 * 1024 * 1024,
+    ) -> None:
+        self._requests = RingBuffer(ring_buffer_size)
+        self._responses = RingBuffer(ring_buffer_size)
+        self._query_driver_process = QueryDriverProcess(
+            self._requests, self._responses, hosts, connection_options, statement_registry
+        )
         self._query_driver_process.start()
+        self._statement_ids: Dict[str, int] = {}
+        self._submitted_count = 0
+        self._received_count = 0
+        # results received from subprocess but not yet collected with get_result
+        self._results: Dict[int, Union[list, Exception]] = {}
+
+    def submit(self, cql_dto: CqlDto) -> int:
+        """Sends statement to query driver subprocess without waiting for result.
+
+        Returns request id to be used with `get_result`."""
+        self._put_request(encode_execute(self._register(cql_dto.statement), cql_dto.values))
+        self._submitted_count += 1
+        return self._submitted_count
+
+    def submit_many(self, cql_dtos: List[CqlDto]) -> List[int]:
+        """Sends many statements to query driver subprocess in one message (or more, when they don't fit in
+        ring buffer). Statements of a message are executed concurrently.
+
+        Returns request ids to be used with `get_result`/`get_results`."""
+        for message in encode_batches(
+            [(self._register(cql_dto.statement), cql_dto.values) for cql_dto in cql_dtos],
+            self._requests.max_message_size,
+        ):
+            self._put_request(message)
+        first_request_id = self._submitted_count + 1
+        self._submitted_count += len(cql_dtos)
+        return list(range(first_request_id, self._submitted_count + 1))
+
+    def _register(self, statement: str) -> int:
+        """Returns statement id, sending statement to subprocess when it's used for the first time."""
+        statement_id = self._statement_ids.get(statement)
+        if statement_id is None:
+            statement_id = self._statement_ids[statement] = len(self._statement_ids)
+            self._put_request(encode_register(statement_id, statement))
+        return statement_id
+
+    def _put_request(self, message: bytes) -> None:
+        """Sends request, receiving responses while waiting for space in requests buffer.
+
+        Subprocess may be waiting for space in responses buffer, so it doesn't read requests until responses are read.
+        """
+        while not self._requests.put(message, timeout=0.001):
+            self._receive_results(timeout=0)
+
+    def get_result(self, request_id: int) -> Iterable:
+        """Waits for result of submitted statement. Raises QueryDriverException if query failed."""
+        result = self._wait_for_result(request_id)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def get_results(self, request_ids: List[int]) -> List[Union[Iterable, Exception]]:
+        """Waits for results of submitted statements. Failed queries are returned as QueryDriverException."""
+        return [self._wait_for_result(request_id) for request_id in request_ids]
+
+    def _wait_for_result(self, request_id: int) -> Union[list, Exception]:
+        while request_id not in self._results:
+            self._receive_results(timeout=LIVENESS_CHECK_INTERVAL)
+        return self._results.pop(request_id)
+
+    def _receive_results(self, timeout: float) -> None:
+        """Stores results of one response message, if it arrives before timeout.
+
+        Raises QueryDriverException when query driver process is gone, so its results never come."""
+        message = self._responses.get(timeout=timeout)
+        if message is None:
+            if not self._query_driver_process.is_alive():
+                raise QueryDriverException(
+                    f"query driver process exited with code {self._query_driver_process.exitcode}"
+                )
+            return
+        # subprocess executes requests in order, so results come in order of submission
+        for result in decode_results(message):
+            self._received_count += 1
+            self._results[self._received_count] = result
 
     def execute(self, cql_dto: CqlDto) -> Iterable:
         """Executes statement synchronously in query driver."""
-        self._query_driver_queue.put((cql_dto, self._child_pipe))
-        return self._parent_pipe.recv()  # type: ignore
+        return self.get_result(self.submit(cql_dto))
+
+    def execute_many(self, cql_dtos: List[CqlDto]) -> List[Union[Iterable, Exception]]:
+        """Executes statements concurrently in query driver, sending them in one message."""
+        return self.get_results(self.submit_many(cql_dtos))
 
     def teardown(self) -> None:
         self._query_driver_process.stop()
-        self._child_pipe.close()
-        self._parent_pipe.close()
+        self._requests.close()
+        self._responses.close()
 
     def __del__(self) -> None:
         self.teardown()
@@ -5,6 +5,12 @@ from gemini_python import ValidationError
 
 
 def validate_result(oracle_result: Iterable, sut_result: Iterable) -> None:
+    """Compares rows one by one. Tuple rows are compared positionally, dict rows key by key.
+
+    Results may be lazy page streams - both are consumed in lockstep and remaining pages are not fetched
+    after first mismatch."""
+    if isinstance(oracle_result, list) and oracle_result == sut_result:
+        return
     for (
         oracle_value,
         sut_value,
@@ -0,0 +1,61 @@
+"""Compares gemini throughput (ops/sec) with sequential and concurrent SUT/oracle dispatch.
+
+Example:
+    python scripts/benchmark_dispatch.py -t 192.168.100.2 -o 192.168.100.3 --duration 30s
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+from gemini_python.console import time_period_str_to_seconds
+
+
+def run_gemini(gemini_args: List[str], outfile: Path) -> float:
+    """Runs gemini with given args and returns achieved ops/sec."""
+    subprocess.run(
+        [sys.executable, "-m", "gemini_python.console", *gemini_args, "--outfile", str(outfile)],
+        check=False,
+    )
+    result = json.loads(outfile.read_text())["result"]
+    return float(result["write_ops"] + result["read_ops"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--test-cluster", "-t", required=True)
+    parser.add_argument("--oracle-cluster", "-o", required=True)
+    parser.add_argument("--duration", default="30s")
+    parser.add_argument("--mode", default="mixed")
+    parser.add_argument("--concurrency", "-c", default="4")
+    args, extra_args = parser.parse_known_args()
+    duration = time_period_str_to_seconds(args.duration)
+    gemini_args = [
+        "-t",
+        args.test_cluster,
+        "-o",
+        args.oracle_cluster,
+        "--duration",
+        args.duration,
+        "--mode",
+        args.mode,
+        "--concurrency",
+        args.concurrency,
+        *extra_args,
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sequential_ops = run_gemini(gemini_args, Path(tmp_dir) / "sequential.json")
+        concurrent_ops = run_gemini(
+            gemini_args + ["--concurrent-dispatch"], Path(tmp_dir) / "concurrent.json"
+        )
+    print(f"sequential dispatch: {sequential_ops / duration:.1f} ops/sec")
+    print(f"concurrent dispatch: {concurrent_ops / duration:.1f} ops/sec")
+    if sequential_ops:
+        print(f"speedup: {concurrent_ops / sequential_ops:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
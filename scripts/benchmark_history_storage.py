@@ -0,0 +1,77 @@
+"""Compares history store throughput (inserted rows/sec) with each history storage location.
+
+'tmpfs' is measured only when mounted tmpfs directory is given (`--tmpfs-dir`), 'shm' when /dev/shm exists.
+
+Example:
+    python scripts/benchmark_history_storage.py --rows 200000 --tmpfs-dir /mnt/gemini
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from gemini_python import CqlDto, GeminiConfiguration
+from gemini_python.column_types import generate_rows
+from gemini_python.history_store import SHM_HISTORY_DIR, HistoryStoreFactory
+from gemini_python.schema import Schema, generate_schema
+
+
+def measure(
+    schema: Schema, backend: str, rows: int, history_dir: Path, in_memory: bool = False
+) -> float:
+    """Inserts `rows` rows (and commits them) to new history store, returns rows/sec."""
+    table = schema.tables[0]
+    values = generate_rows(table.partition_keys + table.clustering_keys, rows)
+    history_store = HistoryStoreFactory.create_history_store(
+        backend,
+        0,
+        schema,
+        drop_schema=True,
+        history_file_dir=history_dir,
+        in_memory=in_memory,
+    )
+    start = time.perf_counter()
+    for row in values:
+        history_store.insert(CqlDto("", row, table_name=table.full_name))
+    history_store.commit()
+    return rows / (time.perf_counter() - start)
+
+
+def storage_dirs(work_dir: Path, tmpfs_dir: Optional[Path]) -> Dict[str, Optional[Path]]:
+    """Returns directory of each available storage (None for in-memory sqlite)."""
+    dirs: Dict[str, Optional[Path]] = {"memory": None, "dir": work_dir / "dir"}
+    if SHM_HISTORY_DIR.parent.is_dir():
+        dirs["shm"] = SHM_HISTORY_DIR / "benchmark"
+    if tmpfs_dir is not None:
+        dirs["tmpfs"] = tmpfs_dir / "benchmark"
+    return dirs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--backend", choices=("sqlite", "mmap"), default="sqlite")
+    parser.add_argument("--tmpfs-dir", type=Path, help="Directory with mounted tmpfs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    schema = generate_schema(GeminiConfiguration(seed=args.seed))
+    with tempfile.TemporaryDirectory(dir=Path.cwd()) as work_dir:
+        for storage, history_dir in storage_dirs(Path(work_dir), args.tmpfs_dir).items():
+            if history_dir is None and args.backend != "sqlite":
+                continue
+            target_dir = history_dir or Path(work_dir) / "memory"
+            target_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                rows_per_sec = measure(
+                    schema, args.backend, args.rows, target_dir, in_memory=history_dir is None
+                )
+            finally:
+                if storage in ("shm", "tmpfs"):  # outside of work_dir
+                    shutil.rmtree(target_dir, ignore_errors=True)
+            print(f"{storage}: {rows_per_sec:.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
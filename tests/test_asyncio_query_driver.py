@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Iterable, List, Union
+
+from gemini_python import CqlDto
+from gemini_python.asyncio_query_driver import (
+    AsyncNoOpQueryDriver,
+    AsyncQueryDriverFactory,
+    ThreadedQueryDriver,
+)
+from gemini_python.query_driver import NoOpQueryDriver, QueryDriverException
+from tests.utils.recording_query_driver import RecordingQueryDriver
+
+
+def test_factory_creates_no_op_driver_for_no_op_query_driver():
+    query_driver = AsyncQueryDriverFactory.create_query_driver(NoOpQueryDriver())
+    assert isinstance(query_driver, AsyncNoOpQueryDriver)
+    assert asyncio.run(query_driver.execute(CqlDto("select * from test"))) == []
+
+
+def test_threaded_query_driver_runs_statements_with_wrapped_driver():
+    recording_query_driver = RecordingQueryDriver()
+    query_driver = AsyncQueryDriverFactory.create_query_driver(recording_query_driver)
+    assert isinstance(query_driver, ThreadedQueryDriver)
+    cql_dtos = [CqlDto("insert", (idx,)) for idx in range(3)]
+
+    async def run() -> tuple:
+        return await query_driver.execute(cql_dtos[0]), await query_driver.execute_many(
+            cql_dtos[1:]
+        )
+
+    single_result, many_results = asyncio.run(run())
+    query_driver.teardown()
+    assert single_result == []
+    assert many_results == [[], []]
+    assert recording_query_driver.executed_queries == cql_dtos
+
+
+def test_async_no_op_driver_runs_many_statements_concurrently():
+    query_driver = AsyncNoOpQueryDriver()
+    results = asyncio.run(
+        query_driver.execute_many([CqlDto("select * from test") for _ in range(10)])
+    )
+    assert results == [[]] * 10
+
+
+class SlowBatchQueryDriver(RecordingQueryDriver):
+    """Takes 50ms per `execute_many` call regardless of number of statements, fails statements with no values."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.batch_sizes: List[int] = []
+
+    def execute_many(self, cql_dtos: List[CqlDto]) -> List[Union[Iterable, Exception]]:
+        self.batch_sizes.append(len(cql_dtos))
+        time.sleep(0.05)
+        return [
+            [cql_dto.values] if cql_dto.values else QueryDriverException() for cql_dto in cql_dtos
+        ]
+
+
+def test_threaded_query_driver_sends_awaited_queries_in_concurrent_batches():
+    slow_query_driver = SlowBatchQueryDriver()
+    query_driver = ThreadedQueryDriver(slow_query_driver, max_batch_size=40)
+    cql_dtos = [CqlDto("select", (idx,)) for idx in range(1, 101)] + [CqlDto("select")]
+
+    async def run() -> list:
+        return await query_driver.execute_many(cql_dtos)
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    query_driver.teardown()
+    assert time.perf_counter() - start < 1  # not 101 * 50ms
+    assert slow_query_driver.batch_sizes == [40, 40, 21]
+    assert results[:100] == [[(idx,)] for idx in range(1, 101)]
+    assert isinstance(results[100], QueryDriverException)
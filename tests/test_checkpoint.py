@@ -0,0 +1,56 @@
+import pytest
+
+from gemini_python import CqlDto, Operation, QueryMode
+from gemini_python.checkpoint import Checkpoint, schema_fingerprint
+from gemini_python.results import ProcessResult
+from gemini_python.schema import generate_schema
+
+
+def test_checkpoint_can_be_saved_and_loaded(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    path = Checkpoint.file_path(tmp_path, 0)
+    Checkpoint(
+        schema_fingerprint=schema_fingerprint(schema),
+        mode=QueryMode.WRITE,
+        partitions=[[("1",), ("2",)]],
+        generator_state=(1, [(1, [], True, None, 0, 0)]),
+        column_states=[[column.get_state() for column in schema.tables[0].all_columns]],
+        random_state=None,
+        retries=[(Operation.WRITE, CqlDto("insert", ("1",)), 2)],
+        process_result=ProcessResult(write_ops=10),
+    ).save(path)
+    checkpoint = Checkpoint.load(path, schema, QueryMode.WRITE)
+    assert checkpoint.partitions == [[("1",), ("2",)]]
+    assert checkpoint.retries == [(Operation.WRITE, CqlDto("insert", ("1",)), 2)]
+    assert checkpoint.process_result.write_ops == 10
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_checkpoint_of_different_schema_is_rejected(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    path = Checkpoint.file_path(tmp_path, 0)
+    Checkpoint(
+        schema_fingerprint(schema), QueryMode.WRITE, [], None, [], None, [], ProcessResult()
+    ).save(path)
+    simple_schema_config.max_columns = 3
+    simple_schema_config.min_columns = 3
+    with pytest.raises(ValueError, match="different schema"):
+        Checkpoint.load(path, generate_schema(simple_schema_config), QueryMode.WRITE)
+
+
+def test_checkpoint_of_different_mode_is_rejected(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    path = Checkpoint.file_path(tmp_path, 0)
+    Checkpoint(
+        schema_fingerprint(schema), QueryMode.MIXED, [], None, [], None, [], ProcessResult()
+    ).save(path)
+    with pytest.raises(ValueError, match="mixed mode"):
+        Checkpoint.load(path, schema, QueryMode.WRITE)
+
+
+def test_column_values_continue_after_state_is_restored(simple_schema_config):
+    column = generate_schema(simple_schema_config).tables[0].partition_keys[0]
+    state = column.get_state()
+    values = [column.generate_random_value() for _ in range(3)]
+    column.set_state(state)
+    assert [column.generate_random_value() for _ in range(3)] == values
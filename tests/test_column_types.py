@@ -1,4 +1,13 @@
-from gemini_python.column_types import AsciiColumn, BigIntColumn, ALL_COLUMN_TYPES, Column
+import pytest
+
+from gemini_python.column_types import (
+    AsciiColumn,
+    BigIntColumn,
+    ALL_COLUMN_TYPES,
+    Column,
+    RowPool,
+    generate_rows,
+)
 
 
 def test_ascii_column():
@@ -14,6 +23,61 @@ def test_bigint_column():
     assert isinstance(col.generate_random_value(), int)
 
 
+@pytest.mark.parametrize(
+    "column_factory",
+    [
+        lambda: AsciiColumn("col", size=50),
+        lambda: AsciiColumn("col", size=7),
+        lambda: BigIntColumn("col"),
+    ],
+)
+def test_batch_values_dont_depend_on_batch_size(column_factory):
+    batch_column, single_column = column_factory(), column_factory()
+    values = batch_column.generate_batch(5) + batch_column.generate_batch(3)
+    assert values == [single_column.generate_random_value() for _ in range(8)]
+    assert len(set(values)) == 8
+
+
+def test_bigint_values_are_within_column_range():
+    col = BigIntColumn("col_bigint", size=10)
+    values = col.generate_batch(1000)
+    assert min(values) == -11 and max(values) == 10
+
+
+def test_rows_are_generated_column_by_column():
+    columns = [BigIntColumn("pk"), AsciiColumn("ck", size=10)]
+    rows = generate_rows(columns, 3)
+    assert len(rows) == 3
+    assert all(isinstance(pk, int) and len(ck) == 10 for pk, ck in rows)
+    assert generate_rows([], 2) == [(), ()]
+
+
+def test_row_pool_rotates_pools_and_regenerates_them_after_reuse():
+    pool = RowPool([BigIntColumn("ck"), BigIntColumn("col")], size=4, reuse=2)
+    assert pool.fresh
+    first = pool.next_rows()
+    assert not pool.fresh
+    second = pool.next_rows()
+    # k-th column pool is rotated by k values, so rows combine different values
+    assert [ck for ck, _ in second] == [ck for ck, _ in first[1:] + first[:1]]
+    assert [col for _, col in second] == [col for _, col in first[2:] + first[:2]]
+    assert pool.fresh
+    third = pool.next_rows()
+    assert {ck for ck, _ in third}.isdisjoint({ck for ck, _ in first})
+
+
+@pytest.mark.parametrize(
+    "column_factory", [lambda: AsciiColumn("col"), lambda: BigIntColumn("col", size=10**9)]
+)
+def test_indexed_values_depend_only_on_seed_and_index(column_factory):
+    column, other = column_factory(), column_factory()
+    other.generate_batch(10)
+    assert [column.generate_value_at(idx) for idx in range(5)] == [
+        other.generate_value_at(idx) for idx in range(5)
+    ]
+    assert len({column.generate_value_at(idx) for idx in range(100)}) == 100
+
+
 def test_all_column_types_contain_all_column_types():
     """Just making sure that ALL_COLUMN_TYPES contains all Column subclasses"""
     assert set(ALL_COLUMN_TYPES) == set(Column.__subclasses__())
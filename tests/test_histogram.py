@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from gemini_python.histogram import LatencyHistogram, LatencyHistograms
+
+
+def test_percentiles_are_within_histogram_precision():
+    random.seed(0)
+    latencies = sorted(random.uniform(0.0001, 2) for _ in range(10000))
+    histogram = LatencyHistogram()
+    for latency in latencies:
+        histogram.record(latency)
+    assert histogram.count == 10000
+    for percentile in (50, 90, 99, 99.9):
+        expected = latencies[round(len(latencies) * percentile / 100) - 1] * 1_000_000
+        assert histogram.value_at_percentile(percentile) == pytest.approx(expected, rel=0.02)
+    assert histogram.value_at_percentile(100) == histogram.max == int(latencies[-1] * 1_000_000)
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for microseconds in range(1, 101):
+        histogram.record(microseconds / 1_000_000)
+    assert histogram.min == 1
+    assert histogram.value_at_percentile(50) == 50
+    assert list(histogram)[:2] == [(1, 1), (2, 1)]
+
+
+def test_merged_histogram_equals_histogram_of_all_values():
+    first, second, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for latency in (0.001, 0.002, 0.5):
+        first.record(latency)
+        combined.record(latency)
+    for latency in (0.0005, 3.0):
+        second.record(latency)
+        combined.record(latency)
+    merged = first + second
+    assert list(merged) == list(combined)
+    assert merged.summary() == combined.summary()
+    assert (first + LatencyHistogram()).summary() == first.summary()
+
+
+def test_histograms_merge_by_name():
+    first, second = LatencyHistograms(), LatencyHistograms()
+    first.record("sut_write", 0.001)
+    second.record("sut_write", 0.002)
+    second.record("oracle_read", 0.003)
+    merged = first + second
+    assert merged["sut_write"].count == 2
+    assert merged["oracle_read"].count == 1
+    assert list(merged.summary()) == ["oracle_read", "sut_write"]
+    assert "sut_read" not in merged
@@ -0,0 +1,44 @@
+import struct
+
+import pytest
+
+from gemini_python.column_types import AsciiColumn, BigIntColumn
+from gemini_python.history_log import HistoryLog
+
+
+def test_history_log_records_can_be_read_by_other_reader(tmp_path):
+    path = tmp_path / "history.log"
+    log = HistoryLog.create(path, [BigIntColumn("pk0"), AsciiColumn("ck0", size=6)])
+    rows = [(idx, f"ck{idx}") for idx in range(3000)]  # more than initial capacity
+    for row in rows:
+        log.append(row + ("not a key",))
+    log.flush()
+    reader = HistoryLog(path)
+    assert reader.columns == ["pk0", "ck0"]
+    assert len(reader) == 3000
+    assert reader[0] == (0, "ck0")
+    assert reader[2999] == (2999, "ck2999")
+    assert list(reader) == rows
+    records = reader.records()
+    assert next(struct.iter_unpack(reader.record_format, records)) == (0, b"ck0\0\0\0")
+    records.release()
+    reader.close()
+    log.close()
+
+
+def test_history_log_can_be_reopened_for_appending(tmp_path):
+    path = tmp_path / "history.log"
+    log = HistoryLog.create(path, [BigIntColumn("pk0")])
+    log.append((1,))
+    log.close()
+    log = HistoryLog(path, writable=True)
+    log.append((2,))
+    assert list(log) == [(1,), (2,)]
+    log.close()
+
+
+def test_history_log_rejects_other_files(tmp_path):
+    path = tmp_path / "history.log"
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(ValueError):
+        HistoryLog(path)
@@ -0,0 +1,270 @@
+import random
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from gemini_python import CqlDto
+from gemini_python.history_store import (
+    HISTORY_BACKENDS,
+    SHM_HISTORY_DIR,
+    HistoryStoreFactory,
+    MemoryHistoryStore,
+    ReservoirHistoryStore,
+    ReservoirSampler,
+    RowSampler,
+    SqliteDeletedRows,
+    SqliteHistoryStore,
+    _MmapHistoryView,
+    shm_history_dir,
+)
+from gemini_python.schema import generate_schema
+
+
+def count_committed_rows(history_dir: Path) -> int:
+    conn = sqlite3.connect(history_dir / "gemini_0.db")
+    try:
+        return int(conn.execute("select count(*) from 'gemini.table0'").fetchall()[0][0])
+    finally:
+        conn.close()
+
+
+def test_rows_are_written_in_groups(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(
+        0, schema, history_file_dir=tmp_path, flush_rows=3, commit_interval=3600
+    )
+    for idx in range(4):
+        history_store.insert(CqlDto("", (f"pk{idx}", f"ck{idx}", "col")))
+    assert count_committed_rows(tmp_path) == 3
+    assert history_store.rows_count == 4
+    history_store.commit()
+    assert count_committed_rows(tmp_path) == 4
+
+
+def test_rows_are_committed_after_commit_interval(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(
+        0, schema, history_file_dir=tmp_path, flush_rows=1000, commit_interval=0
+    )
+    history_store.insert(CqlDto("", ("pk", "ck", "col")))
+    assert count_committed_rows(tmp_path) == 1
+
+
+def test_random_row_can_be_buffered_row(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(
+        0, schema, history_file_dir=tmp_path, flush_rows=2, commit_interval=3600
+    )
+    rows = {(f"pk{idx}", f"ck{idx}") for idx in range(3)}
+    for row in sorted(rows):
+        history_store.insert(CqlDto("", row + ("col",)))
+    assert {history_store.get_random_row() for _ in range(50)} == rows
+
+
+def test_random_rows_are_live_rows_loaded_from_existing_history(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(0, schema, history_file_dir=tmp_path)
+    for idx in range(6):
+        history_store.insert(CqlDto("", (f"pk{idx}", f"ck{idx}", "col")))
+    history_store.commit()
+    # leave gaps in ids and mark one row as deleted
+    history_store.cursor.execute("DELETE FROM 'gemini.table0' WHERE id IN (2, 3)")
+    history_store.cursor.execute("UPDATE 'gemini.table0' SET d_time = 1 WHERE id = 5")
+    history_store.conn.commit()
+    history_store = SqliteHistoryStore(0, schema, history_file_dir=tmp_path)
+    assert history_store.rows_count == 3
+    expected_rows = {("pk0", "ck0"), ("pk3", "ck3"), ("pk5", "ck5")}
+    assert {history_store.get_random_row() for _ in range(100)} == expected_rows
+
+
+def test_deleted_rows_keep_deletion_time(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(
+        0, schema, history_file_dir=tmp_path, flush_rows=1000, commit_interval=3600
+    )
+    for idx in range(3):
+        history_store.insert(CqlDto("", (f"pk{idx}", f"ck{idx}", "col")))
+    # deleted row is still buffered
+    history_store.delete(CqlDto("", ("pk1", "ck1")))
+    history_store.commit()
+    assert history_store.rows_count == 2
+    assert {history_store.get_random_row() for _ in range(50)} == {("pk0", "ck0"), ("pk2", "ck2")}
+    deleted = history_store.cursor.execute(
+        "SELECT pk0, ck0 FROM 'gemini.table0' WHERE d_time IS NOT NULL"
+    ).fetchall()
+    assert deleted == [("pk1", "ck1")]
+    assert SqliteHistoryStore(0, schema, history_file_dir=tmp_path).rows_count == 2
+
+
+def test_deleted_rows_are_fetched_in_order_of_deletion_time(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(0, schema, history_file_dir=tmp_path)
+    for idx in range(4):
+        history_store.insert(CqlDto("", (f"pk{idx}", f"ck{idx}", "col")))
+    for idx in (0, 2, 3):
+        history_store.delete(CqlDto("", (f"pk{idx}", f"ck{idx}")))
+    # inserted again - not deleted anymore
+    history_store.insert(CqlDto("", ("pk3", "ck3", "col")))
+    history_store.commit()
+    deleted_rows = SqliteDeletedRows(history_store.path, schema.tables[0])
+    now = int(time.time())
+    assert deleted_rows.fetch(now - 60, limit=10) == []
+    assert deleted_rows.fetch(now, limit=1) == [(1, ("pk0", "ck0"))]
+    # not advanced - fetched again
+    assert deleted_rows.fetch(now, limit=1) == [(1, ("pk0", "ck0"))]
+    deleted_rows.advance()
+    assert deleted_rows.fetch(now, limit=10) == [(3, ("pk2", "ck2"))]
+    deleted_rows.advance()
+    assert deleted_rows.fetch(now, limit=10) == []
+    assert not deleted_rows.inserted_again(1, ("pk0", "ck0"))
+    assert deleted_rows.inserted_again(4, ("pk3", "ck3"))
+    deleted_rows.close()
+
+
+def test_row_sampler_keeps_rows_dense():
+    sampler = RowSampler()
+    for idx in range(5):
+        sampler.add((idx,))
+    sampler.add((0,))
+    sampler.remove((1,))
+    sampler.remove((4,))
+    sampler.remove((7,))
+    assert len(sampler) == 3
+    assert {sampler.sample() for _ in range(100)} == {(0,), (2,), (3,)}
+
+
+def test_memory_history_store_returns_inserted_rows(
+    only_big_int_column_types, simple_schema_config
+):
+    simple_schema_config.max_partition_keys = simple_schema_config.min_partition_keys = 2
+    schema = generate_schema(simple_schema_config, **only_big_int_column_types)
+    history_store = HistoryStoreFactory.create_history_store("memory", 0, schema)
+    assert isinstance(history_store, MemoryHistoryStore)
+    rows = {(idx, -idx, 2**63 - 1 - idx) for idx in range(5)}
+    for row in rows:
+        history_store.insert(CqlDto("", row + ("col",)))
+    assert history_store.rows_count == 5
+    assert {history_store.get_random_row() for _ in range(100)} == rows
+
+
+def test_memory_history_store_interns_text_values(simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = MemoryHistoryStore(schema)
+    for idx in range(10):
+        history_store.insert(CqlDto("", ("pk", f"ck{idx % 2}", "col")))
+    assert {history_store.get_random_row() for _ in range(100)} == {("pk", "ck0"), ("pk", "ck1")}
+
+
+@pytest.mark.parametrize("backend", HISTORY_BACKENDS)
+def test_history_is_kept_per_table(tmp_path, simple_schema_config, backend):
+    simple_schema_config.max_tables = 2
+    schema = generate_schema(simple_schema_config)
+    history_store = HistoryStoreFactory.create_history_store(
+        backend, 0, schema, drop_schema=True, history_file_dir=tmp_path
+    )
+    history_store.insert(CqlDto("", ("pk0", "ck0", "col"), table_name="gemini.table0"))
+    for idx in range(2):
+        history_store.insert(CqlDto("", (f"pk{idx}", "ck1", "col"), table_name="gemini.table1"))
+    history_store.commit()
+    if backend == "mmap":
+        # history files are kept between runs
+        history_store = HistoryStoreFactory.create_history_store(
+            backend, 0, schema, history_file_dir=tmp_path
+        )
+    assert history_store.rows_count == 3
+    assert history_store.get_rows_count("gemini.table0") == 1
+    assert history_store.get_rows_count("gemini.table1") == 2
+    assert history_store.get_random_row("gemini.table0") == ("pk0", "ck0")
+    assert {history_store.get_random_row("gemini.table1") for _ in range(50)} == {
+        ("pk0", "ck1"),
+        ("pk1", "ck1"),
+    }
+
+
+def test_reservoir_sampler_keeps_bounded_uniform_sample():
+    random.seed(1)
+    sampler = ReservoirSampler(capacity=100)
+    for idx in range(10000):
+        sampler.add((idx,))
+    sampler.add((10000,))
+    sampler.add((10000,))
+    assert len(sampler) == 100
+    assert sampler.added == 10002
+    retained = {sampler.sample() for _ in range(2000)}
+    # retained rows come from whole range of writes, not only first or last ones
+    assert min(retained)[0] < 2500 and max(retained)[0] > 7500
+    total_weight = sum(sampler.weight(row) for row in retained)
+    assert total_weight == pytest.approx(sampler.added, rel=0.2)
+
+
+def test_reservoir_history_store_is_bounded(simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = HistoryStoreFactory.create_history_store("reservoir", 0, schema, capacity=10)
+    for idx in range(100):
+        history_store.insert(CqlDto("", (f"pk{idx}", "ck", "col")))
+    assert history_store.rows_count == history_store.get_rows_count() == 10
+    assert isinstance(history_store, ReservoirHistoryStore)
+    assert history_store.writes_count == 100
+    assert history_store.get_random_row()[1] == "ck"
+
+
+def test_shared_mmap_history_reads_rows_of_other_workers(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    reader, writer = (
+        HistoryStoreFactory.create_history_store(
+            "mmap", index, schema, drop_schema=True, history_file_dir=tmp_path, shared=True
+        )
+        for index in range(2)
+    )
+    assert reader.get_rows_count() == 0
+    for idx in range(3):
+        writer.insert(CqlDto("", (f"pk{idx}", "ck", "col")))
+    assert reader.rows_count == 0
+    assert reader.get_rows_count() == 3
+    assert {reader.get_random_row() for _ in range(50)} == {(f"pk{idx}", "ck") for idx in range(3)}
+
+
+def test_mmap_history_view_survives_logs_recreated_smaller(
+    tmp_path, simple_schema_config, monkeypatch
+):
+    schema = generate_schema(simple_schema_config)
+    table_name = schema.tables[0].full_name
+    view = _MmapHistoryView(0, schema, tmp_path)
+    writer = HistoryStoreFactory.create_history_store(
+        "mmap", 1, schema, drop_schema=True, history_file_dir=tmp_path
+    )
+    for idx in range(5):
+        writer.insert(CqlDto("", (f"pk{idx}", "ck", "col")))
+    assert view.get_rows_count(table_name) == 5
+    # other worker restarted with --drop-schema, its log is replaced and refreshed before row is read
+    writer = HistoryStoreFactory.create_history_store(
+        "mmap", 1, schema, drop_schema=True, history_file_dir=tmp_path
+    )
+    writer.insert(CqlDto("", ("pk9", "ck", "col")))
+    monotonic = time.monotonic() + 10
+    monkeypatch.setattr("gemini_python.history_store.time.monotonic", lambda: monotonic)
+    assert view.get_random_row(table_name, 4) == ("pk9", "ck")
+
+
+def test_shared_sqlite_history_reads_snapshot_of_previous_run(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    for index in range(3):  # previous run with different concurrency
+        writer = SqliteHistoryStore(index, schema, drop_schema=True, history_file_dir=tmp_path)
+        writer.insert(CqlDto("", (f"pk{index}", "ck", "col")))
+        writer.commit()
+    reader = HistoryStoreFactory.create_history_store(
+        "sqlite", 0, schema, history_file_dir=tmp_path, shared=True
+    )
+    assert reader.get_rows_count() == 3
+    assert {reader.get_random_row() for _ in range(50)} == {(f"pk{idx}", "ck") for idx in range(3)}
+
+
+def test_shm_history_dir_is_derived_from_history_files_dir(tmp_path):
+    history_dir = shm_history_dir(tmp_path / "run")
+
+    assert history_dir.parent == SHM_HISTORY_DIR
+    assert history_dir.name.startswith("run-")
+    assert shm_history_dir(tmp_path / "run") == history_dir
+    assert shm_history_dir(tmp_path / "other" / "run") != history_dir
@@ -1,13 +1,17 @@
+import time
 from multiprocessing import Event
 from queue import Queue
 
+import pytest
 from click.testing import CliRunner
 
-from gemini_python import QueryMode, set_event_after_timeout
+from gemini_python import QueryMode, ValidationError, set_event_after_timeout
 from gemini_python.results import ProcessResult
 from gemini_python.console import run
 from gemini_python.gemini_process import GeminiProcess
 from gemini_python.schema import generate_schema
+from gemini_python.validator import validate_result
+from tests.utils.table_query_driver import TableQueryDriver
 
 runner = CliRunner()
 
@@ -19,6 +23,87 @@ def test_can_run_gemini(tmpdir):
     assert outfile.exists()
 
 
+@pytest.mark.parametrize("history_storage", ["dir", "memory"])
+def test_can_run_gemini_with_history_storage(tmp_path, history_storage):
+    outfile = tmp_path / "results.json"
+    history_dir = tmp_path / "history"
+    result = runner.invoke(
+        run,
+        [
+            "--duration",
+            "500ms",
+            "--concurrency",
+            "1",
+            "--history-storage",
+            history_storage,
+            "--history-files-dir",
+            str(history_dir),
+            "--outfile",
+            str(outfile),
+        ],
+    )
+    assert result.exit_code == 0
+    assert outfile.exists()
+    # directory is created (not mounted), in-memory sqlite history leaves no database file
+    assert (history_dir / "gemini_0.db").exists() == (history_storage == "dir")
+
+
+def test_can_run_gemini_with_token_aware_partitions(tmp_path):
+    outfile = tmp_path / "results.json"
+    result = runner.invoke(
+        run,
+        [
+            "--duration",
+            "500ms",
+            "--drop-schema",
+            "--token-range-slices",
+            "100",
+            "--token-aware-partitions",
+            "--partitions-token-range",
+            "0:9223372036854775807",
+            "--outfile",
+            str(outfile),
+        ],
+    )
+    assert result.exit_code == 0
+    assert outfile.exists()
+
+
+def test_partitions_token_range_must_be_ordered():
+    result = runner.invoke(run, ["--token-aware-partitions", "--partitions-token-range", "5:-5"])
+    assert result.exit_code == 2
+    assert "--partitions-token-range" in result.output
+
+
+def test_partitions_token_range_requires_token_aware_partitions():
+    result = runner.invoke(run, ["--partitions-token-range", "0:5"])
+    assert result.exit_code == 2
+    assert "--partitions-token-range" in result.output
+
+
+def test_token_aware_partitions_are_rejected_when_some_worker_has_none():
+    result = runner.invoke(
+        run,
+        [
+            "--token-aware-partitions",
+            "--partitions-token-range",
+            "0:1",  # practically no partition token falls into it
+            "--token-range-slices",
+            "2",
+            "--concurrency",
+            "2",
+        ],
+    )
+    assert result.exit_code == 2
+    assert "--token-aware-partitions" in result.output
+
+
+def test_in_memory_history_storage_cant_be_resumed():
+    result = runner.invoke(run, ["--history-storage", "memory", "--resume"])
+    assert result.exit_code == 2
+    assert "--history-storage" in result.output
+
+
 def test_can_run_gemini_process(config):
     config.mode = QueryMode.MIXED
     config.duration = 1
@@ -34,3 +119,278 @@ def test_can_run_gemini_process(config):
         termination_event=termination_event,
         results_queue=results_queue,
     ).run()
+
+
+def test_can_run_gemini_process_pipelined(config):
+    config.mode = QueryMode.MIXED
+    config.duration = 1
+    config.drop_schema = True
+    config.max_in_flight = 8
+    schema = generate_schema(config)
+    termination_event = Event()
+    set_event_after_timeout(termination_event, config.duration)
+    results_queue: Queue[ProcessResult] = Queue()
+    GeminiProcess(
+        index=0,
+        config=config,
+        schema=schema,
+        termination_event=termination_event,
+        results_queue=results_queue,
+    ).run()
+    process_result = results_queue.get()
+    assert process_result.write_ops > 0
+    assert process_result.read_ops > 0
+    assert not process_result.write_errors and not process_result.read_errors
+
+
+def test_pipelined_deletes_dont_race_with_reads_of_deleted_rows(config, tmp_path, monkeypatch):
+    config.mode = QueryMode.MIXED
+    config.duration = 1
+    config.drop_schema = True
+    config.max_in_flight = 16
+    config.delete_ratio = (
+        0.5  # about as many deletes as inserts - reads often select rows being deleted
+    )
+    config.history_files_dir = tmp_path
+    schema = generate_schema(config)
+    query_drivers = iter([TableQueryDriver(schema, max_delay=0.01), TableQueryDriver(schema)])
+    monkeypatch.setattr(
+        "gemini_python.gemini_process.QueryDriverFactory.create_query_driver",
+        lambda *args: next(query_drivers),
+    )
+    mismatches = []
+
+    def counting_validate_result(oracle_result, sut_result):
+        try:
+            validate_result(oracle_result=oracle_result, sut_result=sut_result)
+        except ValidationError:
+            mismatches.append((oracle_result, sut_result))
+            raise
+
+    monkeypatch.setattr("gemini_python.gemini_process.validate_result", counting_validate_result)
+    termination_event = Event()
+    set_event_after_timeout(termination_event, config.duration)
+    results_queue: Queue[ProcessResult] = Queue()
+    GeminiProcess(
+        index=0,
+        config=config,
+        schema=schema,
+        termination_event=termination_event,
+        results_queue=results_queue,
+    ).run()
+    process_result = results_queue.get()
+    assert process_result.delete_ops > 0 and process_result.read_ops > 0
+    assert not mismatches
+
+
+class SlowTableQueryDriver(TableQueryDriver):
+    """Takes 10ms to execute each statement."""
+
+    def execute(self, cql_dto):
+        time.sleep(0.01)
+        return super().execute(cql_dto)
+
+
+def test_pipelined_sut_latency_excludes_time_waiting_for_oracle(config, tmp_path, monkeypatch):
+    config.duration = 1
+    config.drop_schema = True
+    config.history_files_dir = tmp_path
+    config.max_in_flight = 16
+    config.oracle_cluster = ["127.0.0.1"]  # oracle latencies are recorded only with oracle cluster
+    schema = generate_schema(config)
+    query_drivers = iter([TableQueryDriver(schema), SlowTableQueryDriver(schema)])
+    monkeypatch.setattr(
+        "gemini_python.gemini_process.QueryDriverFactory.create_query_driver",
+        lambda *args: next(query_drivers),
+    )
+    termination_event = Event()
+    set_event_after_timeout(termination_event, config.duration)
+    results_queue: Queue[ProcessResult] = Queue()
+    GeminiProcess(
+        index=0,
+        config=config,
+        schema=schema,
+        termination_event=termination_event,
+        results_queue=results_queue,
+    ).run()
+    latencies = results_queue.get().latencies.summary()
+    assert latencies["oracle_write"]["p50_ms"] >= 10
+    # SUT responses complete at once, but are handled one by one after 10ms oracle queries
+    assert latencies["sut_write"]["p50_ms"] < 5
+
+
+@pytest.mark.parametrize(
+    "max_in_flight,request_batch_size",
+    ((1, 1), (1, 4), (8, 3)),
+)
+def test_can_run_gemini_process_with_concurrent_dispatch(config, max_in_flight, request_batch_size):
+    config.mode = QueryMode.MIXED
+    config.max_in_flight = max_in_flight
+    config.request_batch_size = request_batch_size
+    config.duration = 1
+    config.drop_schema = True
+    config.concurrent_dispatch = True
+    schema = generate_schema(config)
+    termination_event = Event()
+    set_event_after_timeout(termination_event, config.duration)
+    results_queue: Queue[ProcessResult] = Queue()
+    GeminiProcess(
+        index=0,
+        config=config,
+        schema=schema,
+        termination_event=termination_event,
+        results_queue=results_queue,
+    ).run()
+    process_result = results_queue.get()
+    assert process_result.write_ops > 0
+    assert process_result.read_ops > 0
+    assert not process_result.write_errors and not process_result.read_errors
+
+
+def test_can_run_gemini_process_batched(config):
+    config.mode = QueryMode.MIXED
+    config.duration = 1
+    config.drop_schema = True
+    config.request_batch_size = 4
+    schema = generate_schema(config)
+    termination_event = Event()
+    set_event_after_timeout(termination_event, config.duration)
+    results_queue: Queue[ProcessResult] = Queue()
+    GeminiProcess(
+        index=0,
+        config=config,
+        schema=schema,
+        termination_event=termination_event,
+        results_queue=results_queue,
+    ).run()
+    process_result = results_queue.get()
+    assert process_result.write_ops > 0
+    assert process_result.read_ops > 0
+    assert not process_result.write_errors and not process_result.read_errors
+
+
+def test_can_run_gemini_process_with_asyncio(config):
+    config.mode = QueryMode.MIXED
+    config.duration = 1
+    config.drop_schema = True
+    config.asyncio_concurrency = 100
+    schema = generate_schema(config)
+    termination_event = Event()
+    set_event_after_timeout(termination_event, config.duration)
+    results_queue: Queue[ProcessResult] = Queue()
+    GeminiProcess(
+        index=0,
+        config=config,
+        schema=schema,
+        termination_event=termination_event,
+        results_queue=results_queue,
+    ).run()
+    process_result = results_queue.get()
+    assert process_result.write_ops > 0
+    assert process_result.read_ops > 0
+    assert not process_result.write_errors and not process_result.read_errors
+
+
+@pytest.mark.parametrize("history_backend", ["memory", "mmap"])
+def test_can_run_gemini_process_with_history_backend(config, tmp_path, history_backend):
+    config.mode = QueryMode.MIXED
+    config.duration = 1
+    config.history_backend = history_backend
+    config.history_files_dir = tmp_path
+    schema = generate_schema(config)
+    termination_event = Event()
+    set_event_after_timeout(termination_event, config.duration)
+    results_queue: Queue[ProcessResult] = Queue()
+    GeminiProcess(
+        index=0,
+        config=config,
+        schema=schema,
+        termination_event=termination_event,
+        results_queue=results_queue,
+    ).run()
+    process_result = results_queue.get()
+    assert process_result.write_ops > 0
+    assert process_result.read_ops > 0
+    assert not process_result.write_errors and not process_result.read_errors
+
+
+def test_can_run_gemini_process_with_deletes(config, tmp_path):
+    config.mode = QueryMode.MIXED
+    config.duration = 2
+    config.drop_schema = True
+    config.history_files_dir = tmp_path
+    config.delete_ratio = 0.2
+    config.deletion_verification_delay = 0
+    schema = generate_schema(config)
+    termination_event = Event()
+    set_event_after_timeout(termination_event, config.duration)
+    results_queue: Queue[ProcessResult] = Queue()
+    GeminiProcess(
+        index=0,
+        config=config,
+        schema=schema,
+        termination_event=termination_event,
+        results_queue=results_queue,
+    ).run()
+    process_result = results_queue.get()
+    assert process_result.delete_ops > 0
+    assert not process_result.delete_errors and not process_result.resurrections
+
+
+def test_checkpoint_stores_in_flight_operations_with_retries(config, tmp_path, monkeypatch):
+    config.duration = 1
+    config.drop_schema = True
+    config.history_files_dir = tmp_path
+    config.max_in_flight = 16
+    config.checkpoint_interval = 0.05
+    schema = generate_schema(config)
+    query_drivers = iter([TableQueryDriver(schema, max_delay=0.01), TableQueryDriver(schema)])
+    monkeypatch.setattr(
+        "gemini_python.gemini_process.QueryDriverFactory.create_query_driver",
+        lambda *args: next(query_drivers),
+    )
+    checkpoints_retries = []
+    monkeypatch.setattr(
+        "gemini_python.gemini_process.Checkpoint.save",
+        lambda checkpoint, path: checkpoints_retries.append(len(checkpoint.retries)),
+    )
+    termination_event = Event()
+    set_event_after_timeout(termination_event, config.duration)
+    results_queue: Queue[ProcessResult] = Queue()
+    GeminiProcess(
+        index=0,
+        config=config,
+        schema=schema,
+        termination_event=termination_event,
+        results_queue=results_queue,
+    ).run()
+    assert not results_queue.get().write_errors
+    # taken while other operations are in flight, except the final one
+    assert max(checkpoints_retries) > 0
+    assert checkpoints_retries[-1] == 0
+
+
+@pytest.mark.parametrize("history_backend", ["sqlite", "mmap"])
+def test_can_resume_gemini_process_from_checkpoint(config, tmp_path, history_backend):
+    config.mode = QueryMode.MIXED
+    config.duration = 1
+    config.history_files_dir = tmp_path
+    config.history_backend = history_backend
+    schema = generate_schema(config)
+    process_results = []
+    for resume in (False, True):
+        config.resume = resume
+        termination_event = Event()
+        set_event_after_timeout(termination_event, config.duration)
+        results_queue: Queue[ProcessResult] = Queue()
+        GeminiProcess(
+            index=0,
+            config=config,
+            schema=schema,
+            termination_event=termination_event,
+            results_queue=results_queue,
+        ).run()
+        process_results.append(results_queue.get())
+    # counters continue from checkpoint of the first run
+    assert process_results[1].write_ops > process_results[0].write_ops > 0
+    assert process_results[1].read_ops > process_results[0].read_ops
@@ -1,12 +1,14 @@
+import pytest
+
 from gemini_python import QueryMode, Operation
-from gemini_python.history_store import HistoryStore
+from gemini_python.history_store import SqliteHistoryStore
 from gemini_python.load_generator import LoadGenerator
-from gemini_python.schema import generate_schema
+from gemini_python.schema import Schema, generate_schema
 
 
 def test_can_generate_insert_queries(simple_schema_config, only_big_int_column_types):
     schema = generate_schema(simple_schema_config, **only_big_int_column_types)
-    history_store = HistoryStore(0, schema, drop_schema=True)
+    history_store = SqliteHistoryStore(0, schema, drop_schema=True)
     generator = LoadGenerator(
         schema=schema, mode=QueryMode.WRITE, partitions=[[(1,), (2,)]], history_store=history_store
     )
@@ -15,7 +17,7 @@ def test_can_generate_insert_queries(simple_schema_config, only_big_int_column_t
     assert isinstance(cql_dto.values, tuple)
     assert operation == Operation.WRITE
     # verify seed is working
-    assert cql_dto.values == (1, 97, 67)
+    assert cql_dto.values == (1, 75, -49)
     # verify we don't generate the same partitions
     operation, cql_dto_2 = generator.get_query()
     assert cql_dto.values != cql_dto_2.values
@@ -23,7 +25,7 @@ def test_can_generate_insert_queries(simple_schema_config, only_big_int_column_t
 
 def test_can_generate_select_queries(simple_schema_config):
     schema = generate_schema(simple_schema_config)
-    history_store = HistoryStore(0, schema, drop_schema=True)
+    history_store = SqliteHistoryStore(0, schema, drop_schema=True)
     insert_generator = LoadGenerator(
         schema=schema,
         mode=QueryMode.WRITE,
@@ -47,7 +49,7 @@ def test_can_generate_select_queries(simple_schema_config):
     assert isinstance(cql_dto.values, tuple)
     assert cql_dto.values == (
         "1",
-        "9gYBr0jzBVRnepzTZUcVaRzlvpUSlNN9s2T9QJtXWXWWgC7eXXg6c2E1XCwmLdH1mpWU1yMcMTc2zfqbn8o3oIvpuWPAKrPUeN1N",
+        "AKafh0LmSLcB4QuTCI4vO3pJZV8YLNoecpJi2eMnNfkEqpfWCffNTY8Z1E5QGUbaIfyXo95oteUiX6tHLhh5fqU0coD4ggp22HKt",
     )
     assert operation == Operation.READ
 
@@ -58,7 +60,7 @@ def test_can_generate_insert_queries_multi_partition(
     simple_schema_config.min_partition_keys = 2
     simple_schema_config.max_partition_keys = 2
     schema = generate_schema(simple_schema_config, **only_big_int_column_types)
-    history_store = HistoryStore(0, schema, drop_schema=True)
+    history_store = SqliteHistoryStore(0, schema, drop_schema=True)
     generator = LoadGenerator(
         schema=schema,
         mode=QueryMode.WRITE,
@@ -72,7 +74,7 @@ def test_can_generate_insert_queries_multi_partition(
     )
     assert isinstance(cql_dto.values, tuple)
     # verify seed is working
-    assert cql_dto.values == (1, 2, 97, 67)
+    assert cql_dto.values == (1, 2, 75, -49)
     assert operation == Operation.WRITE
 
 
@@ -80,11 +82,11 @@ def test_can_generate_select_queries_multi_pk(simple_schema_config):
     simple_schema_config.min_partition_keys = 2
     simple_schema_config.max_partition_keys = 2
     schema = generate_schema(simple_schema_config)
-    history_store = HistoryStore(0, schema, drop_schema=True)
+    history_store = SqliteHistoryStore(0, schema, drop_schema=True)
     insert_generator = LoadGenerator(
         schema=schema,
         mode=QueryMode.WRITE,
-        partitions=[[(1, 2), (3, 4), (5, 6), (7, 8)]],
+        partitions=[[("1", "2"), ("3", "4"), ("5", "6"), ("7", "8")]],
         history_store=history_store,
     )
     operation, cql_dto = insert_generator.get_query()
@@ -93,7 +95,7 @@ def test_can_generate_select_queries_multi_pk(simple_schema_config):
     generator = LoadGenerator(
         schema=schema,
         mode=QueryMode.READ,
-        partitions=[[(1, 2), (3, 4), (5, 6), (7, 8)]],
+        partitions=[[("1", "2"), ("3", "4"), ("5", "6"), ("7", "8")]],
         history_store=history_store,
     )
     operation, cql_dto = generator.get_query()
@@ -105,14 +107,14 @@ def test_can_generate_select_queries_multi_pk(simple_schema_config):
     assert cql_dto.values == (
         "1",
         "2",
-        "9gYBr0jzBVRnepzTZUcVaRzlvpUSlNN9s2T9QJtXWXWWgC7eXXg6c2E1XCwmLdH1mpWU1yMcMTc2zfqbn8o3oIvpuWPAKrPUeN1N",
+        "AKafh0LmSLcB4QuTCI4vO3pJZV8YLNoecpJi2eMnNfkEqpfWCffNTY8Z1E5QGUbaIfyXo95oteUiX6tHLhh5fqU0coD4ggp22HKt",
     )
     assert operation == Operation.READ
 
 
 def test_can_generate_mixed_queries(simple_schema_config, only_big_int_column_types):
     schema = generate_schema(simple_schema_config, **only_big_int_column_types)
-    history_store = HistoryStore(0, schema, drop_schema=True)
+    history_store = SqliteHistoryStore(0, schema, drop_schema=True)
     generator = LoadGenerator(
         schema=schema, mode=QueryMode.MIXED, partitions=[[(1,), (2,)]], history_store=history_store
     )
@@ -123,14 +125,14 @@ def test_can_generate_mixed_queries(simple_schema_config, only_big_int_column_ty
     assert isinstance(cql_dto.values, tuple)
     assert operation == Operation.WRITE
     # verify seed is working
-    assert cql_dto.values == (1, 97, 67)
+    assert cql_dto.values == (1, 75, -49)
     operation, cql_dto = generator.get_query()
     assert (
         cql_dto.statement.lower()
         == "select pk0, ck0, col0 from gemini.table0 where pk0=? and ck0=?"
     )
     assert isinstance(cql_dto.values, tuple)
-    assert cql_dto.values == (1, 97)
+    assert cql_dto.values == (1, 75)
     assert operation == Operation.READ
 
 
@@ -139,20 +141,22 @@ def test_can_generate_queries_for_multiple_tables(simple_schema_config):
     schema = generate_schema(simple_schema_config)
     assert len(schema.tables) == 2
 
-    history_store = HistoryStore(0, schema, drop_schema=True)
+    history_store = SqliteHistoryStore(0, schema, drop_schema=True)
     insert_generator = LoadGenerator(
         schema=schema,
         mode=QueryMode.WRITE,
-        partitions=[[(1,), (2,)], [(1,), (2,)]],
+        partitions=[[("1",), ("2",)], [("1",), ("2",)]],
         history_store=history_store,
     )
-    operation, cql_dto = insert_generator.get_query()
-    history_store.insert(cql_dto)
+    # one insert for each table
+    for _ in range(2):
+        operation, cql_dto = insert_generator.get_query()
+        history_store.insert(cql_dto)
     history_store.commit()
     generator = LoadGenerator(
         schema=schema,
         mode=QueryMode.READ,
-        partitions=[[(1,), (2,)], [(1,), (2,)]],
+        partitions=[[("1",), ("2",)], [("1",), ("2",)]],
         history_store=history_store,
     )
     operation, cql_dto = generator.get_query()
@@ -163,7 +167,7 @@ def test_can_generate_queries_for_multiple_tables(simple_schema_config):
     assert isinstance(cql_dto.values, tuple)
     assert cql_dto.values == (
         "1",
-        "9gYBr0jzBVRnepzTZUcVaRzlvpUSlNN9s2T9QJtXWXWWgC7eXXg6c2E1XCwmLdH1mpWU1yMcMTc2zfqbn8o3oIvpuWPAKrPUeN1N",
+        "AKafh0LmSLcB4QuTCI4vO3pJZV8YLNoecpJi2eMnNfkEqpfWCffNTY8Z1E5QGUbaIfyXo95oteUiX6tHLhh5fqU0coD4ggp22HKt",
     )
     assert operation == Operation.READ
 
@@ -174,4 +178,104 @@ def test_can_generate_queries_for_multiple_tables(simple_schema_config):
         == "select pk0, ck0, col0 from gemini.table1 where pk0=? and ck0=?"
     )
     assert isinstance(cql_dto.values, tuple)
+    # keys are taken from history of table1
+    assert cql_dto.values == history_store.get_random_row("gemini.table1")
+    assert history_store.get_rows_count("gemini.table1") == 1
     assert operation == Operation.READ
+
+
+def test_can_generate_delete_queries(simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(0, schema, drop_schema=True)
+    generator = LoadGenerator(
+        schema=schema,
+        mode=QueryMode.WRITE,
+        partitions=[[("1",)]],
+        history_store=history_store,
+        delete_ratio=1.0,
+    )
+    # nothing to delete yet
+    operation, cql_dto = generator.get_query()
+    assert operation == Operation.WRITE
+    history_store.insert(cql_dto)
+    operation, delete_dto = generator.get_query()
+    assert operation == Operation.DELETE
+    assert delete_dto.statement.lower() == "delete from gemini.table0 where pk0=? and ck0=?"
+    assert delete_dto.values == cql_dto.values[:2]
+    assert delete_dto.table_name == "gemini.table0"
+    # row being deleted isn't selected again until deletion fails
+    assert history_store.get_rows_count() == 0
+    assert generator.get_query()[0] == Operation.WRITE
+    history_store.return_row(delete_dto)
+    assert history_store.get_random_row() == delete_dto.values
+
+
+def test_insert_values_from_pool_count_unique_values(
+    simple_schema_config, only_big_int_column_types
+):
+    schema = generate_schema(simple_schema_config, **only_big_int_column_types)
+    history_store = SqliteHistoryStore(0, schema, drop_schema=True)
+    generator = LoadGenerator(
+        schema=schema,
+        mode=QueryMode.WRITE,
+        partitions=[[(1,), (2,)]],
+        history_store=history_store,
+        value_pool_size=5,
+        value_pool_reuse=2,
+    )
+    values = [generator.get_query()[1].values for _ in range(20)]
+    assert len({row[1:] for row in values}) == 20
+    assert generator.get_values_counts() == (20, 40)  # 2 columns, half of passes reuse values
+    assert generator.get_keys_counts() == (len({row[:2] for row in values}), 20)
+
+
+@pytest.mark.parametrize("partitions,unique_keys", [([(1,), (2,)], 16), ([(1,)], 8)])
+def test_insert_keys_from_pool_count_unique_keys(
+    simple_schema_config, only_big_int_column_types, partitions, unique_keys
+):
+    schema = generate_schema(simple_schema_config, **only_big_int_column_types)
+    generator = LoadGenerator(
+        schema=schema,
+        mode=QueryMode.WRITE,
+        partitions=[partitions],
+        history_store=SqliteHistoryStore(0, schema, drop_schema=True),
+        value_pool_size=4,
+        value_pool_reuse=2,
+    )
+    values = [generator.get_query()[1].values for _ in range(16)]
+    # reused clustering keys move to the other partition, with single partition they overwrite rows
+    assert len({row[:2] for row in values}) == unique_keys
+    assert generator.get_keys_counts() == (unique_keys, 16)
+
+
+@pytest.mark.parametrize("value_pool_size", [0, 5])
+def test_insert_queries_continue_exactly_after_state_is_restored(
+    simple_schema_config, value_pool_size
+):
+    def create_generator(schema: Schema) -> LoadGenerator:
+        return LoadGenerator(
+            schema=schema,
+            mode=QueryMode.WRITE,
+            partitions=[[(1,), (2,)]],
+            history_store=SqliteHistoryStore(0, schema, drop_schema=True),
+            value_pool_size=value_pool_size,
+            value_pool_reuse=3,
+        )
+
+    schema = generate_schema(simple_schema_config)
+    generator = create_generator(schema)
+    for _ in range(7):
+        generator.get_query()
+    state = generator.get_state()
+    columns = schema.tables[0].all_columns
+    column_states = [column.get_state() for column in columns]
+    expected = [generator.get_query() for _ in range(20)]
+    expected_counts = generator.get_values_counts(), generator.get_keys_counts()
+
+    restored_schema = generate_schema(simple_schema_config)
+    restored = create_generator(restored_schema)
+    restored.set_state(state)
+    for column, column_state in zip(restored_schema.tables[0].all_columns, column_states):
+        column.set_state(column_state)
+    assert [restored.get_query() for _ in range(20)] == expected
+    assert (restored.get_values_counts(), restored.get_keys_counts()) == expected_counts
@@ -0,0 +1,90 @@
+#  pylint: disable=no-name-in-module
+import pickle
+
+import pytest
+from cassandra.cqltypes import AsciiType, LongType  # type: ignore
+from cassandra.metadata import Murmur3Token  # type: ignore
+from cassandra.query import SimpleStatement  # type: ignore
+
+from gemini_python.column_types import AsciiColumn, BigIntColumn
+from gemini_python.partitions import MAX_TOKEN, Partitions, TokenAwarePartitions, partition_token
+
+
+def test_partitions_are_recomputed_from_seed_and_index():
+    partitions = Partitions([BigIntColumn("pk0", seed=5), AsciiColumn("pk1", size=10)], count=1000)
+    assert len(partitions) == 1000
+    first = partitions[0]
+    assert isinstance(first[0], int) and len(first[1]) == 10
+    # doesn't depend on columns PRNG state nor on order of access
+    partitions[999]  # pylint: disable=pointless-statement
+    recomputed = Partitions([BigIntColumn("pk0", seed=5), AsciiColumn("pk1", size=10)], 1000)
+    assert recomputed[0] == first
+    assert partitions[-1] == partitions[999] == recomputed[999]
+    assert partitions[1:3] == [partitions[1], partitions[2]]
+    assert len(set(partitions)) == 1000
+    with pytest.raises(IndexError):
+        partitions[1000]  # pylint: disable=pointless-statement
+
+
+def test_partitions_start_at_given_index_and_are_cheap_to_pickle():
+    columns = [BigIntColumn("pk0")]
+    partitions = Partitions(columns, count=10**9, start=10)
+    assert partitions[0] == Partitions(columns, count=20)[10]
+    assert len(pickle.dumps(partitions)) < 10_000
+    assert pickle.loads(pickle.dumps(partitions))[5] == partitions[5]
+
+
+def test_partitions_of_workers_are_disjoint_even_for_small_column_ranges():
+    columns = [BigIntColumn("pk0", size=50)]
+    count = 34  # 3 workers cover all 102 values of column range
+    workers_partitions = [set(Partitions(columns, count, start=idx * count)) for idx in range(3)]
+    assert set.union(*workers_partitions) == {(value,) for value in range(-51, 51)}
+    assert sum(len(partitions) for partitions in workers_partitions) == 102
+
+
+@pytest.mark.parametrize("values", [(42,), (-1, "abc")])
+def test_partition_token_is_computed_like_by_driver(values):
+    columns = [BigIntColumn("pk0"), AsciiColumn("pk1", size=3)][: len(values)]
+    statement = SimpleStatement("")
+    statement.routing_key = [
+        (LongType if isinstance(value, int) else AsciiType).serialize(value, 4) for value in values
+    ]
+    assert partition_token(columns, values) == Murmur3Token.from_key(statement.routing_key).value
+
+
+def test_token_aware_partitions_cover_own_token_slices():
+    columns = [BigIntColumn("pk0", size=10**9), AsciiColumn("pk1", size=5)]
+    workers_partitions = [
+        TokenAwarePartitions(
+            columns, 25, first_slice=idx * 25, slices=100, token_range=(0, MAX_TOKEN)
+        )
+        for idx in range(4)
+    ]
+    for idx, partitions in enumerate(workers_partitions):
+        assert len(partitions) == 25
+        slices = [partitions.slice_of(partition_token(columns, values)) for values in partitions]
+        assert slices == list(range(idx * 25, (idx + 1) * 25))
+    assert all(partition_token(columns, values) >= 0 for values in workers_partitions[0])
+
+
+def test_token_aware_partitions_skip_slices_without_partitions():
+    partitions = TokenAwarePartitions([BigIntColumn("pk0", size=4)], 100)
+    assert len(partitions) <= 10  # only 10 distinct partitions
+    assert len(set(partitions)) == len(partitions)
+
+
+def test_token_aware_partitions_of_all_workers_are_found_in_one_scan():
+    columns = [BigIntColumn("pk0", size=10**9)]
+    workers_partitions = TokenAwarePartitions.for_workers(columns, 4, 100)
+    for idx, partitions in enumerate(workers_partitions):
+        assert list(partitions) == list(
+            TokenAwarePartitions(columns, 25, first_slice=idx * 25, slices=100)
+        )
+
+
+def test_token_aware_partitions_without_any_partition_found_are_empty():
+    # practically no partition token falls into such range
+    workers_partitions = TokenAwarePartitions.for_workers(
+        [BigIntColumn("pk0", size=10**9)], 2, 2, token_range=(0, 1), max_scan_factor=5
+    )
+    assert [len(partitions) for partitions in workers_partitions] == [0, 0]
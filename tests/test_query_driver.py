@@ -0,0 +1,100 @@
+from typing import Callable, List, Optional
+
+import pytest
+from cassandra import DriverException  # type: ignore
+
+from gemini_python import ValidationError
+from gemini_python.query_driver import QueryDriverException, add_rows_callbacks, stream_rows
+from gemini_python.validator import validate_result
+
+
+class FakeResultSet:
+    """Mimics driver's ResultSet paging, counting fetched pages."""
+
+    def __init__(self, pages: List[list], fail_on_page: Optional[int] = None) -> None:
+        self._pages = pages
+        self._fail_on_page = fail_on_page
+        self.fetched_pages = 1
+        self.current_rows = pages[0]
+
+    @property
+    def has_more_pages(self) -> bool:
+        return self.fetched_pages < len(self._pages)
+
+    def fetch_next_page(self) -> None:
+        if self.fetched_pages == self._fail_on_page:
+            raise DriverException("timeout")
+        self.current_rows = self._pages[self.fetched_pages]
+        self.fetched_pages += 1
+
+
+class FakeResponseFuture:
+    """Mimics driver's ResponseFuture paging - callbacks are called with each fetched page."""
+
+    def __init__(self, pages: List[list], fail_on_page: Optional[int] = None) -> None:
+        self._pages = pages
+        self._fail_on_page = fail_on_page
+        self._page = 0
+        self._callbacks: list = []
+
+    @property
+    def has_more_pages(self) -> bool:
+        return self._page < len(self._pages) - 1
+
+    def add_callbacks(self, callback: Callable, errback: Callable) -> None:
+        self._callbacks = [callback, errback]
+        self._complete()
+
+    def start_fetching_next_page(self) -> None:
+        self._page += 1
+        self._complete()
+
+    def _complete(self) -> None:
+        callback, errback = self._callbacks
+        if self._page == self._fail_on_page:
+            errback(DriverException("timeout"))
+        else:
+            callback(self._pages[self._page])
+
+
+def test_rows_callbacks_get_rows_of_all_pages():
+    results: list = []
+    add_rows_callbacks(
+        FakeResponseFuture([[(1,), (2,)], [(3,)], [(4,)]]), results.append, results.append
+    )
+    assert results == [[(1,), (2,), (3,), (4,)]]
+
+
+def test_rows_callbacks_get_query_driver_exception_when_page_fetch_fails():
+    results: list = []
+    add_rows_callbacks(
+        FakeResponseFuture([[(1,)], [(2,)]], fail_on_page=1), results.append, results.append
+    )
+    assert len(results) == 1 and isinstance(results[0], QueryDriverException)
+
+
+def test_stream_rows_returns_single_page_without_copying():
+    result_set = FakeResultSet([[(1,), (2,)]])
+    assert stream_rows(result_set) is result_set.current_rows
+
+
+def test_stream_rows_fetches_pages_lazily():
+    result_set = FakeResultSet([[(1,), (2,)], [(3,)], [(4,)]])
+    rows = iter(stream_rows(result_set))
+    assert [next(rows), next(rows)] == [(1,), (2,)]
+    assert result_set.fetched_pages == 1
+    assert list(rows) == [(3,), (4,)]
+    assert result_set.fetched_pages == 3
+
+
+def test_stream_rows_raises_query_driver_exception_when_page_fetch_fails():
+    with pytest.raises(QueryDriverException):
+        list(stream_rows(FakeResultSet([[(1,)], [(2,)]], fail_on_page=1)))
+
+
+def test_validation_stops_at_first_mismatch_without_fetching_remaining_pages():
+    oracle_result_set = FakeResultSet([[(1,), (2,)], [(3,)], [(4,)]])
+    sut_result_set = FakeResultSet([[(1,), (2,)], [(5,)], [(4,)]])
+    with pytest.raises(ValidationError):
+        validate_result(stream_rows(oracle_result_set), stream_rows(sut_result_set))
+    assert oracle_result_set.fetched_pages == sut_result_set.fetched_pages == 2
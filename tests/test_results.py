@@ -0,0 +1,32 @@
+import json
+from queue import Queue
+
+from gemini_python import ConnectionOptions, Operation
+from gemini_python.results import SUT, ProcessResult, process_results
+
+
+def test_process_results_sums_results_and_records_connection_options(tmp_path):
+    results_queue: Queue[ProcessResult] = Queue()
+    for _ in range(2):
+        process_result = ProcessResult()
+        process_result.increment_ops(Operation.WRITE)
+        process_result.increment_errors(Operation.READ)
+        process_result.record_latency(SUT, Operation.WRITE, 0.002)
+        process_result.add_values_counts(3, 4)
+        process_result.add_keys_counts(1, 2)
+        results_queue.put(process_result)
+    outfile = tmp_path / "results.json"
+    is_failed = process_results(
+        results_queue, outfile, ConnectionOptions(connection_class="libev", token_aware=True)
+    )
+    assert is_failed
+    result = json.loads(outfile.read_text())
+    assert result["result"]["write_ops"] == 2
+    assert result["result"]["read_errors"] == 2
+    assert result["result"]["value_uniqueness"] == 0.75
+    assert result["result"]["key_uniqueness"] == 0.5
+    assert result["result"]["latencies"]["sut_write"]["count"] == 2
+    assert result["result"]["latencies"]["sut_write"]["p99_ms"] == 2.0
+    assert result["connection_options"]["connection_class"] == "libev"
+    assert result["connection_options"]["token_aware"] is True
+    assert result["connection_options"]["compression"] == "auto"
@@ -0,0 +1,114 @@
+from typing import Iterable, Set
+
+import pytest
+
+from gemini_python import CqlDto
+from gemini_python.history_store import SqliteHistoryStore
+from gemini_python.query_driver import NoOpQueryDriver, QueryDriver, QueryDriverException
+from gemini_python.resurrection_verifier import ResurrectionVerifier
+from gemini_python.schema import generate_schema
+
+
+class FakeQueryDriver(QueryDriver):
+    """Returns row only for resurrected keys, fails when `failing` is set."""
+
+    def __init__(self, resurrected: Set[tuple]) -> None:
+        self.resurrected = resurrected
+        self.failing = False
+        self.queried: list = []
+
+    def execute(self, cql_dto: CqlDto) -> Iterable:
+        if self.failing:
+            raise QueryDriverException("timeout")
+        self.queried.append(cql_dto.values)
+        return [cql_dto.values] if cql_dto.values in self.resurrected else []
+
+
+def test_verifier_reports_resurrected_rows(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(0, schema, history_file_dir=tmp_path)
+    for idx in range(5):
+        history_store.insert(CqlDto("", (f"pk{idx}", f"ck{idx}", "col")))
+        history_store.delete(CqlDto("", (f"pk{idx}", f"ck{idx}")))
+    history_store.commit()
+    sut_query_driver = FakeQueryDriver({("pk3", "ck3")})
+    verifier = ResurrectionVerifier(
+        history_store.path,
+        schema,
+        sut_query_driver,
+        NoOpQueryDriver(),
+        delay=0,
+        batch_size=2,
+        recheck_delay=0,
+    )
+    verifier.verify()
+    assert sut_query_driver.queried == [(f"pk{idx}", f"ck{idx}") for idx in range(5)]
+    assert verifier.verified_deletes == 5
+    assert verifier.resurrections == 1
+    # rows are verified only once
+    verifier.verify()
+    assert verifier.verified_deletes == 5
+    verifier.stop()
+
+
+def test_verifier_retries_batch_after_query_failure(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(0, schema, history_file_dir=tmp_path)
+    history_store.insert(CqlDto("", ("pk", "ck", "col")))
+    history_store.delete(CqlDto("", ("pk", "ck")))
+    history_store.commit()
+    oracle_query_driver = FakeQueryDriver(set())
+    oracle_query_driver.failing = True
+    verifier = ResurrectionVerifier(
+        history_store.path, schema, FakeQueryDriver(set()), oracle_query_driver, delay=0
+    )
+    verifier.verify()
+    assert verifier.verified_deletes == 0
+    oracle_query_driver.failing = False
+    verifier.verify()
+    assert verifier.verified_deletes == 1
+    assert verifier.resurrections == 0
+    verifier.stop()
+
+
+def test_verifier_skips_rows_deleted_recently(tmp_path, simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(0, schema, history_file_dir=tmp_path)
+    history_store.insert(CqlDto("", ("pk", "ck", "col")))
+    history_store.delete(CqlDto("", ("pk", "ck")))
+    history_store.commit()
+    verifier = ResurrectionVerifier(
+        history_store.path, schema, FakeQueryDriver(set()), NoOpQueryDriver(), delay=3600
+    )
+    verifier.verify()
+    assert verifier.verified_deletes == 0
+    verifier.stop()
+
+
+@pytest.mark.parametrize("inserted_again", [False, True])
+def test_verifier_doesnt_report_rows_inserted_again_after_deletion(
+    tmp_path, simple_schema_config, inserted_again
+):
+    schema = generate_schema(simple_schema_config)
+    history_store = SqliteHistoryStore(0, schema, history_file_dir=tmp_path)
+    history_store.insert(CqlDto("", ("pk", "ck", "col")))
+    history_store.delete(CqlDto("", ("pk", "ck")))
+    history_store.commit()
+    verifier = ResurrectionVerifier(
+        history_store.path,
+        schema,
+        FakeQueryDriver({("pk", "ck")}),
+        NoOpQueryDriver(),
+        delay=0,
+        recheck_delay=3600,
+    )
+    # row is written again, but its insert is not in history yet
+    verifier.verify()
+    assert verifier.verified_deletes == 1
+    assert verifier.resurrections == 0
+    if inserted_again:
+        history_store.insert(CqlDto("", ("pk", "ck", "col")))
+        history_store.commit()
+    # history is complete when verifier is stopped
+    verifier.stop()
+    assert verifier.resurrections == int(not inserted_again)
@@ -34,3 +34,16 @@ def test_can_add_multiple_retry_to_retries_generator_and_get_it_after_backoff_ti
         time.sleep(0.007)
         assert gen.retry_available() is True, "Retry should be available after backoff time"
         assert gen.get_retry() == (Operation.WRITE, cql_dto, 1)
+
+
+def test_pending_retries_include_not_ready_ones():
+    gen = RetriesGenerator(max_mutation_retries_backoff=0.005)
+    for attempt in range(3):
+        gen.add_retry(Operation.WRITE, CqlDto("insert", (attempt,)), attempt=attempt)
+    assert gen.get_pending() == [
+        (Operation.WRITE, CqlDto("insert", (attempt,)), attempt) for attempt in range(3)
+    ]
+    time.sleep(0.05)
+    assert len(gen.get_pending()) == 3
+    gen.get_retry()
+    assert len(gen.get_pending()) == 2
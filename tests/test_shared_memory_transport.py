@@ -0,0 +1,112 @@
+import pytest
+
+from gemini_python.query_driver import QueryDriverException
+from gemini_python.shared_memory_transport import (
+    BATCH,
+    EXECUTE,
+    REGISTER,
+    RingBuffer,
+    decode_request,
+    decode_result,
+    decode_results,
+    decode_values,
+    encode_batch,
+    encode_batch_results,
+    encode_batches,
+    encode_execute,
+    encode_register,
+    encode_result,
+    encode_values,
+    join_batch_results,
+)
+
+
+def test_can_encode_and_decode_values():
+    values = (1, -(2**63), "abc", None, 2**70, 1.5, "")
+    decoded, offset = decode_values(encode_values(values))
+    assert decoded == values
+    assert offset == len(encode_values(values))
+
+
+def test_can_encode_and_decode_requests():
+    assert decode_request(encode_register(3, "select * from t where a=?")) == (
+        REGISTER,
+        3,
+        "select * from t where a=?",
+    )
+    assert decode_request(encode_execute(3, (1, "a"))) == (EXECUTE, 3, (1, "a"))
+
+
+@pytest.mark.parametrize(
+    "result",
+    (
+        [],
+        [{"pk0": 1, "col0": "a"}, {"pk0": 2, "col0": None}],
+        [(1, "a"), (2, None)],
+    ),
+)
+def test_can_encode_and_decode_results(result):
+    assert decode_result(encode_result(result)) == result
+
+
+def test_can_encode_and_decode_exception():
+    decoded = decode_result(encode_result(QueryDriverException("failed")))
+    assert isinstance(decoded, QueryDriverException)
+    assert str(decoded) == "failed"
+
+
+def test_ring_buffer_wraps_around():
+    ring_buffer = RingBuffer(size=32)
+    try:
+        for idx in range(20):
+            message = bytes([idx]) * (idx % 7 + 1)
+            ring_buffer.put(message)
+            assert ring_buffer.get(timeout=1) == message
+        assert ring_buffer.get(timeout=0.01) is None
+    finally:
+        ring_buffer.close()
+
+
+def test_ring_buffer_rejects_too_big_message():
+    ring_buffer = RingBuffer(size=32)
+    try:
+        with pytest.raises(ValueError):
+            ring_buffer.put(b"x" * 29)
+    finally:
+        ring_buffer.close()
+
+
+def test_ring_buffer_put_times_out_when_full():
+    ring_buffer = RingBuffer(size=32)
+    try:
+        assert ring_buffer.put(b"x" * 20, timeout=0.01)
+        assert not ring_buffer.put(b"x" * 20, timeout=0.01)
+        ring_buffer.get(timeout=1)
+        assert ring_buffer.put(b"x" * 20, timeout=0.01)
+    finally:
+        ring_buffer.close()
+
+
+def test_can_encode_and_decode_batches():
+    assert decode_request(encode_batch([(1, (1, "a")), (2, ())])) == (
+        BATCH,
+        2,
+        [(1, (1, "a")), (2, ())],
+    )
+    decoded = decode_results(encode_batch_results([[{"pk0": 1}], QueryDriverException("failed")]))
+    assert decoded[0] == [{"pk0": 1}]
+    assert isinstance(decoded[1], QueryDriverException)
+    assert decode_results(encode_result([(1,)])) == [[(1,)]]
+
+
+def test_batches_and_batch_results_are_split_to_fit_message_size():
+    statements = [(idx, ("x" * 10,)) for idx in range(10)]
+    messages = encode_batches(statements, max_message_size=100)
+    assert len(messages) > 1 and all(len(message) <= 100 for message in messages)
+    assert [
+        statement for message in messages for statement in decode_request(message)[2]
+    ] == statements
+    results = [[(idx, "x" * 10)] for idx in range(10)]
+    messages = join_batch_results([encode_result(result) for result in results], 100)
+    assert len(messages) > 1 and all(len(message) <= 100 for message in messages)
+    assert [result for message in messages for result in decode_results(message)] == results
@@ -0,0 +1,48 @@
+from gemini_python import QueryMode
+from gemini_python.history_store import SqliteHistoryStore
+from gemini_python.load_generator import LoadGenerator
+from gemini_python.query import build_statement_registry
+from gemini_python.query_driver import PrepareStats
+from gemini_python.results import ProcessResult
+from gemini_python.schema import generate_schema
+from gemini_python.statement_registry import StatementRegistry
+
+
+def test_registry_assigns_stable_ids():
+    registry = StatementRegistry(["select 1", "select 2"])
+    assert registry.register("select 1") == 0
+    assert registry.register("select 3") == 2
+    assert registry.id_of("select 2") == 1
+    assert registry.id_of("unknown") is None
+    assert registry[2] == "select 3"
+    assert len(registry) == 3
+    assert registry.statements == ["select 1", "select 2", "select 3"]
+
+
+def test_generated_queries_reference_registered_statements(simple_schema_config):
+    schema = generate_schema(simple_schema_config)
+    registry = build_statement_registry(schema)
+    assert len(registry) == 3 * len(schema.tables)
+    history_store = SqliteHistoryStore(0, schema, drop_schema=True)
+    generator = LoadGenerator(
+        schema=schema,
+        mode=QueryMode.WRITE,
+        partitions=[[("1",), ("2",)]],
+        history_store=history_store,
+        statement_registry=registry,
+    )
+    _, cql_dto = generator.get_query()
+    assert cql_dto.statement_id is not None
+    assert registry[cql_dto.statement_id] == cql_dto.statement
+
+
+def test_process_result_sums_prepare_stats():
+    process_result = ProcessResult()
+    process_result.add_prepare_stats(
+        PrepareStats(prepared=2, prepare_time=0.5, cache_hits=10, cache_misses=1)
+    )
+    total = process_result + process_result
+    assert total.prepared_statements == 4
+    assert total.prepare_time == 1.0
+    assert total.statement_cache_hits == 20
+    assert total.statement_cache_misses == 2
@@ -1,4 +1,9 @@
+from typing import Iterable, Iterator
+
+import pytest
+
 from gemini_python import CqlDto
+from gemini_python.query_driver import NoOpQueryDriver, QueryDriverException
 from gemini_python.subprocess_query_driver import SubprocessQueryDriver
 
 
@@ -9,3 +14,79 @@ def test_can_query_using_query_driver_in_subprocess():
         result == []
     )  # uses NoOpQueryDriver, so it's always [[] but at least we run this code and verify it ends
     query_driver.teardown()
+
+
+def test_can_collect_submitted_results_in_any_order():
+    query_driver = SubprocessQueryDriver()
+    first = query_driver.submit(CqlDto(statement="select * from test", values=()))
+    second = query_driver.submit(CqlDto(statement="select * from test", values=()))
+    assert first != second
+    assert query_driver.get_result(second) == []
+    assert query_driver.get_result(first) == []
+    query_driver.teardown()
+
+
+def test_can_execute_many_statements_in_one_request():
+    query_driver = SubprocessQueryDriver()
+    single = query_driver.submit(CqlDto(statement="select * from test", values=(1,)))
+    results = query_driver.execute_many(
+        [CqlDto(statement="select * from test", values=(idx,)) for idx in range(5)]
+    )
+    assert results == [[]] * 5
+    assert query_driver.get_result(single) == []
+    query_driver.teardown()
+
+
+class EchoQueryDriver(NoOpQueryDriver):
+    """Returns statement values as the only row. Fetching rows fails for values ("fail",)."""
+
+    def execute(self, cql_dto: CqlDto) -> Iterable:
+        if cql_dto.values == ("fail",):
+            return self._failing_pages()
+        return [cql_dto.values]
+
+    @staticmethod
+    def _failing_pages() -> Iterator:
+        yield ("first page",)
+        raise QueryDriverException("fetching next page failed")
+
+
+@pytest.fixture
+def echo_query_driver(monkeypatch):
+    # subprocess is forked, so it uses patched factory too
+    monkeypatch.setattr(
+        "gemini_python.subprocess_query_driver.QueryDriverFactory.create_query_driver",
+        lambda *args: EchoQueryDriver(),
+    )
+
+
+@pytest.mark.usefixtures("echo_query_driver")
+def test_failed_page_fetch_fails_only_its_statement_of_many():
+    query_driver = SubprocessQueryDriver()
+    results = query_driver.execute_many(
+        [CqlDto(statement="select * from test", values=values) for values in [("fail",), (1,)]]
+    )
+    assert isinstance(results[0], QueryDriverException)
+    assert results[1] == [(1,)]
+    assert query_driver.execute(CqlDto(statement="select * from test", values=(2,))) == [(2,)]
+    query_driver.teardown()
+
+
+@pytest.mark.usefixtures("echo_query_driver")
+def test_many_statements_are_split_to_fit_ring_buffer():
+    query_driver = SubprocessQueryDriver(ring_buffer_size=64 * 1024)
+    values = [(idx, "x" * 1000) for idx in range(200)]  # ~200KB of requests and of results
+    results = query_driver.execute_many(
+        [CqlDto(statement="select * from test", values=row) for row in values]
+    )
+    assert results == [[row] for row in values]
+    query_driver.teardown()
+
+
+def test_waiting_for_result_of_dead_subprocess_fails():
+    query_driver = SubprocessQueryDriver()
+    query_driver._query_driver_process.kill()  # pylint: disable=protected-access
+    request_id = query_driver.submit(CqlDto(statement="select * from test", values=()))
+    with pytest.raises(QueryDriverException):
+        query_driver.get_result(request_id)
+    query_driver.teardown()
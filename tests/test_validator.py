@@ -1,3 +1,5 @@
+from collections import namedtuple
+
 import pytest
 
 from gemini_python import ValidationError
@@ -29,3 +31,13 @@ def test_validate_result_different_length_raises_validation_error():
         validate_result(oracle_result, sut_result)
     assert exc_info.value.oracle_value == 4  # type: ignore
     assert exc_info.value.sut_value is None
+
+
+def test_validate_result_compares_tuple_rows_positionally():
+    Row = namedtuple("Row", ["pk0", "ck0", "col0"])
+    oracle_result = [Row(1, 2, 3), Row(1, 3, 4)]
+    validate_result(oracle_result, [(1, 2, 3), (1, 3, 4)])
+    with pytest.raises(ValidationError) as exc_info:
+        validate_result(oracle_result, [(1, 2, 3), (1, 4, 3)])
+    assert exc_info.value.oracle_value == (1, 3, 4)
+    assert exc_info.value.sut_value == (1, 4, 3)
@@ -0,0 +1,63 @@
+import random
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from gemini_python import CqlDto, OnErrorClb, OnSuccessClb
+from gemini_python.query import DeleteQueryGenerator, InsertQueryGenerator, SelectQueryGenerator
+from gemini_python.query_driver import QueryDriver
+from gemini_python.schema import Schema
+
+
+class TableQueryDriver(QueryDriver):
+    """In memory tables for unit tests purposes - executes statements of query generators of given schema.
+
+    Statements are executed when submitted, but `execute_async` callbacks are called after random delay
+    (up to `max_delay` seconds), so responses complete in different order than statements were executed."""
+
+    def __init__(self, schema: Schema, max_delay: float = 0.0) -> None:
+        super().__init__()
+        self._max_delay = max_delay
+        self._lock = threading.Lock()
+        # statement: (operation, table name, number of key columns)
+        self._statements: Dict[str, Tuple[str, str, int]] = {}
+        self._tables: Dict[str, Dict[tuple, tuple]] = {}
+        for table in schema.tables:
+            keys_count = len(table.partition_keys + table.clustering_keys)
+            for operation, generator in (
+                ("insert", InsertQueryGenerator),
+                ("select", SelectQueryGenerator),
+                ("delete", DeleteQueryGenerator),
+            ):
+                self._statements[generator.build_statement(table)] = (
+                    operation,
+                    table.full_name,
+                    keys_count,
+                )
+            self._tables[table.full_name] = {}
+
+    def execute_async(
+        self,
+        cql_dto: CqlDto,
+        on_success: List[OnSuccessClb],
+        on_error: List[OnErrorClb],
+    ) -> None:
+        result = self.execute(cql_dto)
+
+        def complete() -> None:
+            for callback in on_success:
+                callback(result)
+
+        threading.Timer(random.uniform(0, self._max_delay), complete).start()
+
+    def execute(self, cql_dto: CqlDto) -> Iterable:
+        operation, table_name, keys_count = self._statements[cql_dto.statement]
+        rows = self._tables[table_name]
+        with self._lock:
+            if operation == "insert":
+                rows[cql_dto.values[:keys_count]] = cql_dto.values
+                return []
+            if operation == "delete":
+                rows.pop(cql_dto.values, None)
+                return []
+            row = rows.get(cql_dto.values)
+            return [row] if row is not None else []